@@ -1,31 +1,53 @@
+import time
+_IMPORT_STARTED = time.perf_counter()  # --profile-startup times every import below
 import sys
 import os
+import argparse
+import multiprocessing
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QLabel, QMenu, QPushButton,
     QTabWidget, QWidget, QVBoxLayout, QHBoxLayout, QComboBox,
-    QFileDialog, QTextBrowser, QLineEdit, QShortcut
+    QFileDialog, QTextBrowser, QShortcut, QCheckBox, QInputDialog,
+    QProgressDialog, QTableView, QAbstractItemView
 )
-from PyQt5.QtGui import (
-    QPixmap, QPainter, QPen, QPainterPath,
-    QTransform, QColor
+from PyQt5.QtGui import QPixmap, QPainter, QKeySequence
+from PyQt5.QtCore import (
+    Qt, QEvent, QObject, QThreadPool, pyqtSignal, QTimer, QStandardPaths,
+    QSize, QRectF, QCoreApplication, QAbstractTableModel, QModelIndex
+)
+
+from umpire_track.common import (
+    FONT_SIZES, IMAGE_SIZE, INITIAL_IMAGE, SCREEN_DPI, LOG_LEVELS,
+    asset_base_path, instruments
+)
+from umpire_track.assets import (
+    DECODE_PRIORITY, THUMB_SIZE, ASSET_BUNDLE, ASSET_LAYERS, PixmapCache, RenderCache,
+    open_render_cache, event_sort_key, pack_asset_bundle, pack_asset_layers, open_asset_index,
+    DiagramLoader, ThumbnailSource, benchmark_asset_sources, benchmark_asset_layers
+)
+from umpire_track.renderer import (
+    DiagramRenderer, DiagramMimeData, DiagramSource, ExportTask
+)
+from umpire_track.scene import (
+    SCENE_FILTER, JOURNAL_COMPACT_EVERY, claim_journal, scene_document, save_scene, load_scene,
+    SceneJournal, journal_record, UndoHistory
+)
+from umpire_track.canvas import DragStats, DraggableMixin, WidgetCanvas, WidgetCanvasView, SceneCanvas
+from umpire_track.cli import (
+    BATCH_FORMATS, SERVER_NAME, parse_render_spec, job_name, render_job, InstanceServer,
+    forward_to_instance, run_batch
 )
-from PyQt5.QtCore import Qt, QPoint, QEvent
 
 # Constants
 BUTTON_SIZE = (80, 50)
-LINE_SIZE = (110, 70)
 SAVE_BUTTON_SIZE = (160, 50)
-LINE_COLOR = QColor(0, 0, 255)
-LINE_THICKNESS = 3
-FONT_SIZES = {
-    'label': 17,
-    'button': 20,
-    'save_button': 18,
-    'text_box': 16
-}
-IMAGE_SIZE = (750, 400)
 COMBOBOX_SIZE = (150, 40)
-INITIAL_IMAGE = "BlankOval.png"
+HUD_REFRESH_MS = 500
+EXPORT_THREADS = 1  # Exports run on their own pool; Qt's smooth scaling uses the global one
+EXPORT_FILTER = "PNG Files (*.png);;JPEG Files (*.jpg);;SVG Files (*.svg);;PDF Files (*.pdf);;All Files (*)"
+THUMB_CACHE_BYTES = 8 * 1024 * 1024  # Decoded gallery thumbnails kept in memory
+THUMB_DIRECTORY = "thumbnails"  # Under the user cache location
+
 APP_STYLES = """
 /*---------------------------------Background--------------------------------------*/
 QWidget {
@@ -101,175 +123,394 @@ QComboBox QAbstractItemView {
     selection-background-color: burlywood;
     selection-color: black;
 }
+""" + f"""
+/*---------------------------------Help Tab--------------------------------------*/
+QLabel#helpTitle {{
+    font-size: 16px;
+    margin-bottom: 1px;
+}}
+
+QTextBrowser#helpText {{
+    border: none;
+    background: transparent;
+    padding: 0;
+    margin: 0;
+}}
+
+/*---------------------------------Edit Tab--------------------------------------*/
+QPushButton[role="tool"] {{
+    font-size: {FONT_SIZES['button']}px;
+}}
+
+QPushButton[role="save"] {{
+    font-size: {FONT_SIZES['save_button']}px;
+}}
+
+QLabel#numberItem {{
+    background-color: transparent;
+    border: none;
+    font-size: {FONT_SIZES['label']}px;
+    padding: 0;
+    margin: 0;
+}}
+
+QLabel#textItem {{
+    background-color: white;
+    border: 1px solid black;
+    padding: 2px;
+    font-size: {FONT_SIZES['text_box']}px;
+}}
+
+QLabel#resizeHandle {{
+    background-color: #666;
+    border: 1px solid black;
+    padding: 2px;
+}}
+
+QLineEdit#textEditor {{
+    border: 2px solid blue;
+    padding: 2px;
+    font-size: {FONT_SIZES['text_box']}px;
+    background: white;
+}}
+
+QLabel#lineItem {{
+    background-color: transparent;
+    border: none;
+}}
+
+QLabel#numberItem[selected="true"] {{
+    border: 1px dashed darkorange;
+}}
+
+QLabel#textItem[selected="true"] {{
+    border: 1px solid darkorange;
+}}
+
+/*---------------------------------Performance HUD--------------------------------------*/
+QLabel#performanceHud {{
+    background-color: rgba(0, 0, 0, 170);
+    color: lime;
+    border: none;
+    border-radius: 4px;
+    padding: 4px;
+    font-size: 12px;
+}}
 """
 
-class DraggableMixin:
-    """Mixin class providing draggable functionality"""
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.moving = False
-        self.setAttribute(Qt.WA_DeleteOnClose)
-        self.setFocusPolicy(Qt.StrongFocus)
-
-    def mousePressEvent(self, event):
-        if event.button() == Qt.LeftButton:
-            self.moving = True
-            self.offset = event.pos()
-            self.setFocus()
-
-    def mouseMoveEvent(self, event):
-        if self.moving:
-            new_pos = self.mapToParent(event.pos() - self.offset)
-            self.move(new_pos)
-
-    def mouseReleaseEvent(self, event):
-        self.moving = False
-
-    def keyPressEvent(self, event):
-        if event.key() == Qt.Key_Backspace:
-            self.close()
-
-class DraggableLabel(DraggableMixin, QLabel):
-    """Draggable number label with deletion support"""
-    def __init__(self, text, parent=None):
-        super().__init__(parent)
-        self.setText(text)
-        self.setStyleSheet(f"""
-            background-color: transparent;
-            border: none;
-            font-size: {FONT_SIZES['label']}px;
-            font-weight: bold;
-            color: black;
-            padding: 0;
-            margin: 0;
-        """)
-        self.setFixedSize(35, 30)
-        self.setAlignment(Qt.AlignCenter)
 
-class ResizableTextLabel(DraggableMixin, QLabel):
-    """Resizable and editable text label with drag support"""
-    def __init__(self, text, parent=None):
+class StartupProfile(QObject):
+    """Times named startup phases for --profile-startup and reports after the first paint"""
+    def __init__(self, parent=None):
         super().__init__(parent)
-        self.setText(text)
-        self.setStyleSheet("""
-            background-color: white;
-            border: 1px solid black;
-            padding: 2px;
-            font-size: {FONT_SIZES['text_box']}px;
-        """)
-        self.setMinimumSize(80, 30)
-        self.resize(120, 30)
-        self.setAlignment(Qt.AlignCenter)
-        self.resizing = False
-        
-        # Add resize handle
-        self.resize_handle = QLabel(self)
-        self.resize_handle.setStyleSheet("background-color: #666;")
-        self.resize_handle.setFixedSize(8, 8)
-        self.resize_handle.move(self.width()-8, self.height()-8)
-        self.resize_handle.installEventFilter(self)
-        self.resize_handle.setCursor(Qt.SizeFDiagCursor)
+        self.phases = [("imports", time.perf_counter() - _IMPORT_STARTED)]
+        self.reported = False
+        self.on_report = None
+        self._paint_started = None
+
+    def add(self, name, seconds):
+        self.phases.append((name, seconds))
+        if self.reported:
+            print(f"Startup profile: {name} {seconds * 1000:.1f} ms (after first paint)")
+
+    def measure(self, name, func):
+        started = time.perf_counter()
+        try:
+            return func()
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def watch_first_paint(self):
+        self._paint_started = time.perf_counter()
+        QApplication.instance().installEventFilter(self)
 
     def eventFilter(self, obj, event):
-        if obj == self.resize_handle:
-            if event.type() == QEvent.MouseButtonPress:
-                self.resizing = True
-                self.initial_size = self.size()
-                self.initial_mouse_pos = event.globalPos()
-                return True
-            elif event.type() == QEvent.MouseMove and self.resizing:
-                current_mouse_pos = event.globalPos()
-                delta_x = current_mouse_pos.x() - self.initial_mouse_pos.x()
-                delta_y = current_mouse_pos.y() - self.initial_mouse_pos.y()
-                
-                # Calculate new size based on initial dimensions
-                new_width = max(self.minimumWidth(), self.initial_size.width() + delta_x)
-                new_height = max(self.minimumHeight(), self.initial_size.height() + delta_y)
-                
-                # Apply new size
-                self.resize(new_width, new_height)
-                return True
-            elif event.type() == QEvent.MouseButtonRelease:
-                self.resizing = False
-                return True
-        return super().eventFilter(obj, event)
-
-    def resizeEvent(self, event):
-        self.resize_handle.move(self.width()-8, self.height()-8)
-        super().resizeEvent(event)
-
-    def mouseDoubleClickEvent(self, event):
-        self.start_editing()
-
-    def start_editing(self):
-        """Replace label with editable line edit"""
-        self.editor = QLineEdit(self.text(), self)
-        self.editor.setStyleSheet("""
-            border: 2px solid blue;
-            font-size: {FONT_SIZES['text_box']}px;
-            background: white;
-        """)
-        self.editor.setGeometry(2, 2, self.width()-4, self.height()-4)
-        self.editor.selectAll()
-        self.editor.setFocus()
-        self.editor.show()
-        self.editor.editingFinished.connect(self.finish_editing)
-
-    def finish_editing(self):
-        """Update label text from editor"""
-        self.setText(self.editor.text())
-        self.editor.deleteLater()
-        self.update()
+        if event.type() == QEvent.Paint:
+            QApplication.instance().removeEventFilter(self)
+            # Let the rest of this paint pass finish before stopping the clock
+            QTimer.singleShot(0, self._first_paint_done)
+        return False
 
-class DraggableLine(DraggableMixin, QLabel):
-    """Draggable, rotatable line widget with styling"""
-    def __init__(self, line_type, parent=None):
-        super().__init__(parent)
-        self.line_type = line_type
-        self.angle = 0
-        self.setFixedSize(*LINE_SIZE)
-        self.setStyleSheet("background-color: transparent; border: none;")
+    def _first_paint_done(self):
+        self.add("first paint", time.perf_counter() - self._paint_started)
+        self.report()
+        if self.on_report is not None:
+            self.on_report()
 
-    def paintEvent(self, event):
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
-        center = QPoint(self.width() // 2, self.height() // 2)
-        
-        transform = QTransform()
-        transform.translate(center.x(), center.y())
-        transform.rotate(self.angle)
-        transform.translate(-center.x(), -center.y())
-        painter.setTransform(transform)
+    def report(self):
+        self.reported = True
+        width = max(len(name) for name, _ in self.phases)
+        for name, seconds in self.phases:
+            print(f"{name:<{width}}  {seconds * 1000:8.1f} ms")
+        print(f"{'total':<{width}}  {sum(seconds for _, seconds in self.phases) * 1000:8.1f} ms")
 
-        pen = QPen(LINE_COLOR, LINE_THICKNESS)
-        painter.setPen(pen)
+class PerformanceHud(QLabel):
+    """In-window overlay with frame time, pixmap cache hit rate and Edit item count.
 
-        if self.line_type == "straight":
-            painter.drawLine(0, self.height()//2, self.width(), self.height()//2)
+    Frames are timed by handling the window's UpdateRequest inside a span,
+    so nothing is measured while the HUD is hidden.
+    """
+    def __init__(self, window):
+        super().__init__(window)
+        self.setObjectName("performanceHud")
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+
+    def setVisible(self, visible):
+        super().setVisible(visible)
+        if visible:
+            self.window().installEventFilter(self)
+            self.timer.start(HUD_REFRESH_MS)
+            self.refresh()
         else:
-            path = QPainterPath()
-            path.moveTo(0, self.height()//2)
-            path.quadTo(self.width()//2, self.height(), self.width(), self.height()//2)
-            painter.drawPath(path)
+            self.window().removeEventFilter(self)
+            self.timer.stop()
+
+    def eventFilter(self, obj, event):
+        if obj is self.window() and event.type() == QEvent.UpdateRequest:
+            with instruments.span("frame"):
+                obj.event(event)
+            return True
+        return False
+
+    def refresh(self):
+        window = self.window()
+        stats = instruments.stats()
+        frame = stats.get('frame', {'last': 0.0, 'max': 0.0})
+        live, pooled = 0, 0
+        if hasattr(window, 'edit_canvas'):
+            live = len(window.edit_canvas.items)
+            pooled = sum(map(len, window.edit_canvas.registry.pools.values()))
+        lines = [
+            f"frame {frame['last']:5.1f} ms (max {frame['max']:.1f})",
+            f"cache hits {window.pixmap_cache.stats()['hit_rate']:.0%}",
+            f"render cache hits {window.render_cache.stats()['hit_rate']:.0%}",
+            f"items {live} (pooled {pooled})",
+        ]
+        for name in ("view.load", "decode", "export", "clipboard.copy"):
+            if name in stats:
+                lines.append(f"{name} {stats[name]['last']:.1f} ms")
+        self.setText("\n".join(lines))
+        self.adjustSize()
+        self.move(window.width() - self.width() - 8, 8)
+        self.raise_()
+
+class DiagramGridModel(QAbstractTableModel):
+    """Events by umpire counts, with thumbnails decoded only when a view asks for them"""
+    def __init__(self, source, loader, cache, parent=None):
+        super().__init__(parent)
+        self.source = source
+        self.loader = loader
+        self.cache = cache
+        self.events = []
+        self.counts = []
+        self.loader.loaded.connect(self._on_loaded)
+        self.refresh()
+
+    def refresh(self):
+        """Re-read the event and umpire lists, dropping every thumbnail"""
+        self.beginResetModel()
+        self.loader.cancel_stale()
+        self.cache.clear()
+        self.events = self.source.events()
+        self.counts = self.source.umpire_counts()
+        self.endResetModel()
+
+    def keys(self):
+        return [(event, umpires) for event in self.events for umpires in self.counts
+                if self.source.has((event, umpires))]
+
+    def key(self, index):
+        return self.events[index.row()], self.counts[index.column()]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.events)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.counts)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return f"{self.counts[section]} umpires"
+        return self.events[section]
+
+    def flags(self, index):
+        if not self.source.has(self.key(index)):
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def data(self, index, role=Qt.DisplayRole):
+        key = self.key(index)
+        if role == Qt.DecorationRole and self.source.has(key):
+            pixmap = self.cache.get(key)
+            if pixmap is None:
+                self.loader.request(key, DECODE_PRIORITY['current'])
+            return pixmap
+        if role == Qt.ToolTipRole and self.source.has(key):
+            return f"{key[0]}, {key[1]} umpires"
+        return None
+
+    def _on_loaded(self, key, pixmap):
+        event, umpires = key
+        if event in self.events and umpires in self.counts:
+            index = self.index(self.events.index(event), self.counts.index(umpires))
+            self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+class DiagramGallery(QTableView):
+    """Scrollable grid of diagram thumbnails; only tiles in view are decoded.
+
+    Scrolling cancels queued decodes for tiles that have left the viewport.
+    """
+    diagram_chosen = pyqtSignal(object)
+
+    def __init__(self, source, directory, parent=None):
+        super().__init__(parent)
+        self.setObjectName("gallery")
+        self.thumbnails = ThumbnailSource(source, directory, THUMB_SIZE, self.devicePixelRatioF())
+        self.loader = DiagramLoader(PixmapCache(THUMB_CACHE_BYTES), self.thumbnails, self)
+        self.loader.failed.connect(
+            lambda key, error: instruments.warning("Failed to load thumbnail %s%d: %s", *key, error)
+        )
+        self.grid_model = DiagramGridModel(source, self.loader, self.loader.cache, self)
+        self.setModel(self.grid_model)
+        self.setIconSize(QSize(*THUMB_SIZE))
+        self.horizontalHeader().setDefaultSectionSize(THUMB_SIZE[0] + 8)
+        self.verticalHeader().setDefaultSectionSize(THUMB_SIZE[1] + 8)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setHorizontalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.clicked.connect(lambda index: self.diagram_chosen.emit(self.grid_model.key(index)))
+        for bar in (self.verticalScrollBar(), self.horizontalScrollBar()):
+            bar.valueChanged.connect(self._cancel_hidden)
+
+    def visible_keys(self):
+        """Keys of the tiles at least partly inside the viewport"""
+        viewport = self.viewport().rect()
+        model = self.grid_model
+        last_row = self.rowAt(viewport.bottom())
+        last_column = self.columnAt(viewport.right())
+        rows = range(max(self.rowAt(viewport.top()), 0),
+                     (last_row if last_row >= 0 else model.rowCount() - 1) + 1)
+        columns = range(max(self.columnAt(viewport.left()), 0),
+                        (last_column if last_column >= 0 else model.columnCount() - 1) + 1)
+        return {(model.events[row], model.counts[column]) for row in rows for column in columns}
+
+    def _cancel_hidden(self):
+        self.loader.cancel_stale(keep=self.visible_keys())
+
+    def refresh(self):
+        self.grid_model.refresh()
+
+    def shutdown(self):
+        self.loader.shutdown()
+
+class ScaledImageLabel(QLabel):
+    """Label that shows its source pixmap stretched to the contents rect.
+
+    The smooth rescale is done once per (size, device pixel ratio) and
+    cached, so a repaint is a 1:1 blit; a resize, a move to a screen with
+    another DPR or a new source rebuilds it on the next paint. Drawn into a
+    zoomed view, the source is filtered straight to the zoomed size instead.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._source = QPixmap()
+        self._scaled = None
+        self._scaled_key = None
+
+    def source(self):
+        """The unscaled pixmap, for copying and exporting"""
+        return self._source
 
-    def keyPressEvent(self, event):
-        super().keyPressEvent(event)
-        if event.key() == Qt.Key_R:
-            self.angle = (self.angle + 15) % 360
-            self.update()
+    def set_source(self, pixmap):
+        self._source = pixmap
+        self._scaled = None
+        self.update()
+
+    def clear(self):
+        self.set_source(QPixmap())
+        super().clear()
+
+    def scaled_pixmap(self):
+        size = self.contentsRect().size()
+        dpr = self.devicePixelRatioF()
+        key = (size.width(), size.height(), dpr)
+        if self._scaled is None or self._scaled_key != key:
+            if self._source.size() == size * dpr and self._source.devicePixelRatio() == dpr:
+                # Already drawn for this label, e.g. by the procedural renderer
+                self._scaled = self._source
+            else:
+                with instruments.span("image.scale"):
+                    self._scaled = self._source.scaled(
+                        size * dpr, Qt.IgnoreAspectRatio, Qt.SmoothTransformation
+                    )
+                    self._scaled.setDevicePixelRatio(dpr)
+            self._scaled_key = key
+        return self._scaled
+
+    def paintEvent(self, event):
+        if self._source.isNull():
+            super().paintEvent(event)
+            return
+        painter = QPainter(self)
+        self.drawFrame(painter)
+        if painter.deviceTransform().m11() > self.devicePixelRatioF():
+            painter.setRenderHint(QPainter.SmoothPixmapTransform)
+            painter.drawPixmap(QRectF(self.contentsRect()), self._source, QRectF(self._source.rect()))
+        else:
+            painter.drawPixmap(self.contentsRect().topLeft(), self.scaled_pixmap())
+        painter.end()
 
 class MyApp(QMainWindow):
     """Main application window"""
-    def __init__(self):
+    startup_profile = None
+
+    def __init__(self, scene_canvas=False, autosave=True, hud=False):
         super().__init__()
-        self._load_styles()
+        self.scene_canvas = scene_canvas
+        self.edit_background = INITIAL_IMAGE
+        self.asset_index = self._timed("asset index", lambda: open_asset_index(self))
+        self.asset_index.assets_changed.connect(self._on_assets_changed)
+        self.diagram_source = DiagramSource(self.asset_index, DiagramRenderer())
+        self.pixmap_cache = PixmapCache()
+        self.render_cache = open_render_cache()
+        self.diagram_loader = DiagramLoader(self.pixmap_cache, self.diagram_source, self)
+        self.diagram_loader.loaded.connect(self._on_diagram_loaded)
+        self.diagram_loader.failed.connect(self._on_diagram_failed)
+        self.export_pool = QThreadPool(self)
+        self.export_pool.setMaxThreadCount(EXPORT_THREADS)
+        self.current_diagram = None
+        self.shown_vector = None  # Key of the procedural render in imageLabel1, None for official art
+        self._timed("styles", self._load_styles)
         self._init_ui()
-        self.number_labels = []
         self.setFixedSize(960, 540)
         
         # Set up keyboard shortcut
         self.copy_shortcut = QShortcut(Qt.Key_C, self)
         self.copy_shortcut.activated.connect(self._handle_copy_shortcut)
+        self.undo_shortcut = QShortcut(QKeySequence.Undo, self)
+        self.undo_shortcut.activated.connect(self._handle_undo_shortcut)
+        self.redo_shortcut = QShortcut(QKeySequence.Redo, self)
+        self.redo_shortcut.activated.connect(self._handle_redo_shortcut)
+        self.hud = None
+        self.hud_shortcut = QShortcut(Qt.Key_F12, self)
+        self.hud_shortcut.activated.connect(self.toggle_hud)
+        if hud:
+            self.toggle_hud()
+
+        self.journal = None
+        if autosave:
+            self._timed("autosave", self._start_autosave)
+
+    def _timed(self, phase, func):
+        """Run one startup step, timing it when --profile-startup is on"""
+        if self.startup_profile is None:
+            return func()
+        return self.startup_profile.measure(phase, func)
 
     def _load_styles(self):
         """Load embedded CSS styles"""
@@ -282,18 +523,29 @@ class MyApp(QMainWindow):
         self.tabs = QTabWidget(self)
         self.setCentralWidget(self.tabs)
 
-        # Create tabs in order
-        self._create_help_tab()
-        self._create_view_tab()
-        self._create_edit_tab()
+        # Create empty tabs in order; each is filled in the first time it is shown
+        self.help_tab, self.view_tab, self.edit_tab = QWidget(), QWidget(), QWidget()
+        self.gallery_tab = QWidget()
+        self._tab_builders = {}
+        for tab, title, builder in ((self.help_tab, "Help", self._create_help_tab),
+                                    (self.view_tab, "View", self._create_view_tab),
+                                    (self.edit_tab, "Edit", self._create_edit_tab),
+                                    (self.gallery_tab, "Gallery", self._create_gallery_tab)):
+            self.tabs.addTab(tab, title)
+            self._tab_builders[tab] = builder
+        self._ensure_tab(self.tabs.currentWidget())
+        self.tabs.currentChanged.connect(lambda index: self._ensure_tab(self.tabs.widget(index)))
         self.show()
 
+    def _ensure_tab(self, tab):
+        """Build a tab's contents unless that has already happened"""
+        builder = self._tab_builders.pop(tab, None)
+        if builder is not None:
+            self._timed(f"{self.tabs.tabText(self.tabs.indexOf(tab))} tab", builder)
+
     def _create_help_tab(self):
         """Create help/instructions tab"""
-        help_tab = QWidget()
-        self.tabs.addTab(help_tab, "Help")
-        
-        layout = QVBoxLayout(help_tab)
+        layout = QVBoxLayout(self.help_tab)
         layout.setContentsMargins(10, 5, 10, 10)
         layout.setSpacing(0)
         
@@ -325,11 +577,7 @@ class MyApp(QMainWindow):
         section_layout.setSpacing(0)
         
         title_label = QLabel(title)
-        title_label.setStyleSheet("""
-            font-size: 16px; 
-            font-weight: bold;
-            margin-bottom: 1px;
-        """)
+        title_label.setObjectName("helpTitle")
         
         content_label = QTextBrowser()
         content_label.setHtml(f"""
@@ -347,12 +595,7 @@ class MyApp(QMainWindow):
             </style>
             {content}
         """)
-        content_label.setStyleSheet("""
-            border: none;
-            background: transparent;
-            padding: 0;
-            margin: 0;
-        """)
+        content_label.setObjectName("helpText")
         content_label.setMinimumHeight(80)
         content_label.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
         
@@ -377,6 +620,7 @@ class MyApp(QMainWindow):
             <li>Select event type from first dropdown</li>
             <li>Select umpire count from second dropdown</li>
             <li>Right-click image or press 'C' to copy</li>
+            <li>Or pick a diagram by clicking its thumbnail in the Gallery tab</li>
         </ol>
         """
 
@@ -387,16 +631,16 @@ class MyApp(QMainWindow):
             <li>Add numbers with buttons (drag to move)</li>
             <li>Add lines/curves (R to rotate)</li>
             <li>Add resizable text boxes (double-click to edit, enter to submit)</li>
-            <li>Backspace deletes selected items</li>
+            <li>Backspace deletes selected items (Ctrl+Z/Ctrl+Y undo and redo)</li>
+            <li>Shift-click or drag a box over the background to select several items; dragging, R and Backspace then act on all of them</li>
+            <li>Scroll or press Ctrl+=/Ctrl+- to zoom, middle-drag to pan and Ctrl+0 to reset</li>
             <li>Save button exports final image</li>
+            <li>Save Scene/Open Scene keep an editable copy of your layout</li>
         </ol>
         """
 
     def _create_view_tab(self):
         """Create the view tab with image and comboboxes"""
-        self.view_tab = QWidget()
-        self.tabs.addTab(self.view_tab, "View")
-        
         layout = QVBoxLayout(self.view_tab)
         self._setup_image_label(layout, "view")
         self._setup_comboboxes(layout)
@@ -404,21 +648,37 @@ class MyApp(QMainWindow):
 
     def _create_edit_tab(self):
         """Create the edit tab with image and controls"""
-        self.edit_tab = QWidget()
-        self.tabs.addTab(self.edit_tab, "Edit")
-        
         layout = QVBoxLayout(self.edit_tab)
         self._setup_image_label(layout, "edit")
         self._setup_number_buttons()
         self._setup_line_buttons()
-        self._setup_save_button(layout)
+        self._setup_save_buttons(layout)
+        self.edit_canvas.changed.connect(self._on_canvas_changed)
+        self.undo_history = UndoHistory(self.edit_canvas)
+
+    def _create_gallery_tab(self):
+        """Create the gallery tab of diagram thumbnails"""
+        layout = QVBoxLayout(self.gallery_tab)
+        directory = os.path.join(
+            QStandardPaths.writableLocation(QStandardPaths.CacheLocation), THUMB_DIRECTORY
+        )
+        self.gallery = DiagramGallery(self.diagram_source, directory, self.gallery_tab)
+        self.gallery.diagram_chosen.connect(self.show_diagram)
+        layout.addWidget(self.gallery)
 
     def _setup_image_label(self, layout, tab_type):
         """Configure image label for specified tab"""
-        label = QLabel(self.view_tab if tab_type == "view" else self.edit_tab)
-        label.setAlignment(Qt.AlignCenter)
-        label.setMinimumSize(*IMAGE_SIZE)
-        layout.addWidget(label, alignment=Qt.AlignCenter)
+        if tab_type == "edit" and self.scene_canvas:
+            label = view = SceneCanvas(self.edit_tab)
+        elif tab_type == "edit":
+            label = ScaledImageLabel()
+            label.setAlignment(Qt.AlignCenter)
+            view = WidgetCanvasView(label, APP_STYLES, self.edit_tab)
+        else:
+            label = view = ScaledImageLabel(self.view_tab)
+            label.setAlignment(Qt.AlignCenter)
+            label.setMinimumSize(*IMAGE_SIZE)
+        layout.addWidget(view, alignment=Qt.AlignCenter)
         
         if tab_type == "view":
             self.imageLabel1 = label
@@ -426,6 +686,8 @@ class MyApp(QMainWindow):
             label.customContextMenuRequested.connect(self._show_image_menu)
         else:
             self.imageLabel2 = label
+            self.edit_view = view
+            self.edit_canvas = label if self.scene_canvas else WidgetCanvas(label)
             
         self._set_initial_image(label, INITIAL_IMAGE)
 
@@ -434,32 +696,20 @@ class MyApp(QMainWindow):
         combo_layout = QHBoxLayout()
         
         self.eventComboBox = self._create_combobox(
-            "Select an event", [
-                "50m", 
-                "60m", 
-                "60m H", 
-                "200m",
-                "300m",
-                "400m",
-                "600m",
-                "800m",
-                "1000m",
-                "1200m",
-                "1500m",
-                "2000m",
-                "3000m",
-                "4 x 100m Relay",
-                "4 x 200m Relay",
-                "4 x 400m Relay",
-                "4 x 800m Relay",
-                ]
+            "Select an event", self.diagram_source.events()
         )
         self.umpireComboBox = self._create_combobox(
-            "Select number of umpires", [str(i) for i in range(5, 11)]
+            "Select number of umpires", [str(i) for i in self.diagram_source.umpire_counts()]
         )
+        self._update_combobox_availability()
+
+        self.vectorCheckBox = QCheckBox("Vector", self.view_tab)
+        self.vectorCheckBox.setToolTip("Draw schematic diagrams at screen resolution instead of the official art")
+        self.vectorCheckBox.toggled.connect(self._set_prefer_vector)
 
         combo_layout.addWidget(self.eventComboBox)
         combo_layout.addWidget(self.umpireComboBox)
+        combo_layout.addWidget(self.vectorCheckBox)
         layout.addLayout(combo_layout)
 
     def _create_combobox(self, placeholder, items):
@@ -471,6 +721,78 @@ class MyApp(QMainWindow):
         combo.setMinimumSize(*COMBOBOX_SIZE)
         return combo
 
+    def _update_combobox_availability(self):
+        """Disable umpire counts that have no diagram for the selected event"""
+        event = self.eventComboBox.currentText() if self.eventComboBox.currentIndex() > 0 else None
+        model = self.umpireComboBox.model()
+        for index in range(1, self.umpireComboBox.count()):
+            umpires = int(self.umpireComboBox.itemText(index))
+            available = event is None or self.diagram_source.has((event, umpires))
+            model.item(index).setEnabled(available)
+        model = self.eventComboBox.model()
+        events = set(self.diagram_source.events())
+        for index in range(1, self.eventComboBox.count()):
+            model.item(index).setEnabled(self.eventComboBox.itemText(index) in events)
+
+    def _insert_sorted(self, combo, text, sort_key):
+        """Insert text into combo after the placeholder, keeping items ordered"""
+        existing = [combo.itemText(i) for i in range(1, combo.count())]
+        if text in existing:
+            return
+        position = 1 + sum(1 for item in existing if sort_key(item) < sort_key(text))
+        combo.insertItem(position, text)
+
+    def _on_assets_changed(self, added, removed, rewritten):
+        """Fold asset index updates into the comboboxes and caches"""
+        for key in removed + rewritten:
+            self.pixmap_cache.discard(key)
+        if hasattr(self, 'imageLabel2') and self.edit_background in map(self.asset_index.assets.get, rewritten):
+            self._set_initial_image(self.imageLabel2, self.edit_background)
+        if hasattr(self, 'gallery'):
+            self.gallery.refresh()
+        if not hasattr(self, 'eventComboBox'):
+            return
+        for combo in (self.eventComboBox, self.umpireComboBox):
+            combo.blockSignals(True)
+        for event, umpires in added:
+            self._insert_sorted(self.eventComboBox, event, event_sort_key)
+            self._insert_sorted(self.umpireComboBox, str(umpires), int)
+        self._update_combobox_availability()
+        for combo in (self.eventComboBox, self.umpireComboBox):
+            combo.blockSignals(False)
+        instruments.info("Asset index updated: %d added, %d removed, %d rewritten",
+                         len(added), len(removed), len(rewritten))
+        if self.current_diagram in removed:
+            self.current_diagram = None
+            self.shown_vector = None
+            self.imageLabel1.clear()
+        if self.current_diagram is None:
+            self._handle_combobox_changes()
+        elif self.current_diagram in rewritten:
+            self._update_image(self.imageLabel1, self.current_diagram)
+
+    def _set_prefer_vector(self, checked):
+        """Switch View diagrams between the rasters and the procedural renderer"""
+        source = self.diagram_source
+        source.prefer_vector = checked
+        size = self.imageLabel1.contentsRect().size()
+        source.render_size = (size.width(), size.height())
+        source.device_pixel_ratio = self.imageLabel1.devicePixelRatioF()
+        for combo in (self.eventComboBox, self.umpireComboBox):
+            combo.blockSignals(True)
+        for event in source.events():
+            self._insert_sorted(self.eventComboBox, event, event_sort_key)
+        for umpires in source.umpire_counts():
+            self._insert_sorted(self.umpireComboBox, str(umpires), int)
+        for combo in (self.eventComboBox, self.umpireComboBox):
+            combo.blockSignals(False)
+        self.diagram_loader.cancel_stale()
+        self.pixmap_cache.clear()
+        if hasattr(self, 'gallery'):
+            self.gallery.refresh()
+        self.current_diagram = None
+        self._handle_combobox_changes()
+
     def _connect_combobox_signals(self):
         """Connect combobox change signals"""
         self.eventComboBox.currentIndexChanged.connect(self._handle_combobox_changes)
@@ -479,12 +801,12 @@ class MyApp(QMainWindow):
     def _setup_number_buttons(self):
         """Create number buttons in two columns"""
         left_x, right_x = 5, 870
-        top_y = self.imageLabel2.y() + 5
+        top_y = self.edit_view.y() + 5
         
         for i in range(1, 13):
             btn = QPushButton(str(i), self.edit_tab)
             btn.setFixedSize(*BUTTON_SIZE)
-            btn.setStyleSheet(f"font-size: {FONT_SIZES['button']}px; font-weight: bold;")
+            btn.setProperty("role", "tool")
             btn.clicked.connect(lambda _, num=i: self.add_number(num))
             
             if i <= 6:
@@ -493,11 +815,12 @@ class MyApp(QMainWindow):
                 x, y = right_x, top_y + (i-7)*(BUTTON_SIZE[1]+3)
                 
             btn.move(x, y)
+            btn.show()  # The tab may already be visible when it is built
 
     def _setup_line_buttons(self):
         """Create line/curve/text buttons at column bottoms"""
         left_x, right_x = 5, 870
-        base_y = self.imageLabel2.y() + 5 + 6*(BUTTON_SIZE[1]+3)
+        base_y = self.edit_view.y() + 5 + 6*(BUTTON_SIZE[1]+3)
         
         # Left column buttons
         self._create_line_button("Line", left_x, base_y, self.add_straight_line)
@@ -510,71 +833,120 @@ class MyApp(QMainWindow):
         """Helper to create line-type buttons"""
         btn = QPushButton(text, self.edit_tab)
         btn.setFixedSize(*BUTTON_SIZE)
-        btn.setStyleSheet(f"font-size: {FONT_SIZES['button']}px; font-weight: bold;")
+        btn.setProperty("role", "tool")
         btn.clicked.connect(handler)
         btn.move(x, y)
+        btn.show()
         return btn
 
-    def _setup_save_button(self, layout):
-        """Configure save button at bottom"""
-        btn = QPushButton("Save Image", self.edit_tab)
-        btn.setFixedSize(*SAVE_BUTTON_SIZE)
-        btn.setStyleSheet(f"font-size: {FONT_SIZES['save_button']}px; font-weight: bold;")
-        btn.clicked.connect(self.save_image)
-        layout.addWidget(btn, alignment=Qt.AlignCenter)
+    def _setup_save_buttons(self, layout):
+        """Configure open/save buttons at bottom"""
+        button_layout = QHBoxLayout()
+        button_layout.addStretch(1)
+        for text, handler in (
+            ("Open Scene", self.open_scene),
+            ("Save Image", self.save_image),
+            ("Save Scene", self.save_scene),
+        ):
+            btn = QPushButton(text, self.edit_tab)
+            btn.setFixedSize(*SAVE_BUTTON_SIZE)
+            btn.setProperty("role", "save")
+            btn.clicked.connect(handler)
+            button_layout.addWidget(btn)
+        button_layout.addStretch(1)
+        layout.addLayout(button_layout)
 
     def _set_initial_image(self, label, filename):
         """Set initial image for a label"""
-        # Get the correct base path
-        if getattr(sys, 'frozen', False):
-            # Running as executable
-            base_path = sys._MEIPASS
-        else:
-            # Running as script
-            base_path = os.path.dirname(os.path.abspath(__file__))
-        
-        image_path = os.path.join(base_path, "images", filename)
-        
-        if os.path.exists(image_path):
-            pixmap = QPixmap(image_path)
-            label.setPixmap(pixmap)
-            label.setScaledContents(True)
+        if self.asset_index.has_file(filename):
+            image, _ = self.asset_index.read_file(filename)
+            pixmap = QPixmap.fromImage(image)
+            if isinstance(label, SceneCanvas):
+                label.set_background(pixmap)
+            else:
+                label.set_source(pixmap)
         else:
-            print(f"Warning: Image '{image_path}' not found!")
+            instruments.warning("Image '%s' not found!", filename)
 
     def _handle_combobox_changes(self):
         """Handle changes in combobox selections"""
+        self._update_combobox_availability()
         event_text = self.eventComboBox.currentText()
         umpire_text = self.umpireComboBox.currentText()
         event_index = self.eventComboBox.currentIndex()
         umpire_index = self.umpireComboBox.currentIndex()
 
         if event_index > 0 and umpire_index > 0:
-            filename = f"{event_text}{umpire_text}.png"
-            self._update_image(self.imageLabel1, filename)
-
-    def _update_image(self, label, filename):
-        """Update displayed image"""
-        # Get the correct base path
-        if getattr(sys, 'frozen', False):
-            # Running as executable
-            base_path = sys._MEIPASS
-        else:
-            # Running as script
-            base_path = os.path.dirname(os.path.abspath(__file__))
-        
-        image_path = os.path.join(base_path, "images", filename)
-        print(f"Attempting to load image from: {image_path}")  # Debug print
-        
-        if os.path.exists(image_path):
-            pixmap = QPixmap(image_path)
-            if not pixmap.isNull():
-                label.setPixmap(pixmap)
-                print("Image loaded successfully!")  # Debug success
-            else:
-                print(f"Failed to load image: {image_path}")  # Debug failure
+            key = (event_text, int(umpire_text))
+            if not self.diagram_source.has(key):
+                self.umpireComboBox.setCurrentIndex(0)
+                return
+            self._update_image(self.imageLabel1, key)
+            self._prefetch_neighbours(key)
+
+    def _update_image(self, label, key):
+        """Update displayed image, queueing a background decode on a cache miss"""
+        self.current_diagram = key
+        self._load_started = time.perf_counter()
+        pixmap = self.pixmap_cache.get(key)
+        if pixmap is not None:
+            with instruments.span("view.show"):
+                self._show_diagram_pixmap(label, key, pixmap)
         else:
-            print(f"Image file not found: {image_path}")  # Debug missing file
+            self.diagram_loader.request(key, DECODE_PRIORITY['current'])
+
+    def _neighbour_keys(self, key):
+        """Umpire counts either side and the same count for adjacent events"""
+        event, umpires = key
+        event_index = self.eventComboBox.findText(event)
+        umpire_index = self.umpireComboBox.findText(str(umpires))
+        neighbours = []
+        for offset in (-1, 1):
+            index = umpire_index + offset
+            if 0 < index < self.umpireComboBox.count():
+                neighbours.append((event, int(self.umpireComboBox.itemText(index))))
+        for offset in (-1, 1):
+            index = event_index + offset
+            if 0 < index < self.eventComboBox.count():
+                neighbours.append((self.eventComboBox.itemText(index), umpires))
+        return [k for k in neighbours if self.diagram_source.has(k)]
+
+    def _prefetch_neighbours(self, key):
+        """Speculatively decode likely next selections, dropping stale requests"""
+        neighbours = self._neighbour_keys(key)
+        self.diagram_loader.cancel_stale(keep={key, *neighbours})
+        for neighbour in neighbours:
+            self.diagram_loader.request(neighbour, DECODE_PRIORITY['prefetch'])
+
+    def _on_diagram_loaded(self, key, pixmap):
+        """Show a finished decode if it is still the selected diagram"""
+        if key == self.current_diagram:
+            self._show_diagram_pixmap(self.imageLabel1, key, pixmap)
+            if instruments.tracing:
+                instruments.record("view.load", time.perf_counter() - self._load_started)
+            instruments.debug("Image loaded: %s%d", *key)
+
+    def _show_diagram_pixmap(self, label, key, pixmap):
+        """Display pixmap, remembering whether it is a procedural render for the clipboard"""
+        label.set_source(pixmap)
+        # Stale decodes are dropped when the vector setting changes, so this matches pixmap
+        self.shown_vector = key if self.diagram_source.is_vector(key) else None
+
+    def _on_diagram_failed(self, key, error):
+        instruments.warning("Failed to load image %s%d: %s", key[0], key[1], error)
+
+    def closeEvent(self, event):
+        self.diagram_loader.shutdown()
+        if hasattr(self, 'gallery'):
+            self.gallery.shutdown()
+        if hasattr(self, 'edit_canvas'):
+            self.edit_canvas.shutdown()
+        if self.journal is not None:
+            # A clean exit leaves nothing to recover
+            self.journal.discard()
+            self.journal.close()
+            self.journal = None
+        super().closeEvent(event)
 
     def _show_image_menu(self, position):
         """Show context menu for image copy"""
@@ -589,50 +961,366 @@ class MyApp(QMainWindow):
         if self.tabs.currentIndex() == 1:  # Only in View tab
             self._copy_image_to_clipboard()
 
+    def _handle_undo_shortcut(self):
+        """Handle Ctrl+Z in the Edit tab"""
+        if self.tabs.currentIndex() == 2:
+            self.undo_history.undo()
+
+    def _handle_redo_shortcut(self):
+        """Handle Ctrl+Y / Ctrl+Shift+Z in the Edit tab"""
+        if self.tabs.currentIndex() == 2:
+            self.undo_history.redo()
+
+    def toggle_hud(self):
+        """Show or hide the performance overlay, tracing spans while it is shown"""
+        if self.hud is None:
+            self.hud = PerformanceHud(self)
+            self.hud.hide()
+            self._tracing_before = instruments.tracing
+        visible = not self.hud.isVisible()
+        instruments.tracing = visible or self._tracing_before
+        self.hud.setVisible(visible)
+
     def _copy_image_to_clipboard(self):
         """Copy current view tab image to clipboard"""
-        if hasattr(self, 'imageLabel1') and self.imageLabel1.pixmap():
-            pixmap = self.imageLabel1.grab()
-            QApplication.clipboard().setPixmap(pixmap)
-            print("Current image copied to clipboard!")
+        if hasattr(self, 'imageLabel1') and not self.imageLabel1.source().isNull():
+            with instruments.span("clipboard.copy"):
+                mime_data = DiagramMimeData(self.imageLabel1.source(), self.shown_vector,
+                                            self.diagram_source.renderer, self.render_cache)
+                QApplication.clipboard().setMimeData(mime_data)
+            instruments.info("Current image copied to clipboard!")
+
+    def show_diagram(self, key):
+        """Select a diagram in the View tab and switch to it"""
+        self.tabs.setCurrentWidget(self.view_tab)
+        for combo_box, text in ((self.eventComboBox, key[0]), (self.umpireComboBox, str(key[1]))):
+            combo_box.blockSignals(True)
+            combo_box.setCurrentText(text)
+            combo_box.blockSignals(False)
+        self._handle_combobox_changes()
+
+    def handle_request(self, request):
+        """Run a show, copy or render request from another launch; returns the reply"""
+        command = request['command']
+        job = parse_render_spec(request['spec']) if request.get('spec') else None
+        if command == "show":
+            if job is not None and job[0] == 'diagram':
+                self.show_diagram(job[1:])
+            self.showNormal()
+            self.raise_()
+            self.activateWindow()
+            return {'ok': True, 'message': "Window shown"}
+        if job is None:
+            return {'ok': False, 'message': f"'{command}' needs a spec"}
+        if command == "copy":
+            if job[0] != 'diagram' or not self.diagram_source.has(job[1:]):
+                return {'ok': False, 'message': f"No diagram for {request['spec']}"}
+            image, error = self.diagram_source.read_image(job[1:])
+            if image.isNull():
+                return {'ok': False, 'message': error}
+            vector_key = job[1:] if self.diagram_source.is_vector(job[1:]) else None
+            mime_data = DiagramMimeData(QPixmap.fromImage(image), vector_key, self.diagram_source.renderer,
+                                        self.render_cache)
+            QApplication.clipboard().setMimeData(mime_data)
+            return {'ok': True, 'message': f"Copied {job_name(job)} to the clipboard"}
+        if command == "render":
+            error = render_job(job, request['path'], request.get('dpi', SCREEN_DPI),
+                               self.asset_index, self.diagram_source, self.render_cache,
+                               request.get('vector', False))
+            if error:
+                return {'ok': False, 'message': error}
+            return {'ok': True, 'message': f"Rendered {request['path']}"}
+        return {'ok': False, 'message': f"Unknown command '{command}'"}
 
     def add_number(self, number):
         """Add draggable number label to edit tab"""
-        num_label = DraggableLabel(str(number), self.imageLabel2)
-        num_label.move(100, 100)
-        num_label.show()
-        self.number_labels.append(num_label)
+        self.edit_canvas.add_number(str(number))
+
+    @property
+    def number_labels(self):
+        """Number items currently on the Edit canvas"""
+        return [item for item in self.edit_canvas.items.values() if item.item_type == "number"]
 
     def add_straight_line(self):
         """Add straight line to edit tab"""
-        line = DraggableLine("straight", self.imageLabel2)
-        line.move(100, 100)
-        line.show()
+        self.edit_canvas.add_line("straight")
 
     def add_curved_line(self):
         """Add curved line to edit tab"""
-        line = DraggableLine("curved", self.imageLabel2)
-        line.move(100, 100)
-        line.show()
+        self.edit_canvas.add_line("curved")
 
     def add_text_box(self):
         """Add resizable text box to edit tab"""
-        text_label = ResizableTextLabel("Text", self.imageLabel2)
-        text_label.move(100, 100)
-        text_label.show()
+        self.edit_canvas.add_text_box("Text")
 
     def save_image(self):
-        """Save current edit tab image to file"""
+        """Export current edit tab scene to an image, SVG or PDF file"""
         options = QFileDialog.Options()
         file_path, _ = QFileDialog.getSaveFileName(
-            self, "Save Image", "", "PNG Files (*.png);;All Files (*)", options=options
+            self, "Save Image", "", EXPORT_FILTER, options=options
+        )
+        if not file_path:
+            return
+        if not os.path.splitext(file_path)[1]:
+            file_path += ".png"
+        dpi = SCREEN_DPI
+        if not file_path.lower().endswith(".svg"):
+            dpi, accepted = QInputDialog.getInt(self, "Save Image", "Resolution (DPI):", SCREEN_DPI, 72, 1200)
+            if not accepted:
+                return
+        self.export_scene(file_path, dpi)
+
+    def export_scene(self, file_path, dpi=SCREEN_DPI):
+        """Snapshot the scene here; decode, render and encode it on a worker thread"""
+        document = self.scene_document()
+        cache_key = RenderCache.scene_key(
+            document, self.asset_index.file_stamp(self.edit_background),
+            os.path.splitext(file_path)[1], dpi
         )
+        task = ExportTask(document, self.asset_index, self.edit_background, file_path, dpi,
+                          self.render_cache, cache_key)
+        progress = QProgressDialog(f"Exporting {os.path.basename(file_path)}...", "Cancel", 0, 100, self)
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(500)
+        progress.canceled.connect(lambda: setattr(task, 'cancelled', True))
+        task.signals.progress.connect(progress.setValue)
+        task.signals.finished.connect(lambda path, completed, error: self._on_export_finished(
+            progress, path, completed, error
+        ))
+        self._export_tasks = getattr(self, '_export_tasks', set())
+        self._export_tasks.add(task)
+        task.signals.finished.connect(lambda *_: self._export_tasks.discard(task))
+        self.export_pool.start(task)
+        return task
+
+    def _on_export_finished(self, progress, path, completed, error):
+        progress.reset()
+        progress.deleteLater()
+        if error:
+            instruments.error("Failed to save %s: %s", path, error)
+        elif completed:
+            instruments.info("Saved image as %s", path)
+        else:
+            instruments.info("Export of %s cancelled", path)
+
+    def scene_document(self):
+        """Snapshot the Edit canvas as a scene document"""
+        items = self.edit_canvas.states() if hasattr(self, 'edit_canvas') else []
+        return scene_document(self.edit_background, items)
+
+    def load_scene_document(self, document):
+        """Replace the Edit canvas contents with a scene document"""
+        self._ensure_tab(self.edit_tab)
+        background = document.get('background', INITIAL_IMAGE)
+        if background != self.edit_background:
+            self.edit_background = background
+            self._set_initial_image(self.imageLabel2, background)
+        self.edit_canvas.load_states(document['items'])
+        self.undo_history.clear()
+        if self.journal is not None:
+            self.journal.compact(self.scene_document())
+
+    def save_scene(self):
+        """Save the Edit canvas as a reopenable scene file"""
+        file_path, _ = QFileDialog.getSaveFileName(self, "Save Scene", "", SCENE_FILTER)
         if file_path:
-            pixmap = self.imageLabel2.grab()
-            pixmap.save(file_path)
-            print(f"Saved image as {file_path}")
+            with instruments.span("scene.save"):
+                save_scene(file_path, self.scene_document())
+            instruments.info("Saved scene as %s", file_path)
+
+    def open_scene(self):
+        """Load a scene file into the Edit canvas"""
+        file_path, _ = QFileDialog.getOpenFileName(self, "Open Scene", "", SCENE_FILTER)
+        if not file_path:
+            return
+        try:
+            document = load_scene(file_path)
+        except (OSError, ValueError) as error:
+            instruments.error("Failed to open scene: %s", error)
+            return
+        self.load_scene_document(document)
+        instruments.info("Opened scene %s", file_path)
+
+    def _start_autosave(self):
+        """Claim this instance's journal, recover what a crash left in it, then journal every canvas change"""
+        directory = QStandardPaths.writableLocation(QStandardPaths.AppDataLocation)
+        os.makedirs(directory, exist_ok=True)
+        path, lock = claim_journal(directory)
+        if path is None:
+            instruments.warning("Autosave disabled: every journal slot is held by a running instance")
+            return
+        started = time.perf_counter()
+        document = SceneJournal.replay(path)
+        self.journal = SceneJournal(path, lock)
+        if document is not None and document['items']:
+            self.load_scene_document(document)
+            instruments.info("Recovered %d items from autosave in %.1f ms",
+                             len(document['items']), (time.perf_counter() - started) * 1000)
+        else:
+            self.journal.compact(self.scene_document())
+
+    def _on_canvas_changed(self, before, after):
+        if self.journal is None:
+            return
+        self.journal.append(journal_record(before, after))
+        if self.journal.entries >= JOURNAL_COMPACT_EVERY:
+            self.journal.compact(self.scene_document())
+
+def benchmark_item_creation(count=300):
+    """Measure Edit canvas items created per second, including their first polish and paint.
+
+    A final add/delete churn pass shows the rate once items come from the free pool.
+    """
+    window = MyApp(autosave=False)
+    window.tabs.setCurrentWidget(window.edit_tab)
+    QApplication.processEvents()
+    for name, add in (("numbers", lambda i: window.add_number(i % 12 + 1)),
+                      ("lines", lambda i: window.add_straight_line()),
+                      ("text boxes", lambda i: window.add_text_box())):
+        started = time.perf_counter()
+        for i in range(count):
+            add(i)
+        QApplication.processEvents()
+        elapsed = time.perf_counter() - started
+        print(f"{name:>10}: {count / elapsed:8.0f} items/s ({elapsed / count * 1000:.3f} ms each, {count} items)")
+        for item_id in list(window.edit_canvas.items):
+            window.edit_canvas.remove_item(item_id, notify=False)
+        QApplication.processEvents()
+    canvas = window.edit_canvas
+    started = time.perf_counter()
+    for i in range(count):
+        canvas.remove_item(canvas.add_number(str(i % 12 + 1)).item_id, notify=False)
+    QApplication.processEvents()
+    elapsed = time.perf_counter() - started
+    print(f"{'churn':>10}: {count / elapsed:8.0f} add+delete/s ({elapsed / count * 1000:.3f} ms each, {count} cycles)")
+    print(canvas.registry.report())
+    window.close()
+    return 0
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Umpire Track Editor")
+    parser.add_argument("--pack-assets", nargs="?", metavar="BUNDLE",
+                        const=os.path.join(asset_base_path(), ASSET_BUNDLE),
+                        help="pack images/ into a memory-mapped bundle and exit")
+    parser.add_argument("--pack-layers", nargs="?", metavar="FILE",
+                        const=os.path.join(asset_base_path(), ASSET_LAYERS),
+                        help="store images/ as shared base layers plus sparse overlays (needs NumPy) and exit")
+    parser.add_argument("--bench-assets", action="store_true",
+                        help="compare loose file and bundle load times and exit")
+    parser.add_argument("--bench-layers", action="store_true",
+                        help="compare loose files with the layers file for size, decode time and memory and exit")
+    parser.add_argument("--bench-items", nargs="?", type=int, const=300, metavar="COUNT",
+                        help="measure Edit items created per second and exit")
+    parser.add_argument("--scene-canvas", action="store_true",
+                        help="use the QGraphicsScene based Edit canvas")
+    parser.add_argument("--snap", type=int, default=0, metavar="PIXELS",
+                        help="snap dragged Edit items to a grid")
+    parser.add_argument("--drag-stats", action="store_true",
+                        help="print input-to-present latency and dropped frames per drag")
+    parser.add_argument("--batch", nargs="+", metavar="SPEC",
+                        help="render scene files, EVENT:UMPIRES specs or 'all' headlessly and exit")
+    parser.add_argument("--out", default="batch", metavar="DIR",
+                        help="output folder for --batch")
+    parser.add_argument("--format", choices=BATCH_FORMATS, default="png",
+                        help="output format for --batch")
+    parser.add_argument("--dpi", type=int, default=SCREEN_DPI,
+                        help="output resolution for --batch")
+    parser.add_argument("--jobs", type=int, default=0, metavar="N",
+                        help="worker processes for --batch (default: one per CPU)")
+    parser.add_argument("--vector", action="store_true",
+                        help="draw diagrams for --batch and --render with the schematic renderer")
+    parser.add_argument("--show", nargs="?", const="", metavar="EVENT:UMPIRES",
+                        help="raise the running window, optionally on a diagram")
+    parser.add_argument("--copy", metavar="EVENT:UMPIRES",
+                        help="copy a diagram to the clipboard")
+    parser.add_argument("--render", nargs=2, metavar=("SPEC", "FILE"),
+                        help="render a diagram or scene file to FILE at --dpi")
+    parser.add_argument("--log-level", choices=LOG_LEVELS, default="info",
+                        help="diagnostics to print (default: info)")
+    parser.add_argument("--trace", action="store_true",
+                        help="time load, decode, paint, export and clipboard spans and print a summary on exit")
+    parser.add_argument("--hud", action="store_true",
+                        help="show the performance overlay at startup (F12 toggles it)")
+    parser.add_argument("--new-instance", action="store_true",
+                        help="do not forward to or serve other launches")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="print time spent in each startup phase, then exit after the first paint")
+    args, qt_args = parser.parse_known_args(argv[1:])
+    instruments.level = LOG_LEVELS[args.log_level]
+    instruments.tracing = args.trace
+
+    if args.pack_assets:
+        count, size = pack_asset_bundle(os.path.join(asset_base_path(), "images"), args.pack_assets)
+        print(f"Packed {count} images ({size} bytes) into {args.pack_assets}")
+        return 0
+    if args.pack_layers:
+        try:
+            count, shared, size = pack_asset_layers(os.path.join(asset_base_path(), "images"), args.pack_layers)
+        except ValueError as error:
+            print(f"--pack-layers: {error}")
+            return 1
+        print(f"Packed {count} images over {shared} shared layers ({size} bytes) into {args.pack_layers}")
+        return 0
+    if args.batch:
+        return run_batch(args.batch, args.out, args.format, args.dpi, args.jobs, args.vector)
+
+    if args.copy:
+        request = {'command': "copy", 'spec': args.copy}
+    elif args.render:
+        request = {'command': "render", 'spec': args.render[0],
+                   'path': os.path.abspath(args.render[1]), 'dpi': args.dpi, 'vector': args.vector}
+        if args.render[0].lower().endswith(".utscene"):
+            request['spec'] = os.path.abspath(args.render[0])
+    else:
+        request = {'command': "show", 'spec': args.show or ""}
+    if args.profile_startup:
+        MyApp.startup_profile = StartupProfile()
+        args.new_instance = True
+    if not (args.new_instance or args.bench_assets or args.bench_layers or args.bench_items):
+        # Forwarding only needs an event loop-free socket, not the window or styles
+        app = QCoreApplication(argv[:1])
+        app.setApplicationName("UmpireTrackEditor")
+        reply = forward_to_instance(request)
+        del app  # Only one application object may exist; the window needs a QApplication
+        if reply is not None:
+            print(reply['message'])
+            return 0 if reply['ok'] else 1
+
+    started = time.perf_counter()
+    app = QApplication(argv[:1] + qt_args)
+    app.setApplicationName("UmpireTrackEditor")
+    if MyApp.startup_profile is not None:
+        MyApp.startup_profile.add("QApplication", time.perf_counter() - started)
+    if args.bench_assets:
+        return benchmark_asset_sources()
+    if args.bench_layers:
+        return benchmark_asset_layers()
+    if args.bench_items:
+        return benchmark_item_creation(args.bench_items)
+    DraggableMixin.snap_grid = args.snap
+    if args.drag_stats:
+        DraggableMixin.drag_stats = DragStats()
+    window = MyApp(scene_canvas=args.scene_canvas, hud=args.hud)
+    if MyApp.startup_profile is not None:
+        MyApp.startup_profile.on_report = window.close
+        MyApp.startup_profile.watch_first_paint()
+    if not args.new_instance:
+        window.instance_server = InstanceServer(window.handle_request, window)
+        if not window.instance_server.listen():
+            instruments.warning("Cannot listen as '%s': %s", SERVER_NAME, window.instance_server.server.errorString())
+    if request['command'] != "show" or request['spec']:
+        try:
+            reply = window.handle_request(request)
+        except ValueError as error:
+            reply = {'ok': False, 'message': str(error)}
+        print(reply['message'])
+    status = app.exec_()
+    if args.trace:
+        print(instruments.summary())
+        print(window.render_cache.summary())
+    return status
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    window = MyApp()
-    sys.exit(app.exec_())
\ No newline at end of file
+    multiprocessing.freeze_support()
+    sys.exit(main(sys.argv))
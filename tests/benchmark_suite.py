@@ -0,0 +1,245 @@
+"""Offscreen benchmark suite for the hot View and Edit paths.
+
+Run it from the repository root:
+
+    python tests/benchmark_suite.py [BASELINE] [--threshold FRACTION] [--update-baseline]
+
+The first run writes the baseline; later runs fail if any metric is more
+than --threshold worse. Each step also checks that the work it timed
+really happened, so a broken path cannot pass as a fast one.
+"""
+import os
+import sys
+import gc
+import contextlib
+import time
+import json
+import argparse
+import platform
+import tempfile
+
+os.environ["QT_QPA_PLATFORM"] = "offscreen"  # Timings must not depend on a display or window manager
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtGui import QImage, QMouseEvent
+from PyQt5.QtCore import Qt, QPoint, QEvent, QT_VERSION_STR
+
+from umpire_track.common import LINE_SIZE, asset_base_path, peak_memory_kb, resident_memory_kb
+from umpire_track.assets import RenderCache
+from UmpireTrackEditor import MyApp
+
+BENCH_BASELINE = "bench_baseline.json"
+BENCH_THRESHOLD = 0.5  # A metric more than 50% worse than its baseline fails the run
+BENCH_REPEATS = 7
+BENCH_ITEMS = 200
+BENCH_LINE_ANGLES = (0, 45, 90, 135)
+
+
+def _best_ms(func, repeats=BENCH_REPEATS):
+    """Fastest of several runs of func() in milliseconds; the least noisy estimate"""
+    best = float('inf')
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        best = min(best, (time.perf_counter() - started) * 1000)
+    return best
+
+
+def _process_until(predicate, timeout=10.0):
+    deadline = time.perf_counter() + timeout
+    while not predicate():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("benchmark step did not finish")
+        QApplication.processEvents()
+
+
+def _check(condition, message):
+    if not condition:
+        raise RuntimeError(f"benchmark step misbehaved: {message}")
+
+
+def _clear_canvas(canvas):
+    canvas.load_states([])
+    # Closed items are only deleted once control returns to an event loop
+    QApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+
+
+def _busy_states(count):
+    return [{'type': ("number", "straight", "curved")[index % 3], 'text': "3",
+             'x': index * 7 % 700, 'y': index * 13 % 380} for index in range(count)]
+
+
+def run_benchmark_suite():
+    """Time the hot View and Edit paths offscreen.
+
+    Returns {metric: value}; every metric is lower-is-better, with its unit
+    (ms, us or kb) as the name suffix.
+    """
+    metrics = {}
+    window = MyApp(autosave=False)
+    QApplication.processEvents()
+
+    # View switches through the comboboxes: cold decodes, then cache hits
+    window.tabs.setCurrentWidget(window.view_tab)
+    source = window.diagram_source
+    keys = [(event, umpires) for event in source.events() for umpires in source.umpire_counts()
+            if source.has((event, umpires))][:BENCH_REPEATS]
+    loaded = []
+    window.diagram_loader.loaded.connect(lambda key, pixmap: loaded.append(key))
+    cold = []
+    for key in keys:
+        window.diagram_loader.cancel_stale(set())
+        window.pixmap_cache.clear()
+        loaded.clear()
+        started = time.perf_counter()
+        window.show_diagram(key)
+        _process_until(lambda: key in loaded)
+        cold.append((time.perf_counter() - started) * 1000)
+        _check(window.current_diagram == key and not window.imageLabel1.source().isNull(),
+               f"{key} was not shown")
+    metrics['view_switch_cold_ms'] = min(cold)
+    for key in keys:
+        window.show_diagram(key)
+        _process_until(lambda: key in window.pixmap_cache)
+    cycle = iter(keys * BENCH_REPEATS)
+    metrics['view_switch_warm_ms'] = _best_ms(lambda: window.show_diagram(next(cycle)))
+
+    # Resident memory taken by a busy canvas, measured before any item is pooled
+    window.tabs.setCurrentWidget(window.edit_tab)
+    QApplication.processEvents()
+    canvas = window.edit_canvas
+    gc.collect()
+    before = resident_memory_kb()
+    for state in _busy_states(BENCH_ITEMS):
+        canvas.create_item(state, notify=False)
+    QApplication.processEvents()
+    after = resident_memory_kb()
+    _check(len(canvas.items) == BENCH_ITEMS, "busy canvas is missing items")
+    if before is not None and after is not None:
+        metrics[f'memory_{BENCH_ITEMS}_items_kb'] = max(after - before, 0)
+    _clear_canvas(canvas)
+
+    # Edit item creation, per item including first polish and paint
+    for name, add in (("number", lambda: window.add_number(7)),
+                      ("line", window.add_straight_line),
+                      ("text", window.add_text_box)):
+        def create_items():
+            _clear_canvas(canvas)
+            for _ in range(BENCH_ITEMS):
+                add()
+            QApplication.processEvents()
+        metrics[f'create_{name}_ms'] = _best_ms(create_items, 3) / BENCH_ITEMS
+        _check(len(canvas.items) == BENCH_ITEMS, f"created {len(canvas.items)} {name} items")
+        _clear_canvas(canvas)
+
+    # DraggableLine painting at several angles
+    line = canvas.add_line("straight")
+    image = QImage(*LINE_SIZE, QImage.Format_ARGB32_Premultiplied)
+    for angle in BENCH_LINE_ANGLES:
+        canvas.update_item(line.item_id, {'angle': angle}, notify=False)
+        line.render(image)  # Warm the sprite cache
+        metrics[f'line_paint_{angle}_us'] = _best_ms(lambda: [line.render(image) for _ in range(500)]) * 2
+
+    # A simulated drag: press, many pointer moves, release
+    number = canvas.add_number("5")
+    QApplication.processEvents()
+    start = number.state()
+
+    def drag():
+        position = QPoint(5, 5)
+        QApplication.sendEvent(number, QMouseEvent(
+            QEvent.MouseButtonPress, position, Qt.LeftButton, Qt.LeftButton, Qt.NoModifier))
+        for step in range(BENCH_ITEMS):
+            position = QPoint(5 + step % 50, 5 + step % 30)
+            QApplication.sendEvent(number, QMouseEvent(
+                QEvent.MouseMove, position, Qt.NoButton, Qt.LeftButton, Qt.NoModifier))
+            QApplication.processEvents()
+        QApplication.sendEvent(number, QMouseEvent(
+            QEvent.MouseButtonRelease, position, Qt.LeftButton, Qt.NoButton, Qt.NoModifier))
+    metrics['drag_move_ms'] = _best_ms(drag, 3) / BENCH_ITEMS
+    _check(number.state() != start, "drag did not move the item")
+
+    # Saving a busy canvas through the window's export path, with nothing served from the cache
+    for state in _busy_states(BENCH_ITEMS):
+        canvas.create_item(state, notify=False)
+    QApplication.processEvents()
+    with tempfile.TemporaryDirectory() as directory:
+        window.render_cache = RenderCache(os.path.join(directory, "cache"), max_bytes=0)
+        path = os.path.join(directory, "bench.png")
+
+        def save():
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+            task = window.export_scene(path)
+            _process_until(lambda: task not in window._export_tasks)
+        metrics['save_image_ms'] = _best_ms(save, 3)
+        _check(not QImage(path).isNull(), "export wrote no image")
+        _check(window.render_cache.hits == 0, "export was served from the render cache")
+    metrics['grab_ms'] = _best_ms(window.grab)
+
+    peak = peak_memory_kb()
+    if peak is not None:
+        metrics['peak_memory_kb'] = peak
+    window.close()
+    return metrics
+
+
+def compare_benchmarks(metrics, baseline, threshold=BENCH_THRESHOLD):
+    """Print metrics against a baseline and return the names that regressed"""
+    regressions = []
+    for name, value in metrics.items():
+        reference = baseline.get(name)
+        if not reference:
+            print(f"{name:>22}: {value:10.3f}")
+            continue
+        change = value / reference - 1
+        failed = change > threshold
+        if failed:
+            regressions.append(name)
+        print(f"{name:>22}: {value:10.3f}  baseline {reference:10.3f}  {change:+7.1%}"
+              f"{'  REGRESSED' if failed else ''}")
+    return regressions
+
+
+def benchmark_suite(baseline_path, threshold=BENCH_THRESHOLD, update=False):
+    """Run the suite and check it against a baseline file, writing one if missing"""
+    metrics = run_benchmark_suite()
+    baseline = None
+    if os.path.exists(baseline_path) and not update:
+        with open(baseline_path, encoding='utf-8') as f:
+            baseline = json.load(f)
+    regressions = compare_benchmarks(metrics, baseline['metrics'] if baseline else {}, threshold)
+    if baseline is None:
+        document = {
+            'platform': QApplication.platformName(),
+            'python': platform.python_version(),
+            'qt': QT_VERSION_STR,
+            'metrics': metrics,
+        }
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=1)
+        print(f"Wrote baseline {baseline_path}")
+        return 0
+    if regressions:
+        print(f"{len(regressions)} metrics regressed by more than {threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Umpire Track Editor benchmark suite")
+    parser.add_argument("baseline", nargs="?", default=os.path.join(asset_base_path(), BENCH_BASELINE),
+                        help="baseline file to compare against, written if missing")
+    parser.add_argument("--threshold", type=float, default=BENCH_THRESHOLD, metavar="FRACTION",
+                        help="allowed slowdown per metric before the run fails")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="rewrite the baseline with this run")
+    args = parser.parse_args(argv[1:])
+    app = QApplication(argv[:1])
+    app.setApplicationName("UmpireTrackEditorBench")
+    return benchmark_suite(args.baseline, args.threshold, args.update_baseline)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,29 @@
+import os
+import sys
+import time
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtWidgets import QApplication
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    app = QApplication.instance() or QApplication(["tests"])
+    app.setApplicationName("UmpireTrackEditorTests")
+    return app
+
+
+@pytest.fixture
+def process_until(qapp):
+    """Run the event loop until predicate() is true, failing after timeout seconds"""
+    def run(predicate, timeout=5.0):
+        deadline = time.perf_counter() + timeout
+        while not predicate():
+            assert time.perf_counter() < deadline, "timed out waiting for the event loop"
+            qapp.processEvents()
+            time.sleep(0.001)
+    return run
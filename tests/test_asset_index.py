@@ -0,0 +1,69 @@
+import os
+
+import pytest
+from PyQt5.QtGui import QColor, QImage
+
+from umpire_track.assets import AssetIndex
+
+
+def write_png(path, width):
+    image = QImage(width, 10, QImage.Format_RGB32)
+    image.fill(QColor("red"))
+    assert image.save(str(path), "PNG")
+
+
+@pytest.fixture
+def folder(tmp_path):
+    write_png(tmp_path / "800m6.png", 10)
+    write_png(tmp_path / "800m7.png", 10)
+    (tmp_path / "notes.txt").write_text("not a diagram")
+    return tmp_path
+
+
+@pytest.fixture
+def index(folder, qapp):
+    index = AssetIndex(str(folder))
+    index.reports = []
+    index.assets_changed.connect(lambda *lists: index.reports.append(lists))
+    return index
+
+
+def test_scan_indexes_diagrams_only(index):
+    assert index.assets == {("800m", 6): "800m6.png", ("800m", 7): "800m7.png"}
+    assert index.has_file("notes.txt")
+
+
+def test_added_and_removed_files_are_reported(index, folder, process_until):
+    write_png(folder / "1500m5.png", 10)
+    os.remove(folder / "800m7.png")
+    process_until(lambda: index.has(("1500m", 5)) and not index.has(("800m", 7)))
+    added = [key for report in index.reports for key in report[0]]
+    removed = [key for report in index.reports for key in report[1]]
+    assert added == [("1500m", 5)] and removed == [("800m", 7)]
+
+
+def test_file_rewritten_in_place_is_reported(index, folder, process_until):
+    stamp = index.stamp(("800m", 6))
+    write_png(folder / "800m6.png", 30)
+    process_until(lambda: index.reports)
+    assert index.reports[-1] == ([], [], [("800m", 6)])
+    assert index.stamp(("800m", 6)) != stamp
+
+
+def test_file_replaced_by_rename_stays_watched(index, folder, process_until):
+    write_png(folder / "new.tmp", 30)
+    os.replace(folder / "new.tmp", folder / "800m6.png")
+    process_until(lambda: any(report[2] for report in index.reports))
+    index.reports.clear()
+    write_png(folder / "800m6.png", 50)
+    process_until(lambda: index.reports)
+    assert index.reports[-1] == ([], [], [("800m", 6)])
+
+
+def test_only_changed_entries_are_parsed(index, folder, monkeypatch, process_until):
+    parsed = []
+    key_for = AssetIndex.key_for
+    monkeypatch.setattr(AssetIndex, 'key_for', staticmethod(lambda name: parsed.append(name) or key_for(name)))
+    write_png(folder / "1500m5.png", 10)
+    process_until(lambda: index.has(("1500m", 5)))
+    assert set(parsed) == {"1500m5.png"}
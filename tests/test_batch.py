@@ -0,0 +1,66 @@
+import json
+
+import pytest
+from PyQt5.QtGui import QImage
+
+from umpire_track import cli
+from umpire_track.renderer import DIAGRAM_CANVAS
+from umpire_track.scene import scene_document
+
+
+@pytest.fixture
+def batch(tmp_path, monkeypatch, qapp):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    out = tmp_path / "out"
+
+    def run(*specs, **options):
+        return cli.run_batch(list(specs), str(out), jobs=1, **options)
+    run.out = out
+    return run
+
+
+def test_batch_renders_diagrams_and_scenes(batch, tmp_path, capsys):
+    scene = tmp_path / "race.utscene"
+    scene.write_text(json.dumps(scene_document("800m6.png", [
+        {'id': 1, 'type': 'number', 'x': 10, 'y': 10, 'text': "3"},
+    ])))
+    assert batch("800m:6", str(scene)) == 0
+    assert not QImage(str(batch.out / "800m6.png")).isNull()
+    assert not QImage(str(batch.out / "race.png")).isNull()
+    assert "Rendered 2/2" in capsys.readouterr().out
+
+
+def test_missing_asset_fails_the_batch(batch, capsys):
+    assert batch("800m:6", "800m:4") == 1
+    output = capsys.readouterr().out
+    assert "FAILED 800m4: missing asset" in output and "Rendered 1/2" in output
+    assert not (batch.out / "800m4.png").exists()
+
+
+def test_vector_output_only_when_requested(batch):
+    assert batch("800m:6") == 0
+    raster = QImage(str(batch.out / "800m6.png"))
+    assert batch("800m:6", vector=True) == 0
+    drawn = QImage(str(batch.out / "800m6.png"))
+    assert drawn.width() == DIAGRAM_CANVAS[0] and drawn != raster
+    assert batch("800m:4", vector=True) == 1
+
+
+def test_malformed_scene_fails_the_batch(batch, tmp_path, capsys):
+    scene = tmp_path / "broken.utscene"
+    scene.write_text(json.dumps(scene_document("800m6.png", [{'id': 1, 'type': 'banner', 'x': 0, 'y': 0}])))
+    assert batch(str(scene)) == 1
+    assert "FAILED broken: " in capsys.readouterr().out
+
+
+def test_job_exception_is_reported_not_raised(batch, monkeypatch, capsys):
+    def explode(*args):
+        raise RuntimeError("boom")
+    monkeypatch.setattr(cli, 'render_job', explode)
+    assert batch("800m:6", "800m:7") == 1
+    output = capsys.readouterr().out
+    assert output.count("FAILED") == 2 and "RuntimeError: boom" in output
+
+
+def test_bad_spec_is_a_usage_error(batch):
+    assert batch("800m") == 2
@@ -0,0 +1,56 @@
+import os
+
+import pytest
+from PyQt5.QtGui import QImage, QColor
+
+from umpire_track.assets import AssetBundle, AssetIndex, pack_asset_bundle
+
+
+@pytest.fixture
+def images(tmp_path, qapp):
+    directory = tmp_path / "images"
+    directory.mkdir()
+    for name, color in (("800m6.png", "red"), ("4 x 100m Relay7.png", "green")):
+        image = QImage(20, 10, QImage.Format_ARGB32)
+        image.fill(QColor(color))
+        image.save(str(directory / name))
+    (directory / "notes.txt").write_text("not an image")
+    return directory
+
+
+def test_bundle_round_trip(images, tmp_path):
+    path = str(tmp_path / "images.bundle")
+    count, size = pack_asset_bundle(str(images), path)
+    assert count == 2 and size == os.path.getsize(path)
+    bundle = AssetBundle(path)
+    try:
+        assert sorted(bundle.names()) == ["4 x 100m Relay7.png", "800m6.png"]
+        for name in bundle.names():
+            assert bytes(bundle.data(name)) == (images / name).read_bytes()
+    finally:
+        bundle.close()
+
+
+def test_index_reads_from_bundle(images, tmp_path):
+    path = str(tmp_path / "images.bundle")
+    pack_asset_bundle(str(images), path)
+    bundle = AssetBundle(path)
+    index = AssetIndex(str(tmp_path / "missing"), bundle)
+    try:
+        assert index.has(("800m", 6)) and index.has(("4 x 100m Relay", 7))
+        image, error = index.read_image(("800m", 6))
+        assert error == "" and image.size().width() == 20
+        assert image.pixelColor(0, 0) == QColor("red")
+    finally:
+        bundle.close()
+
+
+def test_bundle_rejects_bad_files(tmp_path):
+    empty = tmp_path / "empty.bundle"
+    empty.write_bytes(b"")
+    with pytest.raises(ValueError):
+        AssetBundle(str(empty))
+    other = tmp_path / "other.bundle"
+    other.write_bytes(b"PK\x03\x04 not a bundle")
+    with pytest.raises(ValueError):
+        AssetBundle(str(other))
@@ -0,0 +1,37 @@
+from PyQt5.QtGui import QColor, QImage, QPixmap
+
+from umpire_track.assets import RenderCache
+from umpire_track.renderer import DiagramMimeData, DiagramRenderer
+
+
+def solid(color):
+    pixmap = QPixmap(30, 20)
+    pixmap.fill(QColor(color))
+    return pixmap
+
+
+def png(mime_data):
+    return QImage.fromData(bytes(mime_data.data("image/png")))
+
+
+def test_official_art_offers_only_raster_formats(qapp):
+    mime_data = DiagramMimeData(solid("red"), None, DiagramRenderer())
+    assert mime_data.formats() == ["application/x-qt-image", "image/png"]
+    assert not mime_data.hasFormat("image/svg+xml")
+    assert png(mime_data).pixelColor(0, 0) == QColor("red")
+
+
+def test_vector_render_offers_svg_and_hidpi(qapp):
+    mime_data = DiagramMimeData(solid("white"), ("800m", 6), DiagramRenderer())
+    assert {"image/svg+xml", DiagramMimeData.HIDPI_PNG} <= set(mime_data.formats())
+    assert bytes(mime_data.data("image/svg+xml")).lstrip().startswith(b"<?xml")
+    assert not QImage.fromData(bytes(mime_data.data(DiagramMimeData.HIDPI_PNG))).isNull()
+
+
+def test_png_cache_follows_the_copied_pixels(tmp_path, qapp):
+    cache = RenderCache(str(tmp_path))
+    assert png(DiagramMimeData(solid("red"), None, None, cache)).pixelColor(0, 0) == QColor("red")
+    assert png(DiagramMimeData(solid("blue"), None, None, cache)).pixelColor(0, 0) == QColor("blue")
+    assert cache.stores == 2
+    assert png(DiagramMimeData(solid("red"), None, None, cache)).pixelColor(0, 0) == QColor("red")
+    assert cache.hits == 1
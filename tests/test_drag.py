@@ -0,0 +1,62 @@
+from PyQt5.QtCore import Qt, QEvent, QPoint
+from PyQt5.QtGui import QMouseEvent
+from PyQt5.QtWidgets import QApplication, QWidget
+
+from umpire_track.canvas import DragStats, DraggableLabel
+
+
+def send(widget, kind, position):
+    button = Qt.NoButton if kind == QEvent.MouseMove else Qt.LeftButton
+    buttons = Qt.NoButton if kind == QEvent.MouseButtonRelease else Qt.LeftButton
+    QApplication.sendEvent(widget, QMouseEvent(kind, QPoint(*position), button, buttons, Qt.NoModifier))
+
+
+def make_label(qapp):
+    parent = QWidget()
+    parent.resize(400, 300)
+    label = DraggableLabel("5", parent)
+    label.move(100, 100)
+    moves = []
+    original_move = label.move
+    label.move = lambda pos: (moves.append(QPoint(pos)), original_move(pos))
+    return parent, label, moves
+
+
+def test_moves_coalesce_to_latest_position(qapp, process_until):
+    parent, label, moves = make_label(qapp)
+    send(label, QEvent.MouseButtonPress, (5, 5))
+    for x, y in ((15, 5), (25, 8), (35, 10)):
+        send(label, QEvent.MouseMove, (x, y))
+    assert label.pos() == QPoint(100, 100) and moves == []
+    process_until(lambda: label.pending_pos is None)
+    assert moves == [QPoint(130, 105)]
+    send(label, QEvent.MouseButtonRelease, (35, 10))
+    assert label.pos() == QPoint(130, 105)
+
+
+def test_release_applies_pending_move(qapp):
+    parent, label, moves = make_label(qapp)
+    send(label, QEvent.MouseButtonPress, (5, 5))
+    send(label, QEvent.MouseMove, (45, 25))
+    send(label, QEvent.MouseButtonRelease, (45, 25))
+    assert moves == [QPoint(140, 120)] and not label.moving
+
+
+def test_snap_grid_rounds_positions(qapp):
+    parent, label, moves = make_label(qapp)
+    label.snap_grid = 20
+    send(label, QEvent.MouseButtonPress, (5, 5))
+    send(label, QEvent.MouseMove, (18, 14))
+    send(label, QEvent.MouseButtonRelease, (18, 14))
+    assert label.pos() == QPoint(120, 100)
+
+
+def test_drag_stats_count_dropped_frames():
+    stats = DragStats()
+    stats.events = 3
+    stats.record_frame(0.010, 1 / 60)
+    stats.record_frame(0.040, 1 / 60)
+    assert stats.frames == 2 and stats.dropped == 2
+    assert "3 moves -> 2 frames" in stats.summary()
+    stats.reset()
+    assert stats.summary() == "Drag: no frames"
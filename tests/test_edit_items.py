@@ -0,0 +1,60 @@
+import pytest
+from PyQt5.QtCore import Qt, QEvent
+from PyQt5.QtGui import QKeyEvent
+from PyQt5.QtWidgets import QApplication, QLabel
+
+from umpire_track.canvas import ROTATION_STEP, SceneCanvas, WidgetCanvas
+
+
+@pytest.fixture(params=["widget", "scene"])
+def canvas(request, qapp):
+    if request.param == "widget":
+        label = QLabel()
+        label.resize(750, 400)
+        canvas = WidgetCanvas(label)
+        canvas.label = label  # Keep the background label alive with the canvas
+    else:
+        canvas = SceneCanvas()
+    yield canvas
+    canvas.load_states([])
+    QApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+
+
+def press(item, key):
+    item.keyPressEvent(QKeyEvent(QEvent.KeyPress, key, Qt.NoModifier))
+
+
+def test_backspace_deletes_the_selection_or_the_item(canvas):
+    first, second, third = (canvas.add_number(str(n)) for n in range(3))
+    canvas.set_selected([first, second])
+    press(first, Qt.Key_Backspace)
+    assert list(canvas.items) == [third.item_id]
+    press(third, Qt.Key_Backspace)
+    assert canvas.items == {}
+
+
+def test_r_rotates_the_selection_as_one_edit(canvas):
+    changes = []
+    canvas.changed.connect(lambda before, after: changes.append(canvas.batch_id))
+    line = canvas.add_line("straight")
+    number = canvas.add_number("4")
+    canvas.update_item(number.item_id, {'x': 300, 'y': 200})
+    canvas.set_selected([line, number])
+    changes.clear()
+    press(number, Qt.Key_R)
+    assert line.state()['angle'] == ROTATION_STEP and number.state()['x'] != 300
+    assert len(changes) == 2 and changes[0] is not None and len(set(changes)) == 1
+
+
+def test_r_turns_a_lone_line(canvas):
+    line = canvas.add_line("straight")
+    press(line, Qt.Key_R)
+    assert line.state()['angle'] == ROTATION_STEP
+
+
+def test_recycled_items_forget_drags(canvas):
+    number = canvas.add_number("1")
+    number._start_drag()
+    assert number._drag_group == [number]
+    canvas.remove_item(number.item_id)
+    assert number._drag_group == ()
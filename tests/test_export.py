@@ -0,0 +1,74 @@
+import faulthandler
+
+from PyQt5.QtCore import Qt, QThreadPool
+from PyQt5.QtGui import QImage, QColor
+
+from umpire_track.renderer import ExportTask
+from umpire_track.scene import scene_document
+
+
+class Index:
+    def __init__(self, image=None):
+        self.image = image
+        self.reads = 0
+
+    def read_file(self, name):
+        self.reads += 1
+        if self.image is None:
+            raise KeyError(name)
+        return self.image, ""
+
+
+def run(task):
+    results = []
+    task.signals.finished.connect(lambda *args: results.append(args))
+    task.run()
+    return results
+
+
+def test_export_reads_background_on_the_task(tmp_path, qapp):
+    background = QImage(40, 40, QImage.Format_ARGB32)
+    background.fill(QColor("red"))
+    index = Index(background)
+    path = str(tmp_path / "scene.png")
+    document = scene_document("800m6", [{'id': 1, 'type': 'number', 'x': 5, 'y': 5, 'text': "1"}])
+    task = ExportTask(document, index, "800m6.png", path, 96)
+    assert index.reads == 0
+    assert run(task) == [(path, True, "")]
+    assert index.reads == 1 and not QImage(path).isNull()
+
+
+def test_export_failure_still_finishes(tmp_path, qapp):
+    path = str(tmp_path / "scene.png")
+    results = run(ExportTask(scene_document("800m6", []), Index(), "missing.png", path, 96))
+    assert len(results) == 1
+    assert results[0][:2] == (path, False) and results[0][2]
+
+
+def test_export_does_not_starve_smooth_scaling(tmp_path, qapp, process_until):
+    # Smooth scaling on the GUI thread waits for global pool threads while holding the GIL
+    from UmpireTrackEditor import MyApp
+    pool = QThreadPool.globalInstance()
+    threads = pool.maxThreadCount()
+    pool.setMaxThreadCount(1)
+    faulthandler.dump_traceback_later(60, exit=True)
+    window = MyApp(autosave=False)
+    try:
+        window.tabs.setCurrentWidget(window.edit_tab)
+        for index in range(50):
+            window.edit_canvas.create_item({'type': 'number', 'text': "3", 'x': index * 9, 'y': index * 5},
+                                           notify=False)
+        source = QImage(1600, 1600, QImage.Format_ARGB32)
+        source.fill(QColor("blue"))
+        path = str(tmp_path / "scene.png")
+        task = window.export_scene(path, 300)
+
+        def scale_and_check():
+            source.scaled(1500, 1500, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+            return task not in window._export_tasks
+        process_until(scale_and_check, timeout=30)
+        assert not QImage(path).isNull()
+    finally:
+        faulthandler.cancel_dump_traceback_later()
+        window.close()
+        pool.setMaxThreadCount(threads)
@@ -0,0 +1,42 @@
+import os
+import socket
+
+import pytest
+
+from umpire_track.cli import InstanceServer, forward_to_instance
+
+
+@pytest.fixture
+def name(tmp_path):
+    return str(tmp_path / "instance")
+
+
+def test_second_server_does_not_take_over_a_live_one(name, qapp):
+    first, second = InstanceServer(lambda request: {}), InstanceServer(lambda request: {})
+    assert first.listen(name)
+    assert not second.listen(name)
+    assert first.server.isListening()
+    first.server.close()
+
+
+def test_leftover_socket_file_is_reclaimed(name, qapp):
+    leftover = socket.socket(socket.AF_UNIX)
+    leftover.bind(name)  # Bound but never listening, like the file a crashed instance leaves
+    leftover.close()
+    assert os.path.exists(name)
+    server = InstanceServer(lambda request: {})
+    assert server.listen(name)
+    server.server.close()
+
+
+def test_unanswered_request_reports_busy(name, qapp):
+    server = InstanceServer(lambda request: {'ok': True, 'message': "served"})
+    assert server.listen(name)
+    # The server shares this thread's blocked event loop, so it cannot answer in time
+    reply = forward_to_instance({'command': "show", 'spec': ""}, name, timeout=200)
+    assert reply['ok'] is False and "busy" in reply['message']
+    server.server.close()
+
+
+def test_no_instance_gives_none(name, qapp):
+    assert forward_to_instance({'command': "show", 'spec': ""}, name, timeout=200) is None
@@ -0,0 +1,106 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from umpire_track.assets import (
+    AssetLayers, apply_blocks, build_asset_layers, diff_blocks, pack_asset_layers, _array_image, _image_array
+)
+
+SIZE = (37, 50)  # Not a whole number of blocks either way
+
+
+def _diagram(rng, base, changes, alpha=255):
+    array = base.copy()
+    for _ in range(changes):
+        y, x = rng.integers(0, SIZE[0] - 4), rng.integers(0, SIZE[1] - 4)
+        array[y:y + 4, x:x + 4, :3] = rng.integers(0, 256, 3)
+        array[y:y + 4, x:x + 4, 3] = alpha
+    return array
+
+
+def _arrays(alpha):
+    rng = np.random.default_rng(3)
+    base = np.zeros(SIZE + (4,), np.uint8)
+    base[..., 3] = alpha
+    arrays = {}
+    for event in ("800m", "1500m"):
+        event_base = _diagram(rng, base, 6, alpha)
+        for umpires in (4, 5, 6):
+            arrays[f"{event}{umpires}.png"] = _diagram(rng, event_base, 3, alpha)
+    arrays["Banner.png"] = _diagram(rng, base, 2, alpha)
+    arrays["Odd1.png"] = rng.integers(0, 256, (20, 30, 4), dtype=np.uint8)
+    return arrays
+
+
+def _compose(layers, name):
+    parent, data = layers[name]
+    return data if parent is None else apply_blocks(_compose(layers, parent), *data)
+
+
+def test_blocks_round_trip_opaque_changes():
+    rng = np.random.default_rng(1)
+    parent = rng.integers(0, 256, SIZE + (4,), dtype=np.uint8)
+    layer = parent.copy()
+    layer[5:9, 44:50] = [10, 20, 30, 255]
+    coordinates, pixels = diff_blocks(layer, parent)
+    assert len(coordinates) == 2
+    assert np.array_equal(apply_blocks(parent, coordinates, pixels), layer)
+    assert np.array_equal(apply_blocks(parent, *diff_blocks(parent, parent)), parent)
+
+
+@pytest.mark.parametrize("alpha", [255, 128, 0])
+def test_build_round_trips_through_the_parent_chain(alpha):
+    arrays = _arrays(alpha)
+    layers = build_asset_layers(arrays)
+    assert any(name.startswith("@event") for name in layers)
+    for name, array in arrays.items():
+        assert np.array_equal(_compose(layers, name), array), name
+    assert layers["Odd1.png"][0] is None
+    if alpha == 255:
+        assert all(layers[name][0] is not None for name in arrays if name != "Odd1.png")
+
+
+def test_semi_transparent_event_layers_round_trip():
+    # Event medians with partial alpha cannot be restored exactly over the base
+    arrays = {}
+    for event, shade in (("800m", 40), ("1500m", 200)):
+        for umpires in (4, 5, 6):
+            array = np.zeros(SIZE + (4,), np.uint8)
+            array[:, :20] = [shade, shade, shade, 100]
+            array[umpires, umpires] = [255, 0, 0, 255]
+            arrays[f"{event}{umpires}.png"] = array
+    layers = build_asset_layers(arrays)
+    for name, array in arrays.items():
+        assert np.array_equal(_compose(layers, name), array), name
+
+
+@pytest.mark.parametrize("alpha", [255, 128])
+def test_packed_file_round_trips(tmp_path, qapp, alpha):
+    source = tmp_path / "images"
+    source.mkdir()
+    arrays = _arrays(alpha)
+    for name, array in arrays.items():
+        assert _array_image(array).save(str(source / name))
+    arrays = {name: _image_array(_array_image(array)) for name, array in arrays.items()}
+    path = str(tmp_path / "images.layers")
+    files, shared, size = pack_asset_layers(str(source), path)
+    assert files == len(arrays) and shared > 0 and size > 0
+    layers = AssetLayers(path)
+    try:
+        assert sorted(layers.names()) == sorted(arrays)
+        with ThreadPoolExecutor(4) as pool:
+            images = dict(zip(arrays, pool.map(layers.image, list(arrays) * 3)))
+        for name, image in images.items():
+            assert np.array_equal(_image_array(image), arrays[name]), name
+        # Overlays restore opaque pixels only, so translucent files are stored whole
+        assert (layers.resident_bytes() > 0) == (alpha == 255)
+    finally:
+        layers.close()
+
+
+def test_not_a_layers_file(tmp_path):
+    path = tmp_path / "images.layers"
+    path.write_bytes(b"nothing")
+    with pytest.raises(ValueError):
+        AssetLayers(str(path))
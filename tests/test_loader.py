@@ -0,0 +1,95 @@
+import threading
+
+from PyQt5.QtGui import QImage, QPixmap, QColor
+
+from umpire_track.assets import PixmapCache, DiagramLoader, DECODE_PRIORITY
+
+
+def pixmap(size=10):
+    image = QImage(size, size, QImage.Format_ARGB32)
+    image.fill(QColor("red"))
+    return QPixmap.fromImage(image)
+
+
+class BlockingSource:
+    """Source whose reads wait on a gate and record their order"""
+    def __init__(self, keys):
+        self.keys = set(keys)
+        self.gate = threading.Event()
+        self.order = []
+
+    def has(self, key):
+        return key in self.keys
+
+    def read_image(self, key):
+        self.gate.wait(5)
+        self.order.append(key)
+        image = QImage(4, 4, QImage.Format_ARGB32)
+        image.fill(QColor("blue"))
+        return image, ""
+
+
+def test_cache_evicts_least_recently_used(qapp):
+    size = PixmapCache.pixmap_bytes(pixmap())
+    cache = PixmapCache(max_bytes=size * 2)
+    cache.put('a', pixmap())
+    cache.put('b', pixmap())
+    assert cache.get('a') is not None
+    cache.put('c', pixmap())
+    assert 'b' not in cache
+    assert 'a' in cache and 'c' in cache
+    assert cache.current_bytes == size * 2
+    assert cache.stats()['evictions'] == 1
+
+
+def test_cache_rejects_oversized_and_shrinks(qapp):
+    size = PixmapCache.pixmap_bytes(pixmap())
+    cache = PixmapCache(max_bytes=size * 3)
+    assert not cache.put('big', pixmap(100))
+    for key in 'abc':
+        cache.put(key, pixmap())
+    cache.set_max_bytes(size)
+    assert len(cache) == 1 and 'c' in cache
+
+
+def test_request_promotes_queued_prefetch(qapp, process_until):
+    source = BlockingSource(['running', 'a', 'b'])
+    loader = DiagramLoader(PixmapCache(), source)
+    loader.pool.setMaxThreadCount(1)
+    loaded = []
+    loader.loaded.connect(lambda key, pixmap: loaded.append(key))
+    loader.request('running')
+    process_until(lambda: loader.pool.activeThreadCount() == 1)
+    loader.request('a', DECODE_PRIORITY['prefetch'])
+    loader.request('b', DECODE_PRIORITY['prefetch'])
+    loader.request('b', DECODE_PRIORITY['current'])
+    source.gate.set()
+    process_until(lambda: len(loaded) == 3)
+    assert source.order == ['running', 'b', 'a']
+    loader.shutdown()
+
+
+def test_cancel_after_run_is_ignored(qapp, process_until):
+    source = BlockingSource(['key'])
+    loader = DiagramLoader(PixmapCache(), source)
+    results = []
+    loader.loaded.connect(lambda key, pixmap: results.append(key))
+    loader.failed.connect(lambda key, error: results.append(error))
+    loader.request('key')
+    process_until(lambda: loader.pool.activeThreadCount() == 1)
+    loader.cancel_stale()
+    source.gate.set()
+    loader.pool.waitForDone()
+    process_until(lambda: not loader._started)
+    assert results == []
+    assert 'key' not in loader.cache
+    loader.request('key')
+    process_until(lambda: results == ['key'])
+
+
+def test_missing_key_fails_without_decoding(qapp):
+    loader = DiagramLoader(PixmapCache(), BlockingSource([]))
+    errors = []
+    loader.failed.connect(lambda key, error: errors.append((key, error)))
+    loader.request('absent')
+    assert errors == [('absent', "no asset")]
@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+from umpire_track.assets import RENDER_CACHE_RESCAN_EVERY, RenderCache
+from umpire_track.scene import scene_document
+
+
+def document(*items):
+    return scene_document("800m6", list(items))
+
+
+def test_scene_key_ignores_item_ids_and_field_order():
+    first = document({'id': 1, 'type': 'number', 'x': 5, 'y': 6, 'text': "1"})
+    second = document({'text': "1", 'y': 6, 'x': 5, 'type': 'number', 'id': 9})
+    assert RenderCache.scene_key(first, "bg:1", ".PNG", 96) == RenderCache.scene_key(second, "bg:1", ".png", 96)
+
+
+@pytest.mark.parametrize("change", [
+    {'stamp': "bg:2"}, {'fmt': ".svg"}, {'dpi': 300}, {'x': 7},
+])
+def test_scene_key_changes_with_output(change):
+    def key(stamp="bg:1", fmt=".png", dpi=96, x=5):
+        return RenderCache.scene_key(document({'id': 1, 'type': 'straight', 'x': x, 'y': 6}), stamp, fmt, dpi)
+    assert key(**change) != key()
+
+
+def fill(cache, count, size=100):
+    keys = [RenderCache.key('test', index) for index in range(count)]
+    for age, key in enumerate(keys):
+        cache.put(key, bytes(size))
+        os.utime(cache._path(key), (1000 + age, 1000 + age))
+    return keys
+
+
+def test_eviction_drops_least_recently_used(tmp_path):
+    cache = RenderCache(str(tmp_path), max_bytes=350)
+    keys = fill(cache, 3)
+    assert cache.get(keys[0]) is not None  # Touching the oldest makes it the newest
+    cache.put(RenderCache.key('test', 'new'), bytes(100))
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
+    assert cache.evictions == 1
+    assert sum(entry.stat().st_size for entry in os.scandir(tmp_path)) <= 350
+
+
+def test_stores_under_budget_do_not_rescan(tmp_path):
+    cache = RenderCache(str(tmp_path), max_bytes=10 ** 6)
+    fill(cache, RENDER_CACHE_RESCAN_EVERY + 1)
+    assert cache.scans == 2  # The first store, then the periodic rescan
+    cache.put(RenderCache.key('test', 0), bytes(100))
+    assert cache.scans == 2 and cache._total == 100 * (RENDER_CACHE_RESCAN_EVERY + 1)
+
+
+def test_fetch_replaces_destination_atomically(tmp_path):
+    cache = RenderCache(str(tmp_path / "cache"))
+    key = RenderCache.key('test')
+    destination = tmp_path / "out.png"
+    assert not cache.fetch(key, str(destination))
+    cache.put(key, b"rendered")
+    destination.write_bytes(b"old")
+    assert cache.fetch(key, str(destination))
+    assert destination.read_bytes() == b"rendered"
+    assert sorted(os.listdir(tmp_path)) == ["cache", "out.png"]
+    with pytest.raises(OSError):
+        cache.fetch(key, str(tmp_path / "missing" / "out.png"))
+    assert sorted(os.listdir(tmp_path)) == ["cache", "out.png"]
+
+
+def test_hit_survives_a_failed_recency_touch(tmp_path, monkeypatch):
+    cache = RenderCache(str(tmp_path), max_bytes=10_000)
+    key = RenderCache.key('export', "scene")
+    cache.put(key, b"png")
+
+    def read_only(*args):
+        raise PermissionError("read-only cache")
+    monkeypatch.setattr(os, 'utime', read_only)
+    assert cache.get(key) == b"png"
+    assert cache.hits == 1 and cache.misses == 0
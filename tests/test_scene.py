@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+from umpire_track.scene import (
+    SceneJournal, claim_journal, journal_record, load_scene, save_scene, scene_document,
+)
+
+
+def number(item_id, x=10, y=20, text="1"):
+    return {'id': item_id, 'type': 'number', 'x': x, 'y': y, 'text': text}
+
+
+def test_scene_round_trip(tmp_path):
+    path = str(tmp_path / "race.utscene")
+    document = scene_document("800m6", [number(1), {'id': 2, 'type': 'straight', 'x': 5, 'y': 6, 'angle': 45.0}])
+    save_scene(path, document)
+    assert load_scene(path) == document
+
+
+@pytest.mark.parametrize("change", [
+    {'format': "other"},
+    {'version': 99},
+    {'size': [0, 10]},
+    {'size': "738x738"},
+    {'background': 7},
+    {'items': None},
+    {'items': [{'id': 1, 'type': 'banner', 'x': 0, 'y': 0}]},
+    {'items': [{'id': 1, 'type': 'number', 'x': 0, 'y': 0}]},
+    {'items': [{'id': 1, 'type': 'straight', 'x': "0", 'y': 0}]},
+    {'items': [{'id': 1, 'type': 'text', 'x': 0, 'y': 0, 'text': "a", 'w': float('nan')}]},
+    {'items': [{'id': True, 'type': 'straight', 'x': 0, 'y': 0}]},
+    {'items': [number(1), number(1)]},
+    {'items': ["number"]},
+])
+def test_load_rejects_invalid_documents(tmp_path, change):
+    path = tmp_path / "bad.utscene"
+    path.write_text(json.dumps(dict(scene_document("800m6", [number(1)]), **change)))
+    with pytest.raises(ValueError):
+        load_scene(str(path))
+
+
+def test_journal_replay(tmp_path, qapp):
+    path = str(tmp_path / "autosave.journal")
+    journal = SceneJournal(path)
+    journal.compact(scene_document("800m6", [number(1)]))
+    journal.append(journal_record(None, number(2)))
+    journal.append(journal_record(number(1), number(1, x=50)))
+    journal.append(journal_record(number(2), None))
+    journal.close()
+    document = SceneJournal.replay(path)
+    assert document['background'] == "800m6"
+    assert document['items'] == [number(1, x=50)]
+
+
+def test_journal_replay_stops_at_damaged_records(tmp_path):
+    path = tmp_path / "autosave.journal"
+    records = [
+        {'op': 'snapshot', 'document': scene_document("800m6", [number(1)])},
+        {'op': 'add', 'item': number(2)},
+        {'op': 'add', 'item': {'id': 3, 'type': 'banner', 'x': 0, 'y': 0}},
+        {'op': 'add', 'item': number(4)},
+    ]
+    path.write_text("".join(json.dumps(record) + "\n" for record in records))
+    assert [state['id'] for state in SceneJournal.replay(str(path))['items']] == [1, 2]
+    path.write_text(json.dumps(records[0]) + "\n" + json.dumps(records[1])[:-5])
+    assert [state['id'] for state in SceneJournal.replay(str(path))['items']] == [1]
+    assert SceneJournal.replay(str(tmp_path / "missing.journal")) is None
+
+
+def test_each_instance_claims_its_own_journal(tmp_path, qapp):
+    first_path, first_lock = claim_journal(str(tmp_path), slots=2)
+    second_path, second_lock = claim_journal(str(tmp_path), slots=2)
+    assert first_path and second_path and first_path != second_path
+    assert claim_journal(str(tmp_path), slots=2) == (None, None)
+    journal = SceneJournal(first_path, first_lock)
+    journal.close()
+    assert claim_journal(str(tmp_path), slots=2)[0] == first_path
+    second_lock.unlock()
@@ -0,0 +1,58 @@
+import random
+
+from PyQt5.QtCore import QRect
+
+from umpire_track.canvas import SpatialGrid
+
+
+def test_query_finds_only_intersecting_items():
+    grid = SpatialGrid(cell=50)
+    grid.insert("near", QRect(10, 10, 20, 20))
+    grid.insert("wide", QRect(0, 200, 400, 10))
+    grid.insert("far", QRect(300, 300, 20, 20))
+    assert grid.query(QRect(0, 0, 40, 40)) == ["near"]
+    assert grid.query(QRect(350, 190, 5, 5)) == []
+    assert grid.query(QRect(350, 205, 5, 5)) == ["wide"]
+    assert sorted(grid.query(QRect(0, 0, 400, 400))) == ["far", "near", "wide"]
+
+
+def test_same_cell_but_disjoint_is_not_reported():
+    grid = SpatialGrid(cell=100)
+    grid.insert("a", QRect(0, 0, 10, 10))
+    assert grid.query(QRect(50, 50, 10, 10)) == []
+
+
+def test_insert_replaces_and_remove_cleans_up():
+    grid = SpatialGrid(cell=50)
+    grid.insert("item", QRect(0, 0, 120, 20))
+    grid.insert("item", QRect(300, 300, 10, 10))
+    assert grid.query(QRect(0, 0, 50, 50)) == []
+    assert grid.query(QRect(300, 300, 1, 1)) == ["item"]
+    grid.remove("item")
+    grid.remove("item")
+    assert grid.query(QRect(0, 0, 1000, 1000)) == []
+    assert grid.cells == {} and grid.bounds == {}
+
+
+def test_negative_coordinates():
+    grid = SpatialGrid(cell=50)
+    grid.insert("off", QRect(-80, -30, 40, 40))
+    assert grid.query(QRect(-60, -20, 5, 5)) == ["off"]
+    assert grid.query(QRect(0, 0, 50, 50)) == []
+
+
+def test_matches_brute_force():
+    rng = random.Random(7)
+    grid = SpatialGrid(cell=64)
+    rects = {}
+    for key in range(300):
+        rect = QRect(rng.randrange(-50, 700), rng.randrange(-50, 400), rng.randrange(1, 120), rng.randrange(1, 80))
+        rects[key] = rect
+        grid.insert(key, rect)
+    for key in range(0, 300, 3):
+        grid.remove(key)
+        del rects[key]
+    for _ in range(100):
+        area = QRect(rng.randrange(-50, 700), rng.randrange(-50, 400), rng.randrange(1, 200), rng.randrange(1, 200))
+        expected = {key for key, rect in rects.items() if rect.intersects(area)}
+        assert set(grid.query(area)) == expected
@@ -0,0 +1,45 @@
+import os
+
+from PyQt5.QtGui import QColor, QImage
+
+from umpire_track.assets import ThumbnailSource
+
+
+class Source:
+    def __init__(self):
+        self.stamps = {}
+        self.reads = 0
+
+    def has(self, key):
+        return True
+
+    def stamp(self, key):
+        return self.stamps.get(key, "v1")
+
+    def read_image(self, key):
+        self.reads += 1
+        image = QImage(400, 250, QImage.Format_ARGB32)
+        image.fill(QColor("green"))
+        return image, ""
+
+
+def test_thumbnails_are_cached_on_disk(tmp_path, qapp):
+    source = Source()
+    thumbnails = ThumbnailSource(source, str(tmp_path), (40, 25), dpr=2.0)
+    image, error = thumbnails.read_image(("800m", 6))
+    assert not error and (image.width(), image.height()) == (80, 50) and image.devicePixelRatio() == 2.0
+    again = ThumbnailSource(source, str(tmp_path), (40, 25), dpr=2.0)
+    assert again.read_image(("800m", 6))[0].size() == image.size()
+    assert source.reads == 1
+    source.stamps[("800m", 6)] = "v2"
+    again.read_image(("800m", 6))
+    assert source.reads == 2
+
+
+def test_thumbnail_cache_is_size_bounded(tmp_path, qapp):
+    source = Source()
+    thumbnails = ThumbnailSource(source, str(tmp_path), (40, 25), max_bytes=1)
+    for umpires in range(5, 11):
+        thumbnails.read_image(("800m", umpires))
+    assert thumbnails.cache.evictions > 0
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
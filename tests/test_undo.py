@@ -0,0 +1,109 @@
+import pytest
+
+from umpire_track import scene
+from umpire_track.canvas import SceneCanvas
+from umpire_track.scene import UNDO_MERGE_SECONDS, UndoHistory
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(scene.time, 'monotonic', clock)
+    return clock
+
+
+@pytest.fixture
+def canvas(qapp):
+    canvas = SceneCanvas()
+    yield canvas
+    canvas.shutdown()
+    canvas.deleteLater()
+
+
+def positions(canvas):
+    return {item_id: (item.state()['x'], item.state()['y']) for item_id, item in canvas.items.items()}
+
+
+def test_rapid_moves_merge_into_one_step(canvas, clock):
+    history = UndoHistory(canvas)
+    item = canvas.add_number("1")
+    start = positions(canvas)
+    for x in (10, 20, 30):
+        clock.now += UNDO_MERGE_SECONDS / 2
+        canvas.update_item(item.item_id, {'x': x})
+    assert len(history.undo_stack) == 2
+    history.undo()
+    assert positions(canvas) == start
+    history.undo()
+    assert not canvas.items
+    history.redo()
+    history.redo()
+    assert positions(canvas) == {item.item_id: (30, start[item.item_id][1])}
+
+
+def test_slow_moves_stay_separate(canvas, clock):
+    history = UndoHistory(canvas)
+    item = canvas.add_number("1")
+    for x in (10, 20):
+        clock.now += UNDO_MERGE_SECONDS * 2
+        canvas.update_item(item.item_id, {'x': x})
+    assert len(history.undo_stack) == 3
+    history.undo()
+    assert canvas.items[item.item_id].state()['x'] == 10
+
+
+def test_different_fields_do_not_merge(canvas, clock):
+    history = UndoHistory(canvas)
+    item = canvas.add_text_box("Start")
+    canvas.update_item(item.item_id, {'x': 40})
+    canvas.update_item(item.item_id, {'text': "Finish"})
+    assert len(history.undo_stack) == 3
+    history.undo()
+    assert canvas.items[item.item_id].state()['text'] == "Start"
+
+
+def test_batch_is_one_undo_step(canvas, clock):
+    first, second = canvas.add_number("1"), canvas.add_line("straight")
+    history = UndoHistory(canvas)
+    before = positions(canvas)
+    with canvas.batch():
+        canvas.update_item(first.item_id, {'x': 200})
+        canvas.update_item(second.item_id, {'x': 300})
+    canvas.set_selected([first, second])
+    canvas.delete_selection()
+    assert len(history.undo_stack) == 2
+    history.undo()
+    assert set(canvas.items) == {first.item_id, second.item_id}
+    history.undo()
+    assert positions(canvas) == before
+    assert not history.undo_stack and len(history.redo_stack) == 2
+
+
+def test_new_edit_clears_redo(canvas, clock):
+    history = UndoHistory(canvas)
+    canvas.add_number("1")
+    history.undo()
+    canvas.add_number("2")
+    assert not history.redo_stack
+    assert history.total_bytes == sum(command.size for command in history.undo_stack)
+
+
+def test_memory_cap_drops_oldest_steps(canvas, clock):
+    history = UndoHistory(canvas, max_bytes=2000)
+    for index in range(50):
+        clock.now += UNDO_MERGE_SECONDS * 2
+        canvas.add_text_box("x" * 100 + str(index))
+    assert history.total_bytes <= 2000
+    assert 1 < len(history.undo_stack) < 50
+    assert history.total_bytes == sum(command.size for command in history.undo_stack)
+    while history.undo_stack:
+        history.undo()
+    assert len(canvas.items) == 50 - len(history.redo_stack)
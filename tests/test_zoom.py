@@ -0,0 +1,38 @@
+from PyQt5.QtGui import QImage, QPixmap, QColor, QPainter
+from PyQt5.QtWidgets import QLabel
+
+from umpire_track.canvas import SceneCanvas, WidgetCanvasView, ZOOM_RANGE, ZOOM_STEP
+from umpire_track.common import IMAGE_SIZE
+
+
+def test_zoom_is_clamped_and_resets(qapp):
+    view = WidgetCanvasView(QLabel("track"))
+    view.zoom_by(ZOOM_STEP)
+    assert view.zoom() == ZOOM_STEP
+    view.zoom_by(1000)
+    assert view.zoom() == ZOOM_RANGE[1]
+    view.zoom_by(0.001)
+    assert view.zoom() == ZOOM_RANGE[0]
+    view.zoom_by(2)
+    view.reset_zoom()
+    assert view.zoom() == 1.0
+
+
+def test_zoomed_background_is_drawn_from_the_source(qapp):
+    # Alternating one pixel columns average to grey in the fitted copy, so only the source keeps them
+    source = QPixmap(IMAGE_SIZE[0] * 2, IMAGE_SIZE[1] * 2)
+    source.fill(QColor("black"))
+    painter = QPainter(source)
+    painter.setPen(QColor("white"))
+    for x in range(1, source.width(), 2):
+        painter.drawLine(x, 0, x, source.height())
+    painter.end()
+    canvas = SceneCanvas()
+    canvas.set_background(source)
+    canvas.zoom_by(ZOOM_RANGE[1])
+    image = QImage(canvas.viewport().size(), QImage.Format_RGB32)
+    painter = QPainter(image)
+    canvas.render(painter)
+    painter.end()
+    shades = {image.pixelColor(x, image.height() // 2).lightness() for x in range(image.width())}
+    assert min(shades) < 40 and max(shades) > 215
@@ -0,0 +1 @@
+"""Umpire Track Editor: asset store, diagram renderer, scenes, Edit canvases and batch rendering"""
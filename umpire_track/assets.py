@@ -0,0 +1,936 @@
+"""Diagram asset store: index, bundle and layers files, decode pool and caches"""
+import sys
+import os
+import re
+import mmap
+import struct
+import time
+import threading
+import json
+import hashlib
+import contextlib
+from collections import OrderedDict
+try:
+    import numpy as np
+except ImportError:  # Only the layered asset store (--pack-layers) needs NumPy
+    np = None
+from PyQt5.QtGui import QPixmap, QImage, QImageReader
+from PyQt5.QtCore import (
+    Qt, QObject, QRunnable, QThreadPool, pyqtSignal, QFileSystemWatcher, QStandardPaths,
+    QByteArray, QBuffer, QIODevice
+)
+
+from .common import INITIAL_IMAGE, asset_base_path, instruments
+
+# Constants
+PIXMAP_CACHE_BYTES = 64 * 1024 * 1024  # Decoded View tab diagrams kept in memory
+RENDER_CACHE_BYTES = 128 * 1024 * 1024  # Encoded exports and clipboard data kept on disk
+RENDER_CACHE_DIRECTORY = "renders"  # Under the user cache location
+RENDER_CACHE_VERSION = 1  # Bump when rendering output changes to orphan old entries
+RENDER_CACHE_RESCAN_EVERY = 64  # Stores between directory scans while under budget; other instances write here too
+DECODE_THREADS = 2
+DECODE_PRIORITY = {'current': 1, 'prefetch': 0}
+THUMB_SIZE = (144, 90)
+THUMB_DISK_BYTES = 16 * 1024 * 1024  # Encoded gallery thumbnails kept on disk
+ASSET_BUNDLE = "images.bundle"
+BUNDLE_MAGIC = b"UTEBNDL1"
+ASSET_LAYERS = "images.layers"
+LAYERS_FORMAT = 1
+LAYER_BLOCK = 16  # Overlay patches are stored as changed blocks of this many pixels square
+DIAGRAM_PATTERN = re.compile(r"^(?P<event>.+?)(?P<umpires>\d+)\.png$")
+
+class PixmapCache:
+    """Bounded LRU cache of decoded pixmaps keyed by (event, umpire count)"""
+    def __init__(self, max_bytes=PIXMAP_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def pixmap_bytes(pixmap):
+        """Approximate decoded size of a pixmap in bytes"""
+        return pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key):
+        """Return the cached pixmap for key, or None on a miss"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, pixmap):
+        """Store pixmap under key, evicting least recently used entries"""
+        size = self.pixmap_bytes(pixmap)
+        if size > self.max_bytes:
+            return False
+        self.discard(key)
+        self._entries[key] = (pixmap, size)
+        self.current_bytes += size
+        self._evict()
+        return True
+
+    def discard(self, key):
+        """Drop key from the cache if present"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry[1]
+
+    def clear(self):
+        """Drop every cached pixmap"""
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def set_max_bytes(self, max_bytes):
+        """Change the byte budget, evicting immediately if it shrank"""
+        self.max_bytes = max_bytes
+        self._evict()
+
+    def stats(self):
+        """Return a snapshot of cache counters"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self.current_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def _evict(self):
+        while self.current_bytes > self.max_bytes and self._entries:
+            _, (_, size) = self._entries.popitem(last=False)
+            self.current_bytes -= size
+            self.evictions += 1
+
+class RenderCache:
+    """Content-addressed, size-bounded on-disk cache of encoded renders.
+
+    Entries are named by a SHA-256 of a canonical JSON description of what
+    was rendered. Files are written to a temporary name and renamed into
+    place, so several app instances and batch processes can share the
+    directory without locks; readers see a whole entry or none. Eviction
+    drops the least recently used files, by mtime, once the total exceeds
+    max_bytes. The total is tracked as entries are stored, so the directory
+    is only scanned when it looks over budget or every
+    RENDER_CACHE_RESCAN_EVERY stores, to pick up other writers.
+    """
+    def __init__(self, directory, max_bytes=RENDER_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.stores = 0
+        self.evictions = 0
+        self.scans = 0
+        self._lock = threading.Lock()
+        self._total = None  # Bytes on disk as of the last scan plus our stores since; None until scanned
+        self._stores_since_scan = 0
+
+    @staticmethod
+    def key(*parts):
+        """Hash of parts serialised as canonical JSON"""
+        text = json.dumps([RENDER_CACHE_VERSION, *parts], sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def scene_key(cls, document, background_stamp, fmt, dpi):
+        """Key for a scene export; item ids are dropped since they do not affect output"""
+        items = [{k: v for k, v in item.items() if k != 'id'} for item in document['items']]
+        return cls.key('scene', document['size'], items, background_stamp, fmt.lower(), dpi)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key)
+
+    def get(self, key):
+        """Cached bytes for key, or None on a miss"""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as file:
+                data = file.read()
+        except OSError:
+            # Missing, or evicted by another instance while we looked
+            with self._lock:
+                self.misses += 1
+            return None
+        with contextlib.suppress(OSError):
+            os.utime(path)  # Recency for eviction; a read-only cache still serves hits
+        with self._lock:
+            self.hits += 1
+            self.bytes_saved += len(data)
+        return data
+
+    def put(self, key, data):
+        path = self._path(key)
+        replaced = 0
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with contextlib.suppress(OSError):
+                replaced = os.path.getsize(path)
+            _write_atomic(path, data)
+        except OSError as error:
+            instruments.debug("Render not cached: %s", error)
+            return
+        with self._lock:
+            self.stores += 1
+            self._stores_since_scan += 1
+            if self._total is not None:
+                self._total += len(data) - replaced
+            scan = (self._total is None or self._total > self.max_bytes
+                    or self._stores_since_scan >= RENDER_CACHE_RESCAN_EVERY)
+        if scan:
+            self._evict()
+
+    def fetch(self, key, path):
+        """Write the cached bytes for key to path; False on a miss.
+
+        path is replaced atomically, so a failed write never leaves a
+        truncated export behind.
+        """
+        data = self.get(key)
+        if data is None:
+            return False
+        _write_atomic(path, data)
+        return True
+
+    def store_file(self, key, path):
+        """Cache the file just rendered to path"""
+        try:
+            with open(path, 'rb') as file:
+                self.put(key, file.read())
+        except OSError as error:
+            instruments.debug("Render not cached: %s", error)
+
+    def _evict(self):
+        """Scan the directory and drop least recently used entries until under max_bytes"""
+        entries = []
+        try:
+            with os.scandir(self.directory) as listing:
+                for entry in listing:
+                    if re.fullmatch(r"[0-9a-f]{64}", entry.name):
+                        with contextlib.suppress(OSError):
+                            info = entry.stat()
+                            entries.append((info.st_mtime, info.st_size, entry.path))
+        except OSError:
+            return
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            total -= size
+            with contextlib.suppress(OSError):
+                os.remove(path)
+                evicted += 1
+        with self._lock:
+            self.evictions += evicted
+            self.scans += 1
+            self._total = total
+            self._stores_since_scan = 0
+
+    def stats(self):
+        """Return a snapshot of cache counters"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'bytes_saved': self.bytes_saved,
+            'stores': self.stores,
+            'evictions': self.evictions,
+        }
+
+    def summary(self):
+        stats = self.stats()
+        return (f"Render cache: {stats['hits']} hits, {stats['misses']} misses "
+                f"({stats['hit_rate']:.0%}), {stats['bytes_saved'] // 1024} KB not re-encoded, "
+                f"{stats['evictions']} evicted")
+
+def _write_atomic(path, data):
+    """Write data to a temporary file beside path and rename it into place"""
+    partial = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(partial, 'wb') as file:
+            file.write(data)
+        os.replace(partial, path)
+    except OSError:
+        with contextlib.suppress(OSError):
+            os.remove(partial)
+        raise
+
+def open_render_cache():
+    """The render cache in the user cache location"""
+    directory = QStandardPaths.writableLocation(QStandardPaths.CacheLocation)
+    return RenderCache(os.path.join(directory, RENDER_CACHE_DIRECTORY))
+
+def event_sort_key(event):
+    """Order events as sprints, hurdles, distances, then relays"""
+    match = re.search(r"(\d+)m", event)
+    meters = int(match.group(1)) if match else 0
+    return ("Relay" in event, meters, event)
+
+class AssetBundle:
+    """Read-only, memory-mapped pack of image files built by pack_asset_bundle"""
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Asset bundle '{path}' is empty")
+        self._view = memoryview(self._map)
+        self.entries = self._read_header()
+
+    def _read_header(self):
+        magic_size = len(BUNDLE_MAGIC)
+        if bytes(self._view[:magic_size]) != BUNDLE_MAGIC:
+            raise ValueError(f"'{self.path}' is not an asset bundle")
+        (count,) = struct.unpack_from("<I", self._map, magic_size)
+        position = magic_size + 4
+        entries = {}
+        for _ in range(count):
+            (name_size,) = struct.unpack_from("<H", self._map, position)
+            position += 2
+            name = bytes(self._view[position:position + name_size]).decode('utf-8')
+            position += name_size
+            offset, size = struct.unpack_from("<QI", self._map, position)
+            position += 12
+            entries[name] = (offset, size)
+        return entries
+
+    def names(self):
+        return list(self.entries)
+
+    def data(self, name):
+        """Return a zero-copy view of one packed file"""
+        offset, size = self.entries[name]
+        return self._view[offset:offset + size]
+
+    def close(self):
+        self._view.release()
+        self._map.close()
+        self._file.close()
+
+def pack_asset_bundle(source_dir, bundle_path):
+    """Pack every PNG in source_dir into one indexed bundle file.
+
+    The layout is the magic string, an entry count, a table of
+    (name, offset, size) records and then the raw PNG bytes, so the app
+    can memory-map the bundle and decode entries without opening files.
+    Ship it next to the executable, e.g. PyInstaller --add-data
+    "images.bundle;.".
+    """
+    names = sorted(name for name in os.listdir(source_dir) if name.lower().endswith(".png"))
+    encoded = [name.encode('utf-8') for name in names]
+    header_size = len(BUNDLE_MAGIC) + 4 + sum(2 + len(name) + 12 for name in encoded)
+    table, blobs = [], []
+    offset = header_size
+    for name, raw_name in zip(names, encoded):
+        with open(os.path.join(source_dir, name), 'rb') as f:
+            blob = f.read()
+        table.append(struct.pack("<H", len(raw_name)) + raw_name + struct.pack("<QI", offset, len(blob)))
+        blobs.append(blob)
+        offset += len(blob)
+    temp_path = bundle_path + ".tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(BUNDLE_MAGIC)
+        f.write(struct.pack("<I", len(names)))
+        f.writelines(table)
+        f.writelines(blobs)
+    os.replace(temp_path, bundle_path)
+    return len(names), offset
+
+def _image_array(image):
+    """Copy a QImage into an H x W x 4 RGBA uint8 array"""
+    image = image.convertToFormat(QImage.Format_RGBA8888)
+    bits = image.constBits()
+    bits.setsize(image.sizeInBytes())
+    rows = np.frombuffer(bits, np.uint8).reshape(image.height(), image.bytesPerLine())
+    return rows[:, :image.width() * 4].reshape(image.height(), image.width(), 4).copy()
+
+def _array_image(array):
+    """QImage owning a copy of an H x W x 4 RGBA uint8 array"""
+    array = np.ascontiguousarray(array)
+    height, width = array.shape[:2]
+    return QImage(array.data, width, height, width * 4, QImage.Format_RGBA8888).copy()
+
+def _block_view(array, block=LAYER_BLOCK):
+    """Pad array to whole blocks and return (padded, rows x columns x block x block x 4 view)"""
+    height, width = array.shape[:2]
+    padded = np.zeros((-(-height // block) * block, -(-width // block) * block, 4), np.uint8)
+    padded[:height, :width] = array
+    blocks = padded.reshape(padded.shape[0] // block, block, padded.shape[1] // block, block, 4)
+    return padded, blocks.swapaxes(1, 2)
+
+def diff_blocks(layer, parent, block=LAYER_BLOCK):
+    """Sparse overlay turning parent into layer: (block coordinates, RGBA block pixels).
+
+    Pixels that differ are copied with full alpha; the rest are left
+    transparent, so blending the overlay over the parent restores layer
+    exactly when layer is opaque.
+    """
+    _, layer_blocks = _block_view(layer, block)
+    _, parent_blocks = _block_view(parent, block)
+    changed = (layer_blocks != parent_blocks).any(axis=-1)
+    coordinates = np.argwhere(changed.any(axis=(2, 3))).astype(np.uint16)
+    pixels = layer_blocks[coordinates[:, 0], coordinates[:, 1]].copy()
+    mask = changed[coordinates[:, 0], coordinates[:, 1]]
+    pixels[~mask] = 0
+    pixels[..., 3][mask] = 255
+    return coordinates, pixels
+
+def apply_blocks(parent, coordinates, pixels):
+    """Alpha-blend overlay blocks over a copy of parent, all blocks in one vectorized pass"""
+    height, width = parent.shape[:2]
+    padded, blocks = _block_view(parent, pixels.shape[1] if len(pixels) else LAYER_BLOCK)
+    if len(pixels):
+        rows, columns = coordinates[:, 0], coordinates[:, 1]
+        under = blocks[rows, columns].astype(np.uint16)
+        alpha = pixels[..., 3:4].astype(np.uint16)
+        blocks[rows, columns] = (pixels * alpha + under * (255 - alpha) + 127) // 255
+    return padded[:height, :width]
+
+def build_asset_layers(arrays):
+    """Split {filename: RGBA array} into shared bases and per-file overlays.
+
+    Images of one size share a base, the per-pixel median of them all;
+    diagrams of one event get an intermediate layer over that base; each
+    file is then a sparse overlay on its event layer. Overlays are diffed
+    and checked against each parent as a reader rebuilds it, since an
+    overlay over non-opaque pixels does not restore them exactly. Files
+    that would not round-trip exactly, or have no peers, are stored whole.
+    Returns
+    {name: (parent, array)} where array is the image for parentless
+    layers and (coordinates, pixels) otherwise.
+    """
+    def median(names):
+        return np.median(np.stack([arrays[name] for name in names]), axis=0).astype(np.uint8)
+
+    by_size, by_event = {}, {}
+    for name, array in arrays.items():
+        by_size.setdefault(array.shape, []).append(name)
+        key = AssetIndex.key_for(name)
+        if key is not None:
+            by_event.setdefault((key[0], array.shape), []).append(name)
+    layers, images, parents = {}, {}, {}
+    for shape, names in by_size.items():
+        if len(names) > 1:
+            base = f"@base {shape[1]}x{shape[0]}"
+            images[base] = median(names)
+            layers[base] = (None, images[base])
+            for name in names:
+                parents[name] = base
+    for (event, shape), names in by_event.items():
+        if len(names) > 1:
+            layer = f"@event {event} {shape[1]}x{shape[0]}"
+            parent = parents[names[0]]
+            coordinates, pixels = diff_blocks(median(names), images[parent])
+            layers[layer] = (parent, (coordinates, pixels))
+            images[layer] = apply_blocks(images[parent], coordinates, pixels)
+            for name in names:
+                parents[name] = layer
+    for name, array in arrays.items():
+        parent = parents.get(name)
+        if parent is not None:
+            coordinates, pixels = diff_blocks(array, images[parent])
+            if np.array_equal(apply_blocks(images[parent], coordinates, pixels), array):
+                layers[name] = (parent, (coordinates, pixels))
+                continue
+        layers[name] = (None, array)
+    return layers
+
+def pack_asset_layers(source_dir, layers_path):
+    """Store every PNG in source_dir as shared base layers plus sparse overlays.
+
+    The file is a compressed NumPy archive: an 'index' JSON record of each
+    layer's parent, then 'NAME|image' arrays for parentless layers and
+    'NAME|blocks'/'NAME|pixels' arrays for overlays.
+    """
+    if np is None:
+        raise ValueError("Asset layers need NumPy")
+    names = sorted(name for name in os.listdir(source_dir) if name.lower().endswith(".png"))
+    arrays = {name: _image_array(QImage(os.path.join(source_dir, name))) for name in names}
+    layers = build_asset_layers(arrays)
+    index = {'format': LAYERS_FORMAT, 'files': names, 'layers': {}}
+    members = {}
+    for name, (parent, data) in layers.items():
+        if parent is None:
+            members[f"{name}|image"] = data
+        else:
+            members[f"{name}|blocks"], members[f"{name}|pixels"] = data
+        index['layers'][name] = {'parent': parent}
+    members['index'] = np.frombuffer(json.dumps(index).encode('utf-8'), np.uint8)
+    temp_path = layers_path + ".tmp"
+    with open(temp_path, 'wb') as f:
+        np.savez_compressed(f, **members)
+    os.replace(temp_path, layers_path)
+    return len(names), len(layers) - len(names), os.path.getsize(layers_path)
+
+class AssetLayers:
+    """Read-only store written by pack_asset_layers; composes files on demand.
+
+    Shared layers stay resident once built, so each file costs only the
+    inflate and blend of its own overlay. Safe to call from pool threads;
+    only reads from the archive are serialized.
+    """
+    def __init__(self, path):
+        if np is None:
+            raise ValueError("Asset layers need NumPy")
+        self.path = path
+        try:
+            self._archive = np.load(path)
+            index = json.loads(self._archive['index'].tobytes().decode('utf-8'))
+        except (OSError, KeyError, ValueError) as error:
+            raise ValueError(f"'{path}' is not an asset layers file: {error}")
+        if index.get('format') != LAYERS_FORMAT:
+            raise ValueError(f"'{path}' has unsupported layers format {index.get('format')}")
+        self.files = index['files']
+        self.layers = index['layers']
+        self._resident = {}
+        self._lock = threading.Lock()
+
+    def names(self):
+        return list(self.files)
+
+    def _read(self, member):
+        """Inflate one archive member; the archive shares a single file handle"""
+        with self._lock:
+            return self._archive[member]
+
+    def _layer(self, name):
+        """Composed RGBA array for a layer"""
+        array = self._resident.get(name)
+        if array is not None:
+            return array
+        parent = self.layers[name]['parent']
+        if parent is None:
+            array = self._read(f"{name}|image")
+        else:
+            array = apply_blocks(self._layer(parent), self._read(f"{name}|blocks"),
+                                 self._read(f"{name}|pixels"))
+        if name not in self.files:
+            # Threads racing to build a shared layer all end up using the first one stored
+            array = self._resident.setdefault(name, array)
+        return array
+
+    def image(self, name):
+        """Compose one stored file into a QImage"""
+        return _array_image(self._layer(name))
+
+    def resident_bytes(self):
+        return sum(array.nbytes for array in list(self._resident.values()))
+
+    def close(self):
+        self._archive.close()
+
+def _file_signature(path):
+    """(mtime, size) of a file, which changes when it is rewritten; None if it is gone"""
+    try:
+        info = os.stat(path)
+    except OSError:
+        return None
+    return info.st_mtime_ns, info.st_size
+
+class AssetIndex(QObject):
+    """Index of diagram files by (event, umpires), read from the images folder or a bundle.
+
+    Loose diagram files are watched along with their folder, so files
+    added, removed or rewritten in place are reported through
+    assets_changed.
+    """
+    assets_changed = pyqtSignal(list, list, list)  # added, removed and rewritten keys
+
+    def __init__(self, directory, bundle=None, parent=None, layers=None):
+        super().__init__(parent)
+        self.directory = directory
+        self.bundle = bundle
+        self.layers = layers
+        self.assets = {}
+        self._files = {}  # name -> signature; () for packed files
+        self.watcher = QFileSystemWatcher(self)
+        self._scan()
+        if self._loose() and os.path.isdir(directory):
+            self.watcher.addPath(directory)
+        self.watcher.directoryChanged.connect(self._on_directory_changed)
+        self.watcher.fileChanged.connect(self._on_file_changed)
+
+    def _loose(self):
+        return self.bundle is None and self.layers is None
+
+    def _scan(self):
+        """Build the index from the bundle table or one listing of the images folder"""
+        if self.layers is not None:
+            files = dict.fromkeys(self.layers.names(), ())
+        elif self.bundle is not None:
+            files = dict.fromkeys(self.bundle.names(), ())
+        else:
+            files = self._list_directory()
+            if files is None:
+                instruments.warning("Image folder '%s' not found!", self.directory)
+                files = {}
+        self._apply(files)
+
+    def _list_directory(self):
+        """{name: signature} for the images folder, or None if it cannot be listed"""
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return None
+        files = {name: _file_signature(os.path.join(self.directory, name)) for name in names}
+        return {name: signature for name, signature in files.items() if signature is not None}
+
+    def _apply(self, changes):
+        """Fold {name: signature, or None if removed} into the index.
+
+        Only the named files are parsed. Returns (added, removed, rewritten)
+        diagram keys.
+        """
+        added, removed, rewritten = [], [], []
+        watch, unwatch = [], []
+        for name, signature in changes.items():
+            known = name in self._files
+            if signature is None:
+                if not known:
+                    continue
+                del self._files[name]
+            elif self._files.get(name) == signature:
+                continue
+            else:
+                self._files[name] = signature
+            key = self.key_for(name)
+            if key is None:
+                continue
+            path = os.path.join(self.directory, name)
+            if signature is None:
+                if self.assets.pop(key, None) is not None:
+                    removed.append(key)
+                    unwatch.append(path)
+            elif known:
+                rewritten.append(key)
+            else:
+                self.assets[key] = name
+                added.append(key)
+                watch.append(path)
+        if self._loose():
+            if watch:
+                self.watcher.addPaths(watch)
+            if unwatch:
+                self.watcher.removePaths(unwatch)
+        return added, removed, rewritten
+
+    def _report(self, changes):
+        added, removed, rewritten = self._apply(changes)
+        if added or removed or rewritten:
+            self.assets_changed.emit(added, removed, rewritten)
+
+    def _on_directory_changed(self, directory):
+        """Apply the difference between the folder and the index"""
+        files = self._list_directory() or {}
+        changes = dict.fromkeys(self._files.keys() - files.keys())
+        changes.update((name, signature) for name, signature in files.items()
+                       if self._files.get(name) != signature)
+        self._report(changes)
+
+    def _on_file_changed(self, path):
+        """Re-check one diagram written in place or replaced"""
+        signature = _file_signature(path)
+        if signature is not None and path not in self.watcher.files():
+            self.watcher.addPath(path)  # A file replaced by a rename loses its watch
+        self._report({os.path.basename(path): signature})
+
+    @staticmethod
+    def key_for(filename):
+        """Parse a diagram filename such as '4 x 100m Relay6.png' into a key"""
+        match = DIAGRAM_PATTERN.match(filename)
+        if match is None:
+            return None
+        return (match.group('event'), int(match.group('umpires')))
+
+    def has_file(self, filename):
+        return filename in self._files
+
+    def read_file(self, filename):
+        """Decode any indexed file, returning (QImage, error string).
+
+        Safe to call from pool threads.
+        """
+        if self.layers is not None:
+            return self.layers.image(filename), ""
+        if self.bundle is not None:
+            image = QImage.fromData(self.bundle.data(filename))
+            return image, "" if not image.isNull() else f"Cannot decode '{filename}'"
+        reader = QImageReader(os.path.join(self.directory, filename))
+        image = reader.read()
+        return image, reader.errorString()
+
+    def read_image(self, key):
+        """Decode the diagram for an (event, umpires) key"""
+        return self.read_file(self.assets[key])
+
+    def stamp(self, key):
+        """String that changes whenever the file behind key does"""
+        return self.file_stamp(self.assets[key])
+
+    def file_stamp(self, name):
+        """String that changes whenever the named file does"""
+        if self.layers is not None:
+            info = os.stat(self.layers.path)
+            return f"{name}:{info.st_mtime_ns}:{info.st_size}"
+        if self.bundle is not None:
+            info = os.stat(self.bundle.path)
+            return f"{name}:{info.st_mtime_ns}:{self.bundle.entries[name]}"
+        try:
+            info = os.stat(os.path.join(self.directory, name))
+        except OSError:
+            return name
+        return f"{name}:{info.st_mtime_ns}:{info.st_size}"
+
+    def events(self):
+        return sorted({event for event, _ in self.assets}, key=event_sort_key)
+
+    def umpire_counts(self):
+        return sorted({umpires for _, umpires in self.assets})
+
+    def has(self, key):
+        return key in self.assets
+
+def open_asset_index(parent=None, prefer_bundle=None, prefer_layers=None):
+    """Index the bundled assets, preferring packed layers or bundle in frozen builds"""
+    base_path = asset_base_path()
+    directory = os.path.join(base_path, "images")
+    bundle_path = os.path.join(base_path, ASSET_BUNDLE)
+    layers_path = os.path.join(base_path, ASSET_LAYERS)
+    packed = getattr(sys, 'frozen', False) or not os.path.isdir(directory)
+    if prefer_bundle is None:
+        prefer_bundle = packed
+    if prefer_layers is None:
+        prefer_layers = packed
+    if prefer_layers and np is not None and os.path.exists(layers_path):
+        try:
+            return AssetIndex(directory, None, parent, AssetLayers(layers_path))
+        except ValueError as error:
+            instruments.warning("%s; falling back", error)
+    bundle = None
+    if prefer_bundle and os.path.exists(bundle_path):
+        try:
+            bundle = AssetBundle(bundle_path)
+        except (OSError, ValueError) as error:
+            instruments.warning("%s; falling back to loose images", error)
+    return AssetIndex(directory, bundle, parent)
+
+class _DecodeSignals(QObject):
+    """Carries decode results from pool threads back to the GUI thread"""
+    decoded = pyqtSignal(object, QImage, str)  # task, image, error
+
+class DecodeTask(QRunnable):
+    """Read and inflate one diagram into a QImage on a pool thread.
+
+    The loader owns the task and frees it once it reports back, so a task
+    that has already run can still be cancelled safely.
+    """
+    def __init__(self, key, read, signals, priority=DECODE_PRIORITY['current']):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.key = key
+        self.read = read
+        self.signals = signals
+        self.priority = priority
+        self.cancelled = False
+
+    def run(self):
+        image, error = QImage(), ""
+        if not self.cancelled:
+            with instruments.span("decode"):
+                image, error = self.read(self.key)
+        self.signals.decoded.emit(self, image, error)
+
+class DiagramLoader(QObject):
+    """Decodes diagrams off the GUI thread and fills the pixmap cache"""
+    loaded = pyqtSignal(object, QPixmap)
+    failed = pyqtSignal(object, str)
+
+    def __init__(self, cache, source, parent=None):
+        super().__init__(parent)
+        self.cache = cache
+        self.source = source
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(DECODE_THREADS)
+        self._pending = {}
+        self._started = set()
+        self._signals = _DecodeSignals()
+        self._signals.decoded.connect(self._on_decoded)
+
+    def request(self, key, priority=DECODE_PRIORITY['current']):
+        """Queue key for decoding unless it is cached or already queued.
+
+        Asking again at a higher priority moves a queued prefetch ahead of
+        other waiting work.
+        """
+        if key in self.cache:
+            return
+        task = self._pending.get(key)
+        if task is not None:
+            if priority > task.priority and self.pool.tryTake(task):
+                task.priority = priority
+                self.pool.start(task, priority)
+            return
+        if not self.source.has(key):
+            self.failed.emit(key, "no asset")
+            return
+        task = DecodeTask(key, self.source.read_image, self._signals, priority)
+        self._pending[key] = task
+        self._started.add(task)
+        self.pool.start(task, priority)
+
+    def cancel_stale(self, keep=()):
+        """Drop queued work for keys no longer wanted by the current selection"""
+        for key in [k for k in self._pending if k not in keep]:
+            task = self._pending.pop(key)
+            task.cancelled = True
+            if self.pool.tryTake(task):
+                self._started.discard(task)
+
+    def shutdown(self):
+        """Cancel queued work and wait for running decodes to finish"""
+        self.cancel_stale()
+        self.pool.waitForDone()
+
+    def _on_decoded(self, task, image, error):
+        self._started.discard(task)
+        key = task.key
+        if task.cancelled or self._pending.get(key) is not task:
+            return
+        del self._pending[key]
+        if image.isNull():
+            self.failed.emit(key, error)
+            return
+        pixmap = QPixmap.fromImage(image)
+        self.cache.put(key, pixmap)
+        self.loaded.emit(key, pixmap)
+
+class ThumbnailSource:
+    """Gallery thumbnails of DiagramSource diagrams, kept in an on-disk RenderCache.
+
+    Entries are keyed by the diagram key, the source stamp and the pixel
+    size, so edited assets simply miss; stale entries age out of the
+    cache's size-bounded LRU rather than being hunted down. Stamps are only
+    read in read_image, which runs on pool threads.
+    """
+    def __init__(self, source, directory, size=THUMB_SIZE, dpr=1.0, max_bytes=THUMB_DISK_BYTES):
+        self.source = source
+        self.cache = RenderCache(directory, max_bytes)
+        self.size = size
+        self.dpr = dpr
+
+    def has(self, key):
+        return self.source.has(key)
+
+    def _pixels(self):
+        return round(self.size[0] * self.dpr), round(self.size[1] * self.dpr)
+
+    def read_image(self, key):
+        """Load the cached thumbnail for key, making and storing it on a miss"""
+        cache_key = RenderCache.key('thumbnail', key, self.source.stamp(key), self._pixels())
+        data = self.cache.get(cache_key)
+        image = QImage.fromData(data, "PNG") if data is not None else QImage()
+        if image.isNull():
+            full, error = self.source.read_image(key)
+            if full.isNull():
+                return full, error
+            image = full.scaled(*self._pixels(), Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            encoded = QByteArray()
+            buffer = QBuffer(encoded)
+            buffer.open(QIODevice.WriteOnly)
+            if image.save(buffer, "PNG"):
+                self.cache.put(cache_key, bytes(encoded))
+        image.setDevicePixelRatio(self.dpr)
+        return image, ""
+
+def benchmark_asset_sources(runs=20):
+    """Compare startup and first-view latency for loose files and the bundle"""
+    base_path = asset_base_path()
+    bundle_path = os.path.join(base_path, ASSET_BUNDLE)
+    if not os.path.exists(bundle_path):
+        print(f"No bundle at {bundle_path}; run with --pack-assets first")
+        return 1
+    first_key = None
+    for prefer_bundle in (False, True):
+        startup, first_view = [], []
+        for _ in range(runs):
+            started = time.perf_counter()
+            index = open_asset_index(prefer_bundle=prefer_bundle)
+            QPixmap.fromImage(index.read_file(INITIAL_IMAGE)[0])
+            ready = time.perf_counter()
+            first_key = first_key or min(index.assets)
+            QPixmap.fromImage(index.read_image(first_key)[0])
+            shown = time.perf_counter()
+            startup.append(ready - started)
+            first_view.append(shown - ready)
+            if index.bundle is not None:
+                index.bundle.close()
+            index.deleteLater()
+        source = "bundle" if prefer_bundle else "loose"
+        print(f"{source:>6}: startup {sorted(startup)[runs // 2] * 1000:7.2f} ms, "
+              f"first view {sorted(first_view)[runs // 2] * 1000:7.2f} ms (median of {runs})")
+    return 0
+
+def benchmark_asset_layers():
+    """Compare loose PNG loads with composing from the layers file: disk, decode time, memory"""
+    base_path = asset_base_path()
+    directory = os.path.join(base_path, "images")
+    layers_path = os.path.join(base_path, ASSET_LAYERS)
+    if np is None:
+        print("NumPy is not installed")
+        return 1
+    if not os.path.exists(layers_path):
+        print(f"No layers file at {layers_path}; run with --pack-layers first")
+        return 1
+    layers = AssetLayers(layers_path)
+    names = layers.names()
+    results = {}
+    for source in ("loose", "layers"):
+        if source == "layers":
+            layers.close()
+            layers = AssetLayers(layers_path)  # Start with no shared layers resident
+        timings, pixmap_bytes = [], 0
+        for name in names:
+            started = time.perf_counter()
+            if source == "loose":
+                image = QImageReader(os.path.join(directory, name)).read()
+            else:
+                image = layers.image(name)
+            pixmap = QPixmap.fromImage(image)
+            timings.append(time.perf_counter() - started)
+            pixmap_bytes += PixmapCache.pixmap_bytes(pixmap)
+        # Both sources end with the same display pixmaps; layers also keep their shared layers
+        if source == "loose":
+            disk = sum(os.path.getsize(os.path.join(directory, name)) for name in names)
+            resident = pixmap_bytes
+        else:
+            disk = os.path.getsize(layers_path)
+            resident = pixmap_bytes + layers.resident_bytes()
+        results[source] = timings
+        print(f"{source:>6}: disk {disk / 1024:8.0f} KB, decode mean {sum(timings) / len(timings) * 1000:6.2f} ms "
+              f"median {sorted(timings)[len(timings) // 2] * 1000:6.2f} ms, "
+              f"all {len(names)} in memory {resident / 1024:8.0f} KB")
+    exact = sum(np.array_equal(_image_array(QImage(os.path.join(directory, name))),
+                               _image_array(layers.image(name))) for name in names)
+    print(f"{exact}/{len(names)} files reconstructed exactly; "
+          f"layers keep {layers.resident_bytes() / 1024:.0f} KB of shared layers resident")
+    layers.close()
+    return 0 if exact == len(names) else 1
@@ -0,0 +1,1138 @@
+"""Edit canvases: draggable widget items over a label, or a QGraphicsScene"""
+import time
+import contextlib
+from PyQt5.QtWidgets import (
+    QLabel, QLineEdit, QShortcut, QGraphicsScene, QGraphicsView, QGraphicsItem,
+    QGraphicsPathItem, QGraphicsRectItem, QGraphicsProxyWidget, QFrame, QRubberBand
+)
+from PyQt5.QtGui import (
+    QPixmap, QPainter, QPen, QTransform, QColor, QFont, QBitmap, QRegion,
+    QKeySequence, QMouseEvent
+)
+from PyQt5.QtCore import (
+    Qt, QPoint, QEvent, QObject, pyqtSignal, QRectF, QTimer, QSize, QRect
+)
+
+from .common import (
+    LINE_SIZE, LINE_COLOR, LINE_THICKNESS, FONT_SIZES, IMAGE_SIZE, NUMBER_SIZE, TEXT_BOX_SIZE,
+    instruments, peak_memory_kb
+)
+from .renderer import line_path, line_transform
+
+# Constants
+LINE_HIT_WIDTH = 12  # Grab tolerance around a line's stroke
+SELECTION_COLOR = QColor(255, 140, 0)
+SPATIAL_CELL = 64  # Cell size in pixels of the widget canvas spatial index
+TEXT_BOX_MIN_SIZE = (80, 30)
+ITEM_START_POS = (100, 100)
+ITEM_POOL_LIMIT = 64  # Removed items kept per type for reuse
+ROTATION_STEP = 15
+ZOOM_RANGE = (1.0, 8.0)  # Edit canvas zoom limits; 1.0 fits the whole background
+ZOOM_STEP = 1.25  # Zoom factor per wheel notch or keyboard step
+
+class DragStats:
+    """Input-to-present latency and dropped frame counters for one drag"""
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.events = 0
+        self.frames = 0
+        self.dropped = 0
+        self.latencies = []
+
+    def record_frame(self, latency, frame_interval):
+        self.frames += 1
+        self.latencies.append(latency)
+        # Input may wait up to one frame for its present; allow a quarter
+        # frame of timer jitter before counting each further frame as dropped
+        self.dropped += max(0, int(latency / frame_interval - 0.25))
+
+    def summary(self):
+        if not self.latencies:
+            return "Drag: no frames"
+        latencies = sorted(self.latencies)
+        p50 = latencies[len(latencies) // 2] * 1000
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000
+        return (f"Drag: {self.events} moves -> {self.frames} frames, latency p50 {p50:.1f} ms "
+                f"p95 {p95:.1f} ms, {self.dropped} dropped frames")
+
+class EditItemMixin:
+    """Canvas interactions shared by widget and scene Edit items.
+
+    Subclasses set canvas, item_id and _drag_group, which is empty unless
+    the item is being dragged, and implement _discard.
+    """
+    item_type = None
+
+    def _in_group(self):
+        """True when actions on this item apply to a multi-item selection"""
+        return self.canvas is not None and len(self.canvas.group_of(self)) > 1
+
+    def _start_drag(self):
+        """Remember the items a drag moves and their states before it"""
+        self._drag_group = self.canvas.group_of(self) if self.canvas is not None else [self]
+        self._drag_before = [item.state() for item in self._drag_group]
+
+    def _finish_drag(self):
+        """Report the whole dragged group as one edit"""
+        if self.canvas is not None:
+            self.canvas.items_changed(self._drag_group, self._drag_before)
+        self._drag_group = ()
+
+    def _handle_edit_key(self, event):
+        """Backspace deletes and R rotates a selection; True if the key was used"""
+        if event.key() == Qt.Key_Backspace:
+            if self._in_group():
+                self.canvas.delete_selection()
+            elif self.canvas is not None:
+                self.canvas.remove_item(self.item_id)
+            else:
+                self._discard()
+            return True
+        if event.key() == Qt.Key_R and self._in_group():
+            self.canvas.rotate_selection()
+            return True
+        return False
+
+    def _discard(self):
+        """Remove an item that belongs to no canvas"""
+        raise NotImplementedError
+
+    def recycle(self):
+        """Reset interaction state before the item goes back to the free pool"""
+        self._drag_group = ()
+        self.clearFocus()
+
+    def _notify_changed(self, before):
+        if self.canvas is not None:
+            self.canvas.item_changed(self, before)
+
+class DraggableMixin(EditItemMixin):
+    """Mixin class providing draggable functionality.
+
+    Mouse moves are coalesced so the widget moves at most once per display
+    frame, always to the latest pointer position.
+    """
+    snap_grid = 0      # Snap positions to this many pixels when non-zero
+    drag_stats = None  # DragStats instance when drag instrumentation is on
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.canvas = None
+        self.item_id = None
+        self.moving = False
+        self.pending_pos = None
+        self._frame_timer = None
+        self._input_time = None
+        self._present_time = None
+        self._last_frame = 0.0
+        self._drag_group = ()
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        self.setFocusPolicy(Qt.StrongFocus)
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self.setFocus()
+            if self.canvas is not None:
+                if event.modifiers() & Qt.ShiftModifier:
+                    self.canvas.toggle_selected(self)
+                    return
+                self.canvas.press_item(self)
+            self._start_drag()
+            self.moving = True
+            self.offset = event.pos()
+            if self.drag_stats is not None:
+                self.drag_stats.reset()
+
+    def mouseMoveEvent(self, event):
+        if self.moving:
+            new_pos = self.mapToParent(event.pos() - self.offset)
+            if self.pending_pos is None:
+                self._input_time = time.perf_counter()
+                self._schedule_frame()
+            self.pending_pos = new_pos
+            if self.drag_stats is not None:
+                self.drag_stats.events += 1
+
+    def mouseReleaseEvent(self, event):
+        self._apply_pending_move()
+        if self.moving:
+            self._finish_drag()
+        self.moving = False
+        if self.drag_stats is not None and self.drag_stats.events:
+            instruments.info("%s", self.drag_stats.summary())
+
+    def keyPressEvent(self, event):
+        self._handle_edit_key(event)
+
+    def _discard(self):
+        self.close()
+
+    def moveEvent(self, event):
+        super().moveEvent(event)
+        if self.canvas is not None:
+            self.canvas.item_moved(self)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self.canvas is not None:
+            self.canvas.item_moved(self)
+
+    def state(self):
+        """Plain dict describing this item for scene documents"""
+        return {'id': self.item_id, 'type': self.item_type, 'x': self.x(), 'y': self.y()}
+
+    def apply_state(self, state):
+        self.move(state['x'], state['y'])
+
+    def recycle(self):
+        super().recycle()
+        self.moving = False
+        self.pending_pos = None
+
+    def event(self, event):
+        handled = super().event(event)
+        if event.type() == QEvent.Paint and self._present_time is not None:
+            self.drag_stats.record_frame(
+                time.perf_counter() - self._present_time, self._frame_interval()
+            )
+            self._present_time = None
+        return handled
+
+    def _frame_interval(self):
+        screen = self.window().windowHandle().screen() if self.window().windowHandle() else None
+        refresh_rate = screen.refreshRate() if screen is not None else 0
+        return 1.0 / (refresh_rate or 60.0)
+
+    def _schedule_frame(self):
+        """Apply the move now if a frame has passed, otherwise at the next frame"""
+        if self._frame_timer is None:
+            self._frame_timer = QTimer(self)
+            self._frame_timer.setSingleShot(True)
+            self._frame_timer.setTimerType(Qt.PreciseTimer)
+            self._frame_timer.timeout.connect(self._apply_pending_move)
+        remaining = self._frame_interval() - (time.perf_counter() - self._last_frame)
+        self._frame_timer.start(max(0, int(remaining * 1000)))
+
+    def _apply_pending_move(self):
+        if self.pending_pos is None:
+            return
+        pos, self.pending_pos = self.pending_pos, None
+        if self.snap_grid:
+            grid = self.snap_grid
+            pos = QPoint(round(pos.x() / grid) * grid, round(pos.y() / grid) * grid)
+        self._last_frame = time.perf_counter()
+        if self.drag_stats is not None and pos != self.pos():
+            self._present_time = self._input_time
+        delta = pos - self.pos()
+        for item in self._drag_group:
+            if item is not self:
+                item.move(item.pos() + delta)
+        self.move(pos)
+
+class DraggableLabel(DraggableMixin, QLabel):
+    """Draggable number label with deletion support"""
+    item_type = "number"
+
+    def __init__(self, text, parent=None):
+        super().__init__(parent)
+        self.setText(text)
+        self.setObjectName("numberItem")
+        self.setFixedSize(*NUMBER_SIZE)
+        self.setAlignment(Qt.AlignCenter)
+
+    def state(self):
+        return {**super().state(), 'text': self.text()}
+
+    def apply_state(self, state):
+        super().apply_state(state)
+        self.setText(state['text'])
+
+class ResizableTextLabel(DraggableMixin, QLabel):
+    """Resizable and editable text label with drag support"""
+    item_type = "text"
+
+    def __init__(self, text, parent=None):
+        super().__init__(parent)
+        self.setText(text)
+        self.setObjectName("textItem")
+        self.setMinimumSize(80, 30)
+        self.resize(120, 30)
+        self.setAlignment(Qt.AlignCenter)
+        self.resizing = False
+        self.editor = None
+        
+        # Add resize handle
+        self.resize_handle = QLabel(self)
+        self.resize_handle.setObjectName("resizeHandle")
+        self.resize_handle.setFixedSize(8, 8)
+        self.resize_handle.move(self.width()-8, self.height()-8)
+        self.resize_handle.installEventFilter(self)
+        self.resize_handle.setCursor(Qt.SizeFDiagCursor)
+
+    def eventFilter(self, obj, event):
+        if obj == self.resize_handle:
+            if event.type() == QEvent.MouseButtonPress:
+                self.resizing = True
+                self._resize_before = self.state()
+                self.initial_size = self.size()
+                # Widget coordinates, so the drag follows the pointer when the canvas is zoomed
+                self.initial_mouse_pos = obj.mapTo(self, event.pos())
+                return True
+            elif event.type() == QEvent.MouseMove and self.resizing:
+                current_mouse_pos = obj.mapTo(self, event.pos())
+                delta_x = current_mouse_pos.x() - self.initial_mouse_pos.x()
+                delta_y = current_mouse_pos.y() - self.initial_mouse_pos.y()
+                
+                # Calculate new size based on initial dimensions
+                new_width = max(self.minimumWidth(), self.initial_size.width() + delta_x)
+                new_height = max(self.minimumHeight(), self.initial_size.height() + delta_y)
+                
+                # Apply new size
+                self.resize(new_width, new_height)
+                return True
+            elif event.type() == QEvent.MouseButtonRelease:
+                if self.resizing:
+                    self._notify_changed(self._resize_before)
+                self.resizing = False
+                return True
+        return super().eventFilter(obj, event)
+
+    def resizeEvent(self, event):
+        self.resize_handle.move(self.width()-8, self.height()-8)
+        super().resizeEvent(event)
+
+    def state(self):
+        return {**super().state(), 'w': self.width(), 'h': self.height(), 'text': self.text()}
+
+    def apply_state(self, state):
+        super().apply_state(state)
+        self.resize(state.get('w', TEXT_BOX_SIZE[0]), state.get('h', TEXT_BOX_SIZE[1]))
+        self.setText(state['text'])
+
+    def recycle(self):
+        super().recycle()
+        self.resizing = False
+        if self.editor is not None:
+            self.editor.blockSignals(True)
+            self.editor.deleteLater()
+            self.editor = None
+
+    def mouseDoubleClickEvent(self, event):
+        self.start_editing()
+
+    def start_editing(self):
+        """Replace label with editable line edit"""
+        self.editor = QLineEdit(self.text(), self)
+        self.editor.setObjectName("textEditor")
+        self.editor.setGeometry(2, 2, self.width()-4, self.height()-4)
+        self.editor.selectAll()
+        self.editor.setFocus()
+        self.editor.show()
+        self.editor.editingFinished.connect(self.finish_editing)
+
+    def finish_editing(self):
+        """Update label text from editor"""
+        before = self.state()
+        self.setText(self.editor.text())
+        self.editor.deleteLater()
+        self.editor = None
+        self.update()
+        self._notify_changed(before)
+
+class LineSprites:
+    """Pre-rendered line pixmaps and hit regions shared by every DraggableLine"""
+    sprites = {}
+    regions = {}
+
+    @classmethod
+    def sprite(cls, line_type, angle, size, dpr, color=LINE_COLOR):
+        """Return the rendered line for (type, angle, size, DPR, color), drawing it once"""
+        key = (line_type, angle, size, dpr, color.rgba())
+        pixmap = cls.sprites.get(key)
+        if pixmap is None:
+            width, height = size
+            pixmap = QPixmap(round(width * dpr), round(height * dpr))
+            pixmap.setDevicePixelRatio(dpr)
+            pixmap.fill(Qt.transparent)
+            painter = QPainter(pixmap)
+            painter.setRenderHint(QPainter.Antialiasing)
+            painter.setTransform(line_transform(angle, width, height))
+            painter.setPen(QPen(color, LINE_THICKNESS))
+            painter.drawPath(line_path(line_type, width, height))
+            painter.end()
+            cls.sprites[key] = pixmap
+        return pixmap
+
+    @classmethod
+    def region(cls, line_type, angle, size):
+        """Return the widget-local footprint that should take input and repaints"""
+        key = (line_type, angle, size)
+        region = cls.regions.get(key)
+        if region is None:
+            width, height = size
+            bitmap = QBitmap(width, height)
+            bitmap.fill(Qt.color0)
+            painter = QPainter(bitmap)
+            painter.setTransform(line_transform(angle, width, height))
+            painter.setPen(QPen(Qt.color1, LINE_HIT_WIDTH, Qt.SolidLine, Qt.RoundCap))
+            painter.drawPath(line_path(line_type, width, height))
+            painter.end()
+            region = cls.regions[key] = QRegion(bitmap)
+        return region
+
+class DraggableLine(DraggableMixin, QLabel):
+    """Draggable, rotatable line widget with styling"""
+    def __init__(self, line_type, parent=None):
+        super().__init__(parent)
+        self.line_type = self.item_type = line_type
+        self.angle = 0
+        self.setFixedSize(*LINE_SIZE)
+        self.setObjectName("lineItem")
+        self._update_footprint()
+
+    def _update_footprint(self):
+        """Limit input and repaints to the rotated line's real footprint"""
+        self.setMask(LineSprites.region(self.line_type, self.angle, LINE_SIZE))
+
+    def paintEvent(self, event):
+        with instruments.span("paint.line"):
+            painter = QPainter(self)
+            color = SELECTION_COLOR if self.property("selected") else LINE_COLOR
+            if painter.deviceTransform().m11() > self.devicePixelRatioF():
+                # Zoomed in: a sprite would be stretched, so stroke the path at this scale
+                painter.setRenderHint(QPainter.Antialiasing)
+                painter.setTransform(line_transform(self.angle, *LINE_SIZE), True)
+                painter.setPen(QPen(color, LINE_THICKNESS))
+                painter.drawPath(line_path(self.line_type, *LINE_SIZE))
+            else:
+                painter.drawPixmap(0, 0, LineSprites.sprite(
+                    self.line_type, self.angle, LINE_SIZE, self.devicePixelRatioF(), color
+                ))
+            painter.end()
+
+    def keyPressEvent(self, event):
+        super().keyPressEvent(event)
+        if event.key() == Qt.Key_R and not self._in_group():
+            before = self.state()
+            self.angle = (self.angle + ROTATION_STEP) % 360
+            self._update_footprint()
+            self.update()
+            self._notify_changed(before)
+
+    def state(self):
+        return {**super().state(), 'angle': self.angle}
+
+    def apply_state(self, state):
+        super().apply_state(state)
+        self.angle = state.get('angle', 0)
+        self._update_footprint()
+        self.update()
+
+def _state_size(state):
+    """Unrotated width and height of an item described by a state dict"""
+    if state['type'] == "number":
+        return NUMBER_SIZE
+    if state['type'] == "text":
+        return state.get('w', TEXT_BOX_SIZE[0]), state.get('h', TEXT_BOX_SIZE[1])
+    return LINE_SIZE
+
+class SpatialGrid:
+    """Uniform grid over item bounds so area queries only visit nearby items"""
+    def __init__(self, cell=SPATIAL_CELL):
+        self.cell = cell
+        self.cells = {}
+        self.bounds = {}
+
+    def _cells(self, rect):
+        cell = self.cell
+        for column in range(rect.left() // cell, rect.right() // cell + 1):
+            for row in range(rect.top() // cell, rect.bottom() // cell + 1):
+                yield column, row
+
+    def insert(self, key, rect):
+        """Index key under rect, replacing any previous bounds"""
+        self.remove(key)
+        self.bounds[key] = QRect(rect)
+        for cell in self._cells(rect):
+            self.cells.setdefault(cell, set()).add(key)
+
+    def remove(self, key):
+        rect = self.bounds.pop(key, None)
+        if rect is None:
+            return
+        for cell in self._cells(rect):
+            keys = self.cells[cell]
+            keys.discard(key)
+            if not keys:
+                del self.cells[cell]
+
+    def query(self, rect):
+        """Keys whose bounds intersect rect"""
+        candidates = set()
+        for cell in self._cells(rect):
+            candidates.update(self.cells.get(cell, ()))
+        return [key for key in candidates if self.bounds[key].intersects(rect)]
+
+class ItemRegistry:
+    """Every Edit item over its lifetime: live items by id and free pools by type.
+
+    Removed items are detached and pooled, up to ITEM_POOL_LIMIT per type,
+    so the next add of that type reuses an already built and styled object
+    instead of allocating a new one.
+    """
+    def __init__(self, limit=ITEM_POOL_LIMIT):
+        self.limit = limit
+        self.live = {}
+        self.pools = {}
+        self.created = 0
+        self.reused = 0
+        self.destroyed = 0
+
+    def acquire(self, kind, factory):
+        """A pooled item of this type, or a new one from factory()"""
+        pool = self.pools.get(kind)
+        if pool:
+            self.reused += 1
+            return pool.pop()
+        self.created += 1
+        return factory()
+
+    def register(self, item):
+        self.live[item.item_id] = item
+
+    def release(self, item_id):
+        """Drop a live item; returns (item, pooled) where pooled is False if it must be destroyed"""
+        item = self.live.pop(item_id)
+        pool = self.pools.setdefault(item.item_type, [])
+        if len(pool) >= self.limit:
+            self.destroyed += 1
+            return item, False
+        item.recycle()
+        item.canvas = None
+        item.item_id = None
+        pool.append(item)
+        return item, True
+
+    def counts(self):
+        """{type: (live, pooled)}"""
+        counts = {kind: [0, len(pool)] for kind, pool in self.pools.items()}
+        for item in self.live.values():
+            counts.setdefault(item.item_type, [0, 0])[0] += 1
+        return {kind: tuple(count) for kind, count in sorted(counts.items())}
+
+    def report(self):
+        """Multi-line summary of item counts, pool reuse and process memory"""
+        lines = [f"{kind:>10}: {live} live, {pooled} pooled" for kind, (live, pooled) in self.counts().items()]
+        lines.append(f"{'total':>10}: {len(self.live)} live, {sum(map(len, self.pools.values()))} pooled, "
+                     f"{self.created} created, {self.reused} reused, {self.destroyed} destroyed")
+        memory = peak_memory_kb()
+        if memory is not None:
+            lines.append(f"{'memory':>10}: {memory} KB peak resident")
+        return "\n".join(lines)
+
+class EditCanvasMixin:
+    """Item bookkeeping, selection and change notification shared by both Edit canvases.
+
+    Canvases emit changed(before, after) with item state dicts; before is
+    None for additions and after is None for deletions. Changes made inside
+    batch() share a batch_id so listeners can treat them as one edit.
+    Items live in an ItemRegistry; items is its id -> item mapping.
+    """
+    def _init_canvas(self):
+        self.registry = ItemRegistry()
+        self.items = self.registry.live
+        self._next_id = 1
+        self.batch_id = None
+        self._batch_count = 0
+
+    @contextlib.contextmanager
+    def batch(self):
+        """Group changes into one undoable edit and one repaint"""
+        if self.batch_id is not None:
+            yield
+            return
+        self._batch_count += 1
+        self.batch_id = self._batch_count
+        self._begin_batch()
+        try:
+            yield
+        finally:
+            self.batch_id = None
+            self._end_batch()
+
+    def _begin_batch(self):
+        pass
+
+    def _end_batch(self):
+        pass
+
+    def item_moved(self, item):
+        """Called when an item's geometry changes"""
+
+    def shutdown(self):
+        """Stop background work before the window closes"""
+
+    def _forget(self, item):
+        """Drop per-item bookkeeping for an item leaving the canvas"""
+
+    def group_of(self, item):
+        """Items an action on item applies to: the whole selection if item is in it"""
+        selected = self.selected_items()
+        return selected if item in selected else [item]
+
+    def press_item(self, item):
+        """Select item alone unless it is already part of the selection"""
+        if item not in self.selected_items():
+            self.set_selected([item])
+
+    def toggle_selected(self, item):
+        selected = self.selected_items()
+        if item in selected:
+            selected.remove(item)
+        else:
+            selected.append(item)
+        self.set_selected(selected)
+
+    def items_changed(self, items, befores):
+        """Report edits to several items as one batch"""
+        with self.batch():
+            for item, before in zip(items, befores):
+                self.item_changed(item, before)
+
+    def delete_selection(self):
+        with self.batch():
+            # Newest first, so undo recreates items in their original stacking order
+            for item in reversed(self.selected_items()):
+                self.remove_item(item.item_id)
+
+    def rotate_selection(self, step=ROTATION_STEP):
+        """Turn the selection about its common centre; lines also turn in place"""
+        states = [item.state() for item in self.selected_items()]
+        if not states:
+            return
+        rects = [QRectF(state['x'], state['y'], *_state_size(state)) for state in states]
+        bounds = rects[0]
+        for rect in rects[1:]:
+            bounds = bounds.united(rect)
+        center = bounds.center()
+        turn = QTransform().translate(center.x(), center.y()).rotate(step).translate(-center.x(), -center.y())
+        with self.batch():
+            for state, rect in zip(states, rects):
+                moved = turn.map(rect.center())
+                changes = {'x': round(moved.x() - rect.width() / 2), 'y': round(moved.y() - rect.height() / 2)}
+                if 'angle' in state:
+                    changes['angle'] = (state['angle'] + step) % 360
+                self.update_item(state['id'], changes)
+
+    def create_item(self, state, notify=True):
+        """Create an item from a state dict, as stored in scene documents"""
+        state = {'x': ITEM_START_POS[0], 'y': ITEM_START_POS[1], **state}
+        item = self.registry.acquire(state['type'], lambda: self._construct(state))
+        item.canvas = self
+        item.item_id = state.get('id') or self._next_id
+        self._next_id = max(self._next_id, item.item_id + 1)
+        self.registry.register(item)
+        item.apply_state(state)
+        self._show(item)
+        if notify:
+            self.changed.emit(None, item.state())
+        return item
+
+    def add_number(self, text):
+        return self.create_item({'type': "number", 'text': text})
+
+    def add_line(self, line_type):
+        return self.create_item({'type': line_type})
+
+    def add_text_box(self, text):
+        return self.create_item({'type': "text", 'text': text})
+
+    def item_changed(self, item, before):
+        after = item.state()
+        if after != before:
+            self.changed.emit(before, after)
+
+    def update_item(self, item_id, changes, notify=True):
+        """Apply some state fields to an existing item"""
+        item = self.items[item_id]
+        before = item.state()
+        item.apply_state({**before, **changes})
+        if notify:
+            self.item_changed(item, before)
+
+    def remove_item(self, item_id, notify=True):
+        item = self.items[item_id]
+        state = item.state()
+        self._forget(item)
+        item, pooled = self.registry.release(item_id)
+        self._detach(item)
+        if not pooled:
+            self._destroy(item)
+        if notify:
+            self.changed.emit(state, None)
+
+    def states(self):
+        return [item.state() for item in self.items.values()]
+
+    def load_states(self, states):
+        """Replace every item with the given states without notifying"""
+        with self.batch():
+            for item_id in list(self.items):
+                self.remove_item(item_id, notify=False)
+            self._next_id = 1
+            for state in states:
+                self.create_item(state, notify=False)
+
+class WidgetCanvas(EditCanvasMixin, QObject):
+    """Edit canvas made of draggable child widgets on the background label.
+
+    A SpatialGrid over item geometry answers rubber-band selection queries.
+    """
+    changed = pyqtSignal(object, object)
+
+    def __init__(self, label):
+        super().__init__(label)
+        self.label = label
+        self.index = SpatialGrid()
+        self.selection = set()
+        self.rubber_band = QRubberBand(QRubberBand.Rectangle, label)
+        self._band_origin = None
+        label.installEventFilter(self)
+        self._init_canvas()
+
+    def eventFilter(self, obj, event):
+        """Rubber-band selection by dragging on the empty background"""
+        if obj is self.label:
+            if event.type() == QEvent.MouseButtonPress and event.button() == Qt.LeftButton:
+                self._band_origin = event.pos()
+                self.rubber_band.setGeometry(QRect(self._band_origin, QSize()))
+                self.rubber_band.show()
+            elif event.type() == QEvent.MouseMove and self._band_origin is not None:
+                self.rubber_band.setGeometry(QRect(self._band_origin, event.pos()).normalized())
+            elif event.type() == QEvent.MouseButtonRelease and self._band_origin is not None:
+                rect = QRect(self._band_origin, event.pos()).normalized()
+                self._band_origin = None
+                self.rubber_band.hide()
+                self.set_selected(self.items_in(rect), add=bool(event.modifiers() & Qt.ShiftModifier))
+        return False
+
+    def items_in(self, rect):
+        """Items whose footprint meets rect, found through the spatial index"""
+        found = []
+        for item_id in sorted(self.index.query(rect)):
+            item = self.items[item_id]
+            mask = item.mask()
+            if mask.isEmpty() or mask.translated(item.pos()).intersects(rect):
+                found.append(item)
+        return found
+
+    def selected_items(self):
+        return [self.items[item_id] for item_id in sorted(self.selection)]
+
+    def set_selected(self, items, add=False):
+        chosen = {item.item_id for item in items}
+        if add:
+            chosen |= self.selection
+        for item_id in self.selection ^ chosen:
+            self._mark_selected(self.items[item_id], item_id in chosen)
+        self.selection = chosen
+
+    def _mark_selected(self, item, selected):
+        item.setProperty("selected", selected)
+        if isinstance(item, DraggableLine):
+            item.update()
+        else:
+            item.style().unpolish(item)
+            item.style().polish(item)
+
+    def item_moved(self, item):
+        if item.item_id in self.items:
+            self.index.insert(item.item_id, item.geometry())
+
+    def _forget(self, item):
+        self.index.remove(item.item_id)
+        if item.item_id in self.selection:
+            self.selection.discard(item.item_id)
+            self._mark_selected(item, False)
+
+    def _begin_batch(self):
+        self.label.setUpdatesEnabled(False)
+
+    def _end_batch(self):
+        self.label.setUpdatesEnabled(True)
+
+    def _construct(self, state):
+        if state['type'] == "number":
+            return DraggableLabel(state['text'], self.label)
+        if state['type'] == "text":
+            return ResizableTextLabel(state['text'], self.label)
+        return DraggableLine(state['type'], self.label)
+
+    def _show(self, item):
+        item.show()
+        self.item_moved(item)
+
+    def _detach(self, item):
+        item.hide()
+
+    def _destroy(self, item):
+        item.close()
+
+class SceneItemMixin(EditItemMixin):
+    """Mixin giving scene canvas items the widget canvas interactions"""
+    def _init_scene_item(self):
+        self.canvas = None
+        self.item_id = None
+        self._drag_group = ()
+        self.setFlags(
+            QGraphicsItem.ItemIsMovable
+            | QGraphicsItem.ItemIsFocusable
+            | QGraphicsItem.ItemIsSelectable
+        )
+        self.setPos(*ITEM_START_POS)
+
+    def mousePressEvent(self, event):
+        self.setFocus()
+        if event.modifiers() & Qt.ShiftModifier:
+            # Shift-click only toggles selection; the item is not dragged
+            self.setSelected(not self.isSelected())
+            self._drag_group = ()
+            return
+        super().mousePressEvent(event)
+        self._start_drag()
+
+    def mouseMoveEvent(self, event):
+        if self._drag_group:
+            super().mouseMoveEvent(event)
+
+    def mouseReleaseEvent(self, event):
+        if not self._drag_group:
+            return
+        super().mouseReleaseEvent(event)
+        self._finish_drag()
+
+    def keyPressEvent(self, event):
+        if not self._handle_edit_key(event):
+            super().keyPressEvent(event)
+
+    def _discard(self):
+        self.scene().removeItem(self)
+
+    def _paint_selection(self, painter, rect):
+        if self.isSelected():
+            painter.setPen(QPen(SELECTION_COLOR, 1, Qt.DashLine))
+            painter.setBrush(Qt.NoBrush)
+            painter.drawRect(rect)
+
+    def state(self):
+        """Plain dict describing this item for scene documents"""
+        return {'id': self.item_id, 'type': self.item_type, 'x': round(self.x()), 'y': round(self.y())}
+
+    def apply_state(self, state):
+        self.setPos(state['x'], state['y'])
+
+    def recycle(self):
+        super().recycle()
+        self.setSelected(False)
+
+class NumberItem(SceneItemMixin, QGraphicsItem):
+    """Scene canvas counterpart of DraggableLabel"""
+    item_type = "number"
+
+    def __init__(self, text):
+        super().__init__()
+        self.text = text
+        self._init_scene_item()
+        self.font = QFont()
+        self.font.setPixelSize(FONT_SIZES['label'])
+        self.font.setBold(True)
+
+    def boundingRect(self):
+        return QRectF(0, 0, *NUMBER_SIZE)
+
+    def paint(self, painter, option, widget=None):
+        painter.setFont(self.font)
+        painter.setPen(Qt.black)
+        painter.drawText(self.boundingRect(), Qt.AlignCenter, self.text)
+        self._paint_selection(painter, self.boundingRect().adjusted(0, 0, -1, -1))
+
+    def state(self):
+        return {**super().state(), 'text': self.text}
+
+    def apply_state(self, state):
+        super().apply_state(state)
+        self.text = state['text']
+        self.update()
+
+class LineItem(SceneItemMixin, QGraphicsPathItem):
+    """Scene canvas counterpart of DraggableLine; R rotates"""
+    def __init__(self, line_type):
+        super().__init__()
+        self.line_type = self.item_type = line_type
+        self._init_scene_item()
+        width, height = LINE_SIZE
+        self.setPath(line_path(line_type, width, height))
+        self.setPen(QPen(LINE_COLOR, LINE_THICKNESS))
+        self.setTransformOriginPoint(width / 2, height / 2)
+
+    def keyPressEvent(self, event):
+        super().keyPressEvent(event)
+        if event.key() == Qt.Key_R and not self._in_group():
+            before = self.state()
+            self.setRotation((self.rotation() + ROTATION_STEP) % 360)
+            self._notify_changed(before)
+
+    def state(self):
+        return {**super().state(), 'angle': round(self.rotation())}
+
+    def apply_state(self, state):
+        super().apply_state(state)
+        self.setRotation(state.get('angle', 0))
+
+class _ResizeHandle(QGraphicsRectItem):
+    """Bottom-right grip that resizes its TextBoxItem"""
+    def __init__(self, parent):
+        super().__init__(0, 0, 8, 8, parent)
+        self.setBrush(QColor("#666"))
+        self.setPen(QPen(Qt.NoPen))
+        self.setCursor(Qt.SizeFDiagCursor)
+
+    def mousePressEvent(self, event):
+        self.initial_size = self.parentItem().rect().size()
+        self.initial_mouse_pos = event.scenePos()
+        self._resize_before = self.parentItem().state()
+
+    def mouseReleaseEvent(self, event):
+        self.parentItem()._notify_changed(self._resize_before)
+
+    def mouseMoveEvent(self, event):
+        delta = event.scenePos() - self.initial_mouse_pos
+        self.parentItem().resize(
+            self.initial_size.width() + delta.x(), self.initial_size.height() + delta.y()
+        )
+
+class TextBoxItem(SceneItemMixin, QGraphicsRectItem):
+    """Scene canvas counterpart of ResizableTextLabel"""
+    item_type = "text"
+
+    def __init__(self, text):
+        super().__init__()
+        self.text = text
+        self.editor = None
+        self._init_scene_item()
+        self.setBrush(Qt.white)
+        self.setPen(QPen(Qt.black, 1))
+        self.font = QFont()
+        self.font.setPixelSize(FONT_SIZES['text_box'])
+        self.resize_handle = _ResizeHandle(self)
+        self.resize(*TEXT_BOX_SIZE)
+
+    def resize(self, width, height):
+        width = max(TEXT_BOX_MIN_SIZE[0], width)
+        height = max(TEXT_BOX_MIN_SIZE[1], height)
+        self.setRect(0, 0, width, height)
+        self.resize_handle.setPos(width - 8, height - 8)
+
+    def state(self):
+        rect = self.rect()
+        return {**super().state(), 'w': round(rect.width()), 'h': round(rect.height()), 'text': self.text}
+
+    def apply_state(self, state):
+        super().apply_state(state)
+        self.resize(state.get('w', TEXT_BOX_SIZE[0]), state.get('h', TEXT_BOX_SIZE[1]))
+        self.text = state['text']
+        self.update()
+
+    def paint(self, painter, option, widget=None):
+        painter.setPen(self.pen())
+        painter.setBrush(self.brush())
+        painter.drawRect(self.rect())
+        painter.setFont(self.font)
+        painter.drawText(self.rect(), Qt.AlignCenter, self.text)
+        self._paint_selection(painter, self.rect())
+
+    def recycle(self):
+        super().recycle()
+        if self.editor is not None:
+            self.editor.widget().blockSignals(True)
+            self.editor.deleteLater()
+            self.editor = None
+
+    def mouseDoubleClickEvent(self, event):
+        self.start_editing()
+
+    def start_editing(self):
+        """Overlay an editable line edit on the box"""
+        line_edit = QLineEdit(self.text)
+        line_edit.setStyleSheet(f"border: 2px solid blue; font-size: {FONT_SIZES['text_box']}px; background: white;")
+        self.editor = QGraphicsProxyWidget(self)
+        self.editor.setWidget(line_edit)
+        self.editor.setGeometry(QRectF(2, 2, self.rect().width() - 4, self.rect().height() - 4))
+        line_edit.selectAll()
+        self.editor.setFocus()
+        line_edit.setFocus()
+        line_edit.editingFinished.connect(self.finish_editing)
+
+    def finish_editing(self):
+        """Update box text from the editor"""
+        if self.editor is None:
+            return
+        before = self.state()
+        self.text = self.editor.widget().text()
+        editor, self.editor = self.editor, None
+        editor.deleteLater()
+        self.update()
+        self._notify_changed(before)
+
+class ZoomMixin:
+    """Wheel, Ctrl+=/Ctrl+-/Ctrl+0 zoom and middle-button panning for a QGraphicsView.
+
+    At zoom 1.0 the view shows its whole scene; scroll bars stay hidden.
+    """
+    def _init_zoom(self):
+        self._pan_origin = None
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        zoom_in = lambda: self.zoom_by(ZOOM_STEP, QGraphicsView.AnchorViewCenter)
+        # The platform ZoomIn binding is often Ctrl++, which needs Shift on most layouts
+        for sequence, handler in ((QKeySequence.ZoomIn, zoom_in), (QKeySequence("Ctrl+="), zoom_in),
+                                  (QKeySequence.ZoomOut, lambda: self.zoom_by(1 / ZOOM_STEP, QGraphicsView.AnchorViewCenter)),
+                                  (QKeySequence("Ctrl+0"), self.reset_zoom)):
+            shortcut = QShortcut(sequence, self, handler)
+            shortcut.setContext(Qt.WidgetWithChildrenShortcut)
+
+    def zoom(self):
+        return self.transform().m11()
+
+    def zoom_by(self, factor, anchor=QGraphicsView.AnchorUnderMouse):
+        """Scale the view by factor within ZOOM_RANGE, keeping the anchor point fixed"""
+        zoom = min(max(self.zoom() * factor, ZOOM_RANGE[0]), ZOOM_RANGE[1])
+        if zoom == self.zoom():
+            return
+        self.setTransformationAnchor(anchor)
+        self.setTransform(QTransform.fromScale(zoom, zoom))
+
+    def reset_zoom(self):
+        self.setTransform(QTransform())
+
+    def wheelEvent(self, event):
+        self.zoom_by(ZOOM_STEP ** (event.angleDelta().y() / 120))
+        event.accept()
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MiddleButton:
+            self._pan_origin = event.pos()
+            self.viewport().setCursor(Qt.ClosedHandCursor)
+            return
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        if self._pan_origin is not None:
+            delta = event.pos() - self._pan_origin
+            self._pan_origin = event.pos()
+            self.horizontalScrollBar().setValue(self.horizontalScrollBar().value() - delta.x())
+            self.verticalScrollBar().setValue(self.verticalScrollBar().value() - delta.y())
+            return
+        super().mouseMoveEvent(event)
+
+    def mouseReleaseEvent(self, event):
+        if self._pan_origin is not None and event.button() == Qt.MiddleButton:
+            self._pan_origin = None
+            self.viewport().unsetCursor()
+            return
+        super().mouseReleaseEvent(event)
+
+class WidgetCanvasView(ZoomMixin, QGraphicsView):
+    """Zoomable view of the widget canvas label, hosted in a QGraphicsProxyWidget.
+
+    An embedded widget is a window of its own and does not inherit the main
+    window's style sheet, so the label is given style_sheet directly.
+    """
+    def __init__(self, label, style_sheet="", parent=None):
+        scene = QGraphicsScene(0, 0, *IMAGE_SIZE)
+        super().__init__(scene, parent)
+        scene.setParent(self)
+        label.setStyleSheet(style_sheet)
+        label.resize(*IMAGE_SIZE)
+        self.proxy = scene.addWidget(label)
+        self.setFixedSize(*IMAGE_SIZE)
+        self.setFrameShape(QFrame.NoFrame)
+        self._init_zoom()
+
+class SceneCanvas(EditCanvasMixin, ZoomMixin, QGraphicsView):
+    """Edit canvas built on a BSP-indexed QGraphicsScene of lightweight items.
+
+    Zoomed in, the background is drawn straight from the source pixmap with
+    smooth filtering; items are painted as vectors, so they stay sharp.
+    """
+    changed = pyqtSignal(object, object)
+
+    def __init__(self, parent=None):
+        self.edit_scene = QGraphicsScene(0, 0, *IMAGE_SIZE)
+        self.edit_scene.setItemIndexMethod(QGraphicsScene.BspTreeIndex)
+        super().__init__(self.edit_scene, parent)
+        self.edit_scene.setParent(self)
+        self.source_background = QPixmap()
+        self.background = QPixmap()
+        self.setFixedSize(*IMAGE_SIZE)
+        self.setFrameShape(QFrame.NoFrame)
+        self.setRenderHint(QPainter.Antialiasing)
+        self.setViewportUpdateMode(QGraphicsView.MinimalViewportUpdate)
+        self.setCacheMode(QGraphicsView.CacheBackground)
+        self.setDragMode(QGraphicsView.RubberBandDrag)
+        self._init_zoom()
+        self._init_canvas()
+
+    def mousePressEvent(self, event):
+        if event.modifiers() & Qt.ShiftModifier and self.itemAt(event.pos()) is None:
+            # Qt adds rubber-band selections to the current one under Ctrl
+            event = QMouseEvent(event.type(), event.localPos(), event.windowPos(), event.screenPos(),
+                                event.button(), event.buttons(), event.modifiers() | Qt.ControlModifier)
+        super().mousePressEvent(event)
+
+    def selected_items(self):
+        """Selected items, found through the scene's BSP index"""
+        selected = [item for item in self.edit_scene.selectedItems() if item.item_id in self.items]
+        return sorted(selected, key=lambda item: item.item_id)
+
+    def set_selected(self, items, add=False):
+        if not add:
+            self.edit_scene.clearSelection()
+        for item in items:
+            item.setSelected(True)
+
+    def set_background(self, pixmap):
+        self.source_background = pixmap
+        self.background = pixmap.scaled(*IMAGE_SIZE, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+        self.resetCachedContent()
+        self.viewport().update()
+
+    def drawBackground(self, painter, rect):
+        painter.fillRect(rect, self.palette().window())
+        if self.background.isNull():
+            return
+        if self.zoom() * self.devicePixelRatioF() <= 1.0:
+            painter.drawPixmap(rect, self.background, rect)
+            return
+        # One smooth resample from the source; the 1:1 copy would be stretched a second time
+        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+        painter.drawPixmap(self.sceneRect(), self.source_background, QRectF(self.source_background.rect()))
+
+    def _construct(self, state):
+        if state['type'] == "number":
+            return NumberItem(state['text'])
+        if state['type'] == "text":
+            return TextBoxItem(state['text'])
+        return LineItem(state['type'])
+
+    def _show(self, item):
+        self.edit_scene.addItem(item)
+
+    def _detach(self, item):
+        self.edit_scene.removeItem(item)
+
+    def _destroy(self, item):
+        # Once out of the scene the item is owned by Python and freed with its last reference
+        pass
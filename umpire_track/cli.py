@@ -0,0 +1,237 @@
+"""Headless batch rendering and forwarding launches to a running instance"""
+import os
+import time
+import json
+import multiprocessing
+from PyQt5.QtGui import QGuiApplication
+from PyQt5.QtCore import QObject
+from PyQt5.QtNetwork import QLocalServer, QLocalSocket
+
+from .common import INITIAL_IMAGE, SCREEN_DPI, instruments
+from .assets import RenderCache, open_render_cache, open_asset_index
+from .renderer import DIAGRAM_CANVAS, DiagramRenderer, DiagramSource, export_scene
+from .scene import load_scene
+
+# Constants
+BATCH_FORMATS = ("png", "pdf")
+SERVER_NAME = "UmpireTrackEditor"
+SERVER_TIMEOUT_MS = 3000  # Forwarded requests give up waiting for a connection or a reply
+SERVER_PROBE_MS = 500  # How long listen() waits to see whether a leftover socket still has an owner
+
+def parse_render_spec(spec):
+    """Turn a scene file path or 'EVENT:UMPIRES' into a render job"""
+    if spec.lower().endswith(".utscene"):
+        return ('scene', os.path.abspath(spec))
+    event, _, umpires = spec.rpartition(":")
+    if not event or not umpires.isdigit():
+        raise ValueError(f"Bad spec '{spec}'; expected a scene file or EVENT:UMPIRES")
+    return ('diagram', event, int(umpires))
+
+def parse_batch_specs(specs, source):
+    """Expand batch specs into jobs; 'all' stands for every available diagram"""
+    jobs = []
+    for spec in specs:
+        if spec == "all":
+            jobs.extend(('diagram', event, umpires)
+                        for event in source.events() for umpires in source.umpire_counts()
+                        if source.has((event, umpires)))
+        else:
+            jobs.append(parse_render_spec(spec))
+    return jobs
+
+def job_name(job):
+    if job[0] == 'scene':
+        return os.path.splitext(os.path.basename(job[1]))[0]
+    return f"{job[1]}{job[2]}"
+
+def render_job(job, path, dpi, index, source, cache=None, vector=False):
+    """Render one job to path, returning an error string (empty on success).
+
+    Diagrams come from the raster assets, so a missing file is an error,
+    unless vector asks for the procedural renderer. With a RenderCache, an
+    identical earlier render is copied instead.
+    """
+    fmt = os.path.splitext(path)[1]
+    if job[0] == 'scene':
+        try:
+            document = load_scene(job[1])
+        except (OSError, ValueError) as error:
+            return str(error)
+        filename = document.get('background', INITIAL_IMAGE)
+        if not index.has_file(filename):
+            return f"missing asset '{filename}'"
+        cache_key = RenderCache.scene_key(document, index.file_stamp(filename), fmt, dpi)
+    else:
+        _, event, umpires = job
+        drawn = vector and source.renderer.has((event, umpires))
+        if drawn:
+            stamp = f"vector:{DiagramRenderer.version()}"
+        elif index.has((event, umpires)):
+            stamp = index.stamp((event, umpires))
+        else:
+            return f"missing asset for {event} with {umpires} umpires"
+        cache_key = RenderCache.key('diagram', [event, umpires], stamp, fmt.lower(), dpi)
+    try:
+        if cache is not None and cache.fetch(cache_key, path):
+            return ""
+    except OSError as error:
+        return str(error)
+    if job[0] == 'scene':
+        background, error = index.read_file(filename)
+    else:
+        if drawn:
+            background, error = source.renderer.render(event, umpires, DIAGRAM_CANVAS, dpi / SCREEN_DPI), ""
+            size = list(DIAGRAM_CANVAS)
+        else:
+            background, error = index.read_image((event, umpires))
+            size = [background.width(), background.height()]
+        document = {'size': size, 'items': []}
+    if background.isNull():
+        return error or "cannot decode background"
+    try:
+        export_scene(document, background, path, dpi)
+    except OSError as error:
+        return str(error)
+    if cache is not None:
+        cache.store_file(cache_key, path)
+    return ""
+
+_batch_worker = {}
+
+def _init_batch_worker(vector=False):
+    """Give a pool process its own offscreen application and asset index"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    if QGuiApplication.instance() is None:
+        _batch_worker['app'] = QGuiApplication(["UmpireTrackEditor"])
+    index = open_asset_index()
+    _batch_worker['index'] = index
+    _batch_worker['source'] = DiagramSource(index, DiagramRenderer())
+    _batch_worker['source'].prefer_vector = vector
+    _batch_worker['cache'] = open_render_cache()
+    _batch_worker['vector'] = vector
+
+def render_batch_job(job, out_dir, fmt, dpi):
+    """Render one job in a pool process, returning (output name, seconds, error string).
+
+    Any exception is reported as that job's error so the rest of the batch
+    still runs.
+    """
+    started = time.perf_counter()
+    name = job_name(job)
+    path = os.path.join(out_dir, f"{name}.{fmt}")
+    try:
+        error = render_job(job, path, dpi, _batch_worker['index'], _batch_worker['source'],
+                           _batch_worker['cache'], _batch_worker['vector'])
+    except Exception as error:  # A bad job must not abort the pool
+        return name, 0.0, f"{type(error).__name__}: {error}"
+    return name, 0.0 if error else time.perf_counter() - started, error
+
+class InstanceServer(QObject):
+    """Serves requests forwarded by later launches to the running instance.
+
+    Each request and reply is one line of JSON on a QLocalSocket.
+    """
+    def __init__(self, handler, parent=None):
+        super().__init__(parent)
+        self.handler = handler
+        self.server = QLocalServer(self)
+        self.server.newConnection.connect(self._on_new_connection)
+
+    def listen(self, name=SERVER_NAME):
+        """Serve as name; False if another live instance already does"""
+        if self.server.listen(name):
+            return True
+        probe = QLocalSocket()
+        probe.connectToServer(name)
+        if probe.waitForConnected(SERVER_PROBE_MS):
+            probe.disconnectFromServer()
+            return False
+        # Nobody answered, so the socket file was left behind by a crashed instance
+        QLocalServer.removeServer(name)
+        return self.server.listen(name)
+
+    def _on_new_connection(self):
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            socket.readyRead.connect(lambda socket=socket: self._on_ready_read(socket))
+            socket.disconnected.connect(socket.deleteLater)
+
+    def _on_ready_read(self, socket):
+        if not socket.canReadLine():
+            return
+        started = time.perf_counter()
+        request = {}
+        try:
+            request = json.loads(bytes(socket.readLine()).decode('utf-8'))
+            reply = self.handler(request)
+        except (ValueError, KeyError, TypeError) as error:
+            reply = {'ok': False, 'message': f"Bad request: {error}"}
+        socket.write(json.dumps(reply).encode('utf-8') + b"\n")
+        socket.flush()
+        instruments.info("Served %s in %.1f ms", request.get('command', '?'), (time.perf_counter() - started) * 1000)
+
+def forward_to_instance(request, name=SERVER_NAME, timeout=SERVER_TIMEOUT_MS):
+    """Send a request to a running instance; returns its reply or None if none is listening.
+
+    An instance that accepts the request but does not answer within timeout
+    is busy, not gone, so that gets a failed reply rather than None and the
+    caller does not start a second instance.
+    """
+    started = time.perf_counter()
+    socket = QLocalSocket()
+    socket.connectToServer(name)
+    if not socket.waitForConnected(timeout):
+        return None
+    socket.write(json.dumps(request).encode('utf-8') + b"\n")
+    socket.flush()
+    while not socket.canReadLine():
+        if not socket.waitForReadyRead(timeout):
+            if socket.error() != QLocalSocket.SocketTimeoutError:
+                return None  # The instance closed the connection, e.g. while exiting
+            socket.abort()
+            return {'ok': False, 'message': f"The running instance is busy; no reply within {timeout} ms"}
+    reply = json.loads(bytes(socket.readLine()).decode('utf-8'))
+    socket.disconnectFromServer()
+    instruments.info("Forwarded %s to the running instance in %.1f ms",
+                     request['command'], (time.perf_counter() - started) * 1000)
+    return reply
+
+def run_batch(specs, out_dir, fmt="png", dpi=SCREEN_DPI, jobs=None, vector=False):
+    """Render specs headlessly across a process pool; non-zero exit if any fail"""
+    _init_batch_worker(vector)
+    try:
+        work = parse_batch_specs(specs, _batch_worker['source'])
+    except ValueError as error:
+        print(error)
+        return 2
+    if not work:
+        print("Nothing to render")
+        return 2
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(work)))
+    started = time.perf_counter()
+    failures = 0
+
+    def report(result):
+        nonlocal failures
+        name, seconds, error = result
+        if error:
+            failures += 1
+            print(f"FAILED {name}: {error}")
+        else:
+            print(f"{seconds * 1000:8.1f} ms  {name}.{fmt}")
+
+    if jobs == 1:
+        for job in work:
+            report(render_batch_job(job, out_dir, fmt, dpi))
+    else:
+        # spawn rather than fork: a forked child would inherit this process's Qt state
+        with multiprocessing.get_context("spawn").Pool(jobs, _init_batch_worker, (vector,)) as pool:
+            arguments = [(job, out_dir, fmt, dpi) for job in work]
+            for result in pool.starmap(render_batch_job, arguments, chunksize=1):
+                report(result)
+    elapsed = time.perf_counter() - started
+    rendered = len(work) - failures
+    print(f"Rendered {rendered}/{len(work)} items in {elapsed:.2f} s "
+          f"({rendered / elapsed:.1f} items/s, {jobs} processes)")
+    return 1 if failures else 0
@@ -0,0 +1,118 @@
+"""Layout constants, asset location and diagnostics shared by every module"""
+import sys
+import os
+import time
+import contextlib
+from collections import deque
+from PyQt5.QtGui import QColor
+
+# Constants
+LINE_SIZE = (110, 70)
+LINE_COLOR = QColor(0, 0, 255)
+LINE_THICKNESS = 3
+FONT_SIZES = {
+    'label': 17,
+    'button': 20,
+    'save_button': 18,
+    'text_box': 16
+}
+IMAGE_SIZE = (750, 400)
+INITIAL_IMAGE = "BlankOval.png"
+NUMBER_SIZE = (35, 30)
+TEXT_BOX_SIZE = (120, 30)
+SCREEN_DPI = 96
+LOG_LEVELS = {'debug': 10, 'info': 20, 'warning': 30, 'error': 40, 'off': 100}
+TRACE_SAMPLES = 1024  # Recent span timings kept for the HUD and the exit summary
+
+def asset_base_path():
+    """Return the directory containing the bundled images folder"""
+    if getattr(sys, 'frozen', False):
+        # Running as executable
+        return sys._MEIPASS
+    # Running as script: the images sit beside the umpire_track package
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class Instrumentation:
+    """Levelled diagnostics plus named timing spans kept in a ring buffer.
+
+    With tracing off, span() returns one shared no-op context manager and
+    log calls below the level return before formatting, so instrumented code
+    costs only a method call.
+    """
+    _NO_SPAN = contextlib.nullcontext()
+
+    def __init__(self, level='info', tracing=False, samples=TRACE_SAMPLES):
+        self.level = LOG_LEVELS[level]
+        self.tracing = tracing
+        self.samples = deque(maxlen=samples)
+
+    def log(self, level, message, *args):
+        """Print message % args if level is enabled"""
+        if LOG_LEVELS[level] >= self.level:
+            print(message % args if args else message)
+
+    def debug(self, message, *args):
+        self.log('debug', message, *args)
+
+    def info(self, message, *args):
+        self.log('info', message, *args)
+
+    def warning(self, message, *args):
+        self.log('warning', message, *args)
+
+    def error(self, message, *args):
+        self.log('error', message, *args)
+
+    @contextlib.contextmanager
+    def _span(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def span(self, name):
+        """Context manager timing a block as one sample of name"""
+        return self._span(name) if self.tracing else self._NO_SPAN
+
+    def record(self, name, seconds):
+        """Add a sample measured elsewhere; safe from any thread"""
+        if not self.tracing:
+            return
+        self.samples.append((name, seconds))
+        if self.level <= LOG_LEVELS['debug']:
+            print(f"{name}: {seconds * 1000:.2f} ms")
+
+    def stats(self):
+        """Per-span count, mean, max and latest time in ms over the ring buffer"""
+        grouped = {}
+        for name, seconds in list(self.samples):
+            grouped.setdefault(name, []).append(seconds * 1000)
+        return {name: {'count': len(times), 'mean': sum(times) / len(times),
+                       'max': max(times), 'last': times[-1]}
+                for name, times in grouped.items()}
+
+    def summary(self):
+        lines = [f"{'span':<18} {'count':>6} {'mean ms':>9} {'max ms':>9}"]
+        for name, stats in sorted(self.stats().items()):
+            lines.append(f"{name:<18} {stats['count']:>6} {stats['mean']:>9.2f} {stats['max']:>9.2f}")
+        return "\n".join(lines)
+instruments = Instrumentation()
+
+def peak_memory_kb():
+    """Peak resident set size, or None where the resource module is missing"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+def resident_memory_kb():
+    """Current resident set size, or None where /proc is missing"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") // 1024
@@ -0,0 +1,484 @@
+"""Procedural event diagrams, clipboard payloads and scene rendering/export"""
+import os
+import math
+import threading
+import hashlib
+from collections import OrderedDict
+from PyQt5.QtGui import (
+    QPainter, QPen, QPainterPath, QTransform, QColor, QImage, QFont,
+    QImageWriter, QPdfWriter, QPageSize
+)
+from PyQt5.QtCore import (
+    Qt, QObject, QRunnable, pyqtSignal, QMimeData, QBuffer, QByteArray, QIODevice,
+    QVariant, QRectF, QPointF, QSizeF, QMarginsF, QSize
+)
+from PyQt5.QtSvg import QSvgGenerator
+
+from .common import (
+    LINE_SIZE, LINE_COLOR, LINE_THICKNESS, FONT_SIZES, NUMBER_SIZE, TEXT_BOX_SIZE,
+    SCREEN_DPI, instruments
+)
+from .assets import RenderCache, event_sort_key
+
+# Constants
+SCENE_FONT_FAMILY = "Courier New"
+EXPORT_BAND_HEIGHT = 512  # Raster exports are painted in bands for progress/cancel
+
+# Procedural diagrams: coordinates are logical pixels on a DIAGRAM_CANVAS
+# sized canvas, the size of the pre-made rasters, and scale to any output
+# size. They are a schematic of that art, not a copy of it, so they are only
+# drawn where vector output is asked for explicitly.
+DIAGRAM_CANVAS = (575, 360)
+RENDER_MEMO_ENTRIES = 32
+UMPIRE_COUNTS = range(5, 11)
+TRACK = {
+    'center': (290, 165),
+    'half_straight': 100,  # Bend centres sit this far either side of center
+    'inner_radius': 70,
+    'lane_width': 8,
+    'lanes': 8,
+    'chute': (40, 545),    # Home straight extends past both bends
+    'finish_x': 390,
+}
+MARK_STYLES = {
+    'start': (QColor(0, 0, 0), 3, Qt.SolidLine),
+    'hurdle': (QColor(50, 100, 220), 3, Qt.SolidLine),
+    'zone': (QColor(50, 100, 220), 4, Qt.SolidLine),
+    'break': (QColor(50, 100, 220), 3, Qt.DashLine),
+}
+UMPIRE_STATIONS = {
+    'oval': [
+        (395, 340), (125, 18), (20, 165), (290, 14), (555, 165),
+        (455, 18), (130, 340), (265, 340), (150, 200), (430, 200),
+    ],
+    'straight': [
+        (395, 340), (120, 220), (300, 220), (215, 340), (340, 340),
+        (210, 220), (120, 340), (380, 220), (260, 340), (440, 340),
+    ],
+}
+# Each event: title, optional notes line, umpire station layout and marks.
+# Marks are (kind, x) across the home straight lanes, or (kind, x, 'back').
+EVENT_SPECS = {
+    "50m": {'title': "50 Meters", 'layout': 'straight', 'marks': [('start', 103)]},
+    "60m": {'title': "60 Meters", 'layout': 'straight', 'marks': [('start', 45)]},
+    "60m H": {
+        'title': "60 Meters H", 'layout': 'straight',
+        'marks': [('start', 45)] + [('hurdle', x) for x in (120, 169, 218, 267, 316)],
+    },
+    "200m": {'title': "200 Meters", 'layout': 'oval', 'marks': []},
+    "300m": {'title': "300 Meters", 'layout': 'oval', 'marks': []},
+    "400m": {'title': "400 Meters", 'layout': 'oval', 'marks': [('break', 165)]},
+    "600m": {'title': "600 Meters", 'layout': 'oval', 'marks': [('break', 165)]},
+    "800m": {
+        'title': "800 Meters", 'notes': "LS \u2013 4,5    Bell \u2013 3",
+        'layout': 'oval', 'marks': [('break', 165)],
+    },
+    "1000m": {'title': "1000 Meters", 'layout': 'oval', 'marks': []},
+    "1200m": {'title': "1200 Meters", 'layout': 'oval', 'marks': []},
+    "1500m": {'title': "1500 Meters", 'layout': 'oval', 'marks': []},
+    "2000m": {'title': "2000 Meters", 'layout': 'oval', 'marks': []},
+    "3000m": {'title': "3000 Meters", 'layout': 'oval', 'marks': []},
+    "4 x 100m Relay": {
+        'title': "4 x 100 Meter Relay", 'layout': 'oval',
+        'marks': [('zone', 250), ('zone', 330), ('zone', 250, 'back'), ('zone', 330, 'back')],
+    },
+    "4 x 200m Relay": {
+        'title': "4 x 200 Meter Relay", 'layout': 'oval',
+        'marks': [('break', 165), ('zone', 310), ('zone', 415)],
+    },
+    "4 x 400m Relay": {
+        'title': "4 x 400 Meter Relay", 'notes': "LS \u2013 5    Bell \u2013 3",
+        'layout': 'oval', 'marks': [('break', 165), ('zone', 310), ('zone', 415)],
+    },
+    "4 x 800m Relay": {
+        'title': "4 x 800 Meter Relay", 'layout': 'oval',
+        'marks': [('break', 165), ('zone', 310), ('zone', 415)],
+    },
+}
+
+class DiagramRenderer:
+    """Draws event diagrams with QPainter from EVENT_SPECS at any size and pixel ratio"""
+    def __init__(self, max_entries=RENDER_MEMO_ENTRIES):
+        self.max_entries = max_entries
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+
+    def has(self, key):
+        event, umpires = key
+        return event in EVENT_SPECS and umpires in UMPIRE_COUNTS
+
+    @staticmethod
+    def version():
+        """Hash of the drawing tables, so cached renders are dropped when they change"""
+        tables = (EVENT_SPECS, TRACK, MARK_STYLES, UMPIRE_STATIONS, DIAGRAM_CANVAS)
+        return hashlib.sha1(repr(tables).encode('utf-8')).hexdigest()[:12]
+
+    def events(self):
+        return list(EVENT_SPECS)
+
+    def umpire_counts(self):
+        return list(UMPIRE_COUNTS)
+
+    def render(self, event, umpires, size=DIAGRAM_CANVAS, dpr=1.0):
+        """Return a memoized QImage of the diagram; safe to call from pool threads"""
+        memo_key = (event, umpires, tuple(size), dpr)
+        with self._lock:
+            image = self._memo.get(memo_key)
+            if image is not None:
+                self._memo.move_to_end(memo_key)
+                return image
+        image = QImage(round(size[0] * dpr), round(size[1] * dpr), QImage.Format_ARGB32_Premultiplied)
+        image.setDevicePixelRatio(dpr)
+        image.fill(Qt.white)
+        painter = QPainter(image)
+        self.paint(painter, event, umpires, QRectF(0, 0, size[0], size[1]))
+        painter.end()
+        with self._lock:
+            self._memo[memo_key] = image
+            while len(self._memo) > self.max_entries:
+                self._memo.popitem(last=False)
+        return image
+
+    def paint(self, painter, event, umpires, rect):
+        """Paint the diagram into rect on any paint device"""
+        spec = EVENT_SPECS[event]
+        scale = min(rect.width() / DIAGRAM_CANVAS[0], rect.height() / DIAGRAM_CANVAS[1])
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setRenderHint(QPainter.TextAntialiasing)
+        painter.translate(rect.center())
+        painter.scale(scale, scale)
+        painter.translate(-DIAGRAM_CANVAS[0] / 2, -DIAGRAM_CANVAS[1] / 2)
+        self._paint_track(painter)
+        for mark in spec['marks']:
+            self._paint_mark(painter, *mark)
+        self._paint_titles(painter, spec)
+        font = QFont("Times New Roman")
+        font.setPixelSize(18)
+        painter.setFont(font)
+        painter.setPen(Qt.black)
+        for number, (x, y) in enumerate(UMPIRE_STATIONS[spec['layout']][:umpires], start=1):
+            painter.drawText(QRectF(x - 15, y - 12, 30, 24), Qt.AlignCenter, str(number))
+        painter.restore()
+
+    def _paint_track(self, painter):
+        cx, cy = TRACK['center']
+        half = TRACK['half_straight']
+        outer = TRACK['inner_radius'] + TRACK['lanes'] * TRACK['lane_width']
+        painter.setPen(QPen(Qt.black, 1))
+        painter.setBrush(Qt.NoBrush)
+        for lane in range(TRACK['lanes'] + 1):
+            radius = TRACK['inner_radius'] + lane * TRACK['lane_width']
+            bounds = QRectF(cx - half - radius, cy - radius, 2 * (half + radius), 2 * radius)
+            painter.drawRoundedRect(bounds, radius, radius)
+            # The chute carries each lane line on past the bends, starting
+            # where it leaves the outside of the track
+            clear = math.sqrt(outer ** 2 - radius ** 2)
+            y = cy + radius
+            painter.drawLine(QPointF(TRACK['chute'][0], y), QPointF(cx - half - clear, y))
+            painter.drawLine(QPointF(cx + half + clear, y), QPointF(TRACK['chute'][1], y))
+        top, bottom = self._lane_span('home')
+        for x in (*TRACK['chute'], TRACK['finish_x']):
+            painter.drawLine(QPointF(x, top), QPointF(x, bottom))
+
+    def _lane_span(self, straight):
+        cy = TRACK['center'][1]
+        inner = TRACK['inner_radius']
+        outer = inner + TRACK['lanes'] * TRACK['lane_width']
+        return (cy + inner, cy + outer) if straight == 'home' else (cy - outer, cy - inner)
+
+    def _paint_mark(self, painter, kind, x, straight='home'):
+        color, width, style = MARK_STYLES[kind]
+        painter.setPen(QPen(color, width, style, Qt.FlatCap))
+        top, bottom = self._lane_span(straight)
+        painter.drawLine(QPointF(x, top), QPointF(x, bottom))
+
+    def _paint_titles(self, painter, spec):
+        cx, cy = TRACK['center']
+        font = QFont("Times New Roman")
+        font.setBold(True)
+        font.setPixelSize(26)
+        painter.setFont(font)
+        painter.setPen(Qt.black)
+        painter.drawText(QRectF(cx - 200, cy - 45, 400, 34), Qt.AlignCenter, spec['title'])
+        if spec.get('notes'):
+            font.setPixelSize(17)
+            painter.setFont(font)
+            painter.drawText(QRectF(cx - 200, cy - 8, 400, 24), Qt.AlignCenter, spec['notes'])
+
+class DiagramMimeData(QMimeData):
+    """Clipboard payload for a View diagram whose formats are encoded on request.
+
+    Publishing costs nothing; PNG bytes, a high-DPI PNG and SVG are only
+    produced when a pasting application asks for that format. vector_key
+    is set only when pixmap is a procedural render of that diagram, so the
+    extra formats always show the same picture as the PNG.
+    """
+    HIDPI_PNG = "image/x-umpire-hidpi-png"
+
+    def __init__(self, pixmap, vector_key=None, renderer=None, cache=None):
+        super().__init__()
+        self.pixmap = pixmap
+        self.vector_key = vector_key if renderer is not None else None
+        self.renderer = renderer
+        self.cache = cache
+        self._encoded = {}
+
+    def formats(self):
+        formats = ["application/x-qt-image", "image/png"]
+        if self.vector_key is not None:
+            formats += [self.HIDPI_PNG, "image/svg+xml"]
+        return formats
+
+    def hasFormat(self, mime_type):
+        return mime_type in self.formats()
+
+    def hasImage(self):
+        return True
+
+    def retrieveData(self, mime_type, preferred_type):
+        if mime_type == "application/x-qt-image":
+            return QVariant(self.pixmap.toImage())
+        if mime_type not in self.formats():
+            return QVariant()
+        if mime_type not in self._encoded:
+            self._encoded[mime_type] = self._cached_encode(mime_type)
+        return QVariant(self._encoded[mime_type])
+
+    def _cached_encode(self, mime_type):
+        if self.cache is None:
+            with instruments.span("clipboard.encode"):
+                return self._encode(mime_type)
+        data = self.cache.get(self._cache_key(mime_type))
+        if data is not None:
+            return QByteArray(data)
+        with instruments.span("clipboard.encode"):
+            data = self._encode(mime_type)
+        self.cache.put(self._cache_key(mime_type), bytes(data))
+        return data
+
+    def _cache_key(self, mime_type):
+        """Key the PNG on the pixels being copied and vector formats on what the renderer draws"""
+        if mime_type == "image/png":
+            image = self.pixmap.toImage()
+            digest = hashlib.sha256(image.constBits().asstring(image.sizeInBytes())).hexdigest()
+            return RenderCache.key('clipboard', mime_type, image.width(), image.height(), image.format(), digest)
+        return RenderCache.key('clipboard', mime_type, self.vector_key, DiagramRenderer.version())
+
+    def _encode(self, mime_type):
+        data = QByteArray()
+        buffer = QBuffer(data)
+        buffer.open(QIODevice.WriteOnly)
+        if mime_type == "image/png":
+            self.pixmap.toImage().save(buffer, "PNG")
+        elif mime_type == self.HIDPI_PNG:
+            image = self.renderer.render(*self.vector_key, DIAGRAM_CANVAS, 2.0)
+            image.save(buffer, "PNG")
+        else:
+            generator = QSvgGenerator()
+            generator.setOutputDevice(buffer)
+            generator.setSize(QSize(*DIAGRAM_CANVAS))
+            generator.setViewBox(QRectF(0, 0, *DIAGRAM_CANVAS))
+            painter = QPainter(generator)
+            self.renderer.paint(painter, *self.vector_key, QRectF(0, 0, *DIAGRAM_CANVAS))
+            painter.end()
+        buffer.close()
+        return data
+
+class DiagramSource:
+    """Serves View tab diagrams from the raster assets.
+
+    With prefer_vector on, keys the procedural renderer knows are drawn by
+    it instead, at render_size logical pixels and device_pixel_ratio, so
+    they need no rescale to fill the label. With it off the renderer is
+    never consulted, and a key without a raster is simply missing.
+    """
+    def __init__(self, index, renderer):
+        self.index = index
+        self.renderer = renderer
+        self.prefer_vector = False
+        self.render_size = DIAGRAM_CANVAS
+        self.device_pixel_ratio = 1.0
+
+    def is_vector(self, key):
+        """True when read_image(key) draws the diagram rather than decoding a raster"""
+        return self.prefer_vector and self.renderer.has(key)
+
+    def has(self, key):
+        return self.is_vector(key) or self.index.has(key)
+
+    def events(self):
+        events = set(self.index.events())
+        if self.prefer_vector:
+            events.update(self.renderer.events())
+        return sorted(events, key=event_sort_key)
+
+    def umpire_counts(self):
+        counts = set(self.index.umpire_counts())
+        if self.prefer_vector:
+            counts.update(self.renderer.umpire_counts())
+        return sorted(counts)
+
+    def read_image(self, key):
+        """Decode or render the diagram for key, returning (QImage, error string)"""
+        if self.is_vector(key):
+            return self.renderer.render(*key, self.render_size, self.device_pixel_ratio), ""
+        return self.index.read_image(key)
+
+    def stamp(self, key):
+        """String identifying the content read_image(key) would return"""
+        if self.is_vector(key):
+            width, height = self.render_size
+            return f"vector:{DiagramRenderer.version()}:{width}x{height}@{self.device_pixel_ratio}"
+        return self.index.stamp(key)
+
+def line_path(line_type, width, height):
+    """Unrotated straight or curved line path filling a width x height box"""
+    path = QPainterPath()
+    path.moveTo(0, height // 2)
+    if line_type == "straight":
+        path.lineTo(width, height // 2)
+    else:
+        path.quadTo(width // 2, height, width, height // 2)
+    return path
+
+def line_transform(angle, width, height):
+    """Rotation by angle about the centre of a width x height line box"""
+    transform = QTransform()
+    transform.translate(width / 2, height / 2)
+    transform.rotate(angle)
+    transform.translate(-width / 2, -height / 2)
+    return transform
+
+def _scene_font(pixel_size):
+    font = QFont(SCENE_FONT_FAMILY)
+    font.setPixelSize(pixel_size)
+    font.setBold(True)
+    return font
+
+def paint_scene(painter, document, background):
+    """Draw a scene document in its logical coordinates on any paint device.
+
+    Only QImage and plain data are touched, so this is safe on worker
+    threads and from headless scripts.
+    """
+    width, height = document['size']
+    painter.setRenderHint(QPainter.Antialiasing)
+    painter.setRenderHint(QPainter.SmoothPixmapTransform)
+    if background is not None and not background.isNull():
+        painter.drawImage(QRectF(0, 0, width, height), background)
+    for state in document['items']:
+        painter.save()
+        painter.translate(state['x'], state['y'])
+        if state['type'] == "number":
+            painter.setFont(_scene_font(FONT_SIZES['label']))
+            painter.setPen(Qt.black)
+            painter.drawText(QRectF(0, 0, *NUMBER_SIZE), Qt.AlignCenter, state['text'])
+        elif state['type'] == "text":
+            rect = QRectF(0, 0, state.get('w', TEXT_BOX_SIZE[0]), state.get('h', TEXT_BOX_SIZE[1]))
+            painter.setPen(QPen(Qt.black, 1))
+            painter.setBrush(Qt.white)
+            painter.drawRect(rect)
+            painter.setFont(_scene_font(FONT_SIZES['text_box']))
+            painter.drawText(rect, Qt.AlignCenter, state['text'])
+        else:
+            painter.setTransform(line_transform(state.get('angle', 0), *LINE_SIZE), True)
+            painter.setPen(QPen(LINE_COLOR, LINE_THICKNESS))
+            painter.setBrush(Qt.NoBrush)
+            painter.drawPath(line_path(state['type'], *LINE_SIZE))
+        painter.restore()
+
+def export_scene(document, background, path, dpi=SCREEN_DPI, progress=None, cancelled=None):
+    """Render a scene document to PNG/JPEG at any DPI, or to SVG or PDF.
+
+    progress(percent) is called as work completes and cancelled() is polled
+    between steps. Returns False if the export was cancelled.
+    """
+    progress = progress or (lambda percent: None)
+    cancelled = cancelled or (lambda: False)
+    width, height = document['size']
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".svg", ".pdf"):
+        if extension == ".svg":
+            device = QSvgGenerator()
+            device.setFileName(path)
+            device.setSize(QSize(width, height))
+            device.setViewBox(QRectF(0, 0, width, height))
+            device.setResolution(SCREEN_DPI)
+            scale = 1.0
+        else:
+            device = QPdfWriter(path)
+            device.setResolution(dpi)
+            device.setPageSize(QPageSize(QSizeF(width, height), QPageSize.Point))
+            device.setPageMargins(QMarginsF(0, 0, 0, 0))
+            scale = dpi / 72
+        painter = QPainter(device)
+        painter.scale(scale, scale)
+        paint_scene(painter, document, background)
+        painter.end()
+        progress(100)
+        return True
+
+    scale = dpi / SCREEN_DPI
+    out_width, out_height = round(width * scale), round(height * scale)
+    image = QImage(out_width, out_height, QImage.Format_ARGB32_Premultiplied)
+    image.fill(Qt.white)
+    dots_per_meter = round(dpi / 0.0254)
+    image.setDotsPerMeterX(dots_per_meter)
+    image.setDotsPerMeterY(dots_per_meter)
+    bands = max(1, -(-out_height // EXPORT_BAND_HEIGHT))
+    for band in range(bands):
+        if cancelled():
+            return False
+        painter = QPainter(image)
+        painter.setClipRect(0, band * EXPORT_BAND_HEIGHT, out_width, EXPORT_BAND_HEIGHT)
+        painter.scale(scale, scale)
+        paint_scene(painter, document, background)
+        painter.end()
+        progress(90 * (band + 1) // bands)
+    if cancelled():
+        return False
+    writer = QImageWriter(path)
+    if not writer.write(image):
+        raise OSError(writer.errorString())
+    progress(100)
+    return True
+
+class _ExportSignals(QObject):
+    progress = pyqtSignal(int)
+    finished = pyqtSignal(str, bool, str)  # path, completed, error
+
+class ExportTask(QRunnable):
+    """Decode the background, then rasterize and encode a scene snapshot on a pool thread.
+
+    finished is emitted exactly once, whatever goes wrong.
+    """
+    def __init__(self, document, index, background_name, path, dpi, cache=None, cache_key=None):
+        super().__init__()
+        self.document = document
+        self.index = index
+        self.background_name = background_name
+        self.path = path
+        self.dpi = dpi
+        self.cache = cache if cache_key is not None else None
+        self.cache_key = cache_key
+        self.cancelled = False
+        self.signals = _ExportSignals()
+
+    def run(self):
+        try:
+            with instruments.span("export"):
+                if self.cache is not None and self.cache.fetch(self.cache_key, self.path):
+                    completed = True
+                else:
+                    background, _ = self.index.read_file(self.background_name)
+                    completed = export_scene(
+                        self.document, background, self.path, self.dpi,
+                        self.signals.progress.emit, lambda: self.cancelled
+                    )
+                    if completed and self.cache is not None:
+                        self.cache.store_file(self.cache_key, self.path)
+        except Exception as error:  # The window waits on finished, so every failure must reach it
+            self.signals.finished.emit(self.path, False, str(error) or type(error).__name__)
+            return
+        self.signals.finished.emit(self.path, completed, "")
@@ -0,0 +1,343 @@
+"""Scene documents, the autosave journal and undo/redo history for the Edit canvas"""
+import os
+import math
+import time
+import threading
+import json
+import queue
+from PyQt5.QtCore import QLockFile
+
+from .common import IMAGE_SIZE, INITIAL_IMAGE, instruments
+
+# Constants
+SCENE_FORMAT = "umpire-track-scene"
+SCENE_VERSION = 1
+SCENE_FILTER = "Scene Files (*.utscene);;All Files (*)"
+ITEM_FIELDS = {  # Item type -> required fields beyond id, type, x and y
+    'number': ('text',),
+    'text': ('text',),
+    'straight': (),
+    'curved': (),
+}
+JOURNAL_NAME = "autosave-{}.journal"  # One journal per running instance, by slot number
+JOURNAL_SLOTS = 8
+JOURNAL_COMPACT_EVERY = 200  # Journal records before folding into a snapshot
+UNDO_MAX_BYTES = 256 * 1024  # Approximate memory cap for undo/redo history
+UNDO_MERGE_SECONDS = 1.0     # Repeated edits of one item within this merge
+
+def scene_document(background, items):
+    """Build a versioned scene document from item state dicts"""
+    return {
+        'format': SCENE_FORMAT,
+        'version': SCENE_VERSION,
+        'background': background,
+        'size': list(IMAGE_SIZE),
+        'items': items,
+    }
+
+def save_scene(path, document):
+    temp_path = path + ".tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(document, f, indent=1)
+    os.replace(temp_path, path)
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+def validate_item(state):
+    """Raise ValueError unless state describes an item the canvases can build"""
+    if not isinstance(state, dict):
+        raise ValueError(f"item {state!r} is not an object")
+    kind = state.get('type')
+    if kind not in ITEM_FIELDS:
+        raise ValueError(f"unknown item type {kind!r}")
+    item_id = state.get('id')
+    if item_id is not None and (not isinstance(item_id, int) or isinstance(item_id, bool) or item_id < 1):
+        raise ValueError(f"bad item id {item_id!r}")
+    for field in ('x', 'y', 'angle', 'w', 'h'):
+        if field in state and not _is_number(state[field]):
+            raise ValueError(f"{kind} item has a bad {field} {state[field]!r}")
+    if 'x' not in state or 'y' not in state:
+        raise ValueError(f"{kind} item has no position")
+    for field in ITEM_FIELDS[kind]:
+        if not isinstance(state.get(field), str):
+            raise ValueError(f"{kind} item has no {field}")
+
+def validate_scene(document):
+    """Raise ValueError unless document is a scene this version can draw"""
+    if not isinstance(document, dict) or document.get('format') != SCENE_FORMAT:
+        raise ValueError("not a scene file")
+    version = document.get('version', 0)
+    if not isinstance(version, int) or version > SCENE_VERSION:
+        raise ValueError(f"saved by a newer version (v{version})")
+    size = document.get('size')
+    if not (isinstance(size, list) and len(size) == 2
+            and all(isinstance(side, int) and not isinstance(side, bool) and side > 0 for side in size)):
+        raise ValueError(f"bad scene size {size!r}")
+    if not isinstance(document.get('background', INITIAL_IMAGE), str):
+        raise ValueError("bad background name")
+    items = document.get('items')
+    if not isinstance(items, list):
+        raise ValueError("scene has no item list")
+    ids = set()
+    for state in items:
+        validate_item(state)
+        if state.get('id') is not None:
+            if state['id'] in ids:
+                raise ValueError(f"duplicate item id {state['id']}")
+            ids.add(state['id'])
+
+def load_scene(path):
+    """Read and validate a scene document, raising ValueError if it is unusable"""
+    with open(path, encoding='utf-8') as f:
+        document = json.load(f)
+    try:
+        validate_scene(document)
+    except ValueError as error:
+        raise ValueError(f"'{path}': {error}")
+    return document
+
+def claim_journal(directory, slots=JOURNAL_SLOTS):
+    """Lock the first autosave journal slot no running instance holds.
+
+    Returns (path, QLockFile), or (None, None) when every slot is taken.
+    A slot whose owner crashed is free again, so its journal is recovered
+    by the next launch rather than by a window that is still running.
+    """
+    for slot in range(slots):
+        path = os.path.join(directory, JOURNAL_NAME.format(slot))
+        lock = QLockFile(path + ".lock")
+        lock.setStaleLockTime(0)  # Only a dead owner frees a slot, however old its lock
+        if lock.tryLock(0):
+            return path, lock
+    return None, None
+
+class SceneJournal:
+    """Append-only autosave journal of Edit canvas changes.
+
+    Each change is one JSON line, so the cost of a save follows the size of
+    the change rather than the scene. Writes happen on a background thread.
+    compact() replaces the journal with a single snapshot record.
+    """
+    def __init__(self, path, lock=None):
+        self.path = path
+        self.lock = lock
+        self.entries = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="SceneJournal", daemon=True)
+        self._thread.start()
+
+    def append(self, record):
+        self._queue.put(('append', json.dumps(record)))
+        self.entries += 1
+
+    def compact(self, document):
+        self._queue.put(('snapshot', json.dumps({'op': 'snapshot', 'document': document})))
+        self.entries = 0
+
+    def discard(self):
+        """Remove the journal, e.g. after a clean shutdown"""
+        self._queue.put(('discard', None))
+        self.entries = 0
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        if self.lock is not None:
+            self.lock.unlock()
+
+    def _run(self):
+        journal = None
+        while True:
+            command = self._queue.get()
+            if command is None:
+                break
+            action, line = command
+            try:
+                if action == 'append':
+                    if journal is None:
+                        journal = open(self.path, 'a', encoding='utf-8')
+                    journal.write(line + "\n")
+                    journal.flush()
+                    continue
+                if journal is not None:
+                    journal.close()
+                    journal = None
+                if action == 'snapshot':
+                    temp_path = self.path + ".tmp"
+                    with open(temp_path, 'w', encoding='utf-8') as f:
+                        f.write(line + "\n")
+                    os.replace(temp_path, self.path)
+                elif os.path.exists(self.path):
+                    os.remove(self.path)
+            except OSError as error:
+                instruments.error("Autosave failed: %s", error)
+        if journal is not None:
+            journal.close()
+
+    @staticmethod
+    def replay(path):
+        """Rebuild the last scene document from a journal, or None.
+
+        Replay stops at the first record that is torn or does not describe
+        valid items, keeping everything journalled before it.
+        """
+        try:
+            with open(path, encoding='utf-8') as f:
+                lines = f.readlines()
+        except OSError:
+            return None
+        document, items = None, {}
+        for line in lines:
+            try:
+                record = json.loads(line)
+                SceneJournal._apply(record, items)
+                if record['op'] == 'snapshot':
+                    document = record['document']
+            except (ValueError, KeyError, TypeError):
+                break  # Torn final write from a crash, or a damaged record
+        if document is None and not items:
+            return None
+        background = document['background'] if document else INITIAL_IMAGE
+        return scene_document(background, list(items.values()))
+
+    @staticmethod
+    def _apply(record, items):
+        op = record['op']
+        if op == 'snapshot':
+            validate_scene(record['document'])
+            if any(state.get('id') is None for state in record['document']['items']):
+                raise ValueError("journalled item has no id")
+            items.clear()
+            items.update((state['id'], state) for state in record['document']['items'])
+        elif op == 'add':
+            validate_item(record['item'])
+            items[record['item']['id']] = record['item']
+        elif op == 'update':
+            if record['id'] in items:
+                state = dict(items[record['id']], **record['changes'])
+                validate_item(state)
+                items[record['id']] = state
+        elif op == 'remove':
+            items.pop(record['id'], None)
+        else:
+            raise ValueError(f"unknown journal op {op!r}")
+
+def journal_record(before, after):
+    """Smallest journal record describing one canvas change"""
+    if before is None:
+        return {'op': 'add', 'item': after}
+    if after is None:
+        return {'op': 'remove', 'id': before['id']}
+    changes = {key: value for key, value in after.items() if before.get(key) != value}
+    return {'op': 'update', 'id': after['id'], 'changes': changes}
+
+class UndoCommand:
+    """One reversible canvas edit stored as small per-item state deltas.
+
+    Batched edits such as group moves hold one delta per item.
+    """
+    __slots__ = ('changes', 'batch_id', 'size', 'stamp')
+
+    def __init__(self, before, after, batch_id=None):
+        self.changes = []
+        self.batch_id = batch_id
+        self.size = 64
+        self.add(before, after)
+
+    def add(self, before, after):
+        item_id = (after if after is not None else before)['id']
+        if before is not None and after is not None:
+            # Moves, rotations, resizes and text edits keep only changed fields
+            changed = [key for key in after if before.get(key) != after[key]]
+            before = {key: before[key] for key in changed}
+            after = {key: after[key] for key in changed}
+        self.changes.append((item_id, before, after))
+        self.stamp = time.monotonic()
+        self.size += len(json.dumps([before, after])) + 16
+
+    def merge(self, other):
+        """Fold a rapid follow-up edit of the same fields into this command"""
+        if len(self.changes) != 1 or len(other.changes) != 1:
+            return False
+        (item_id, before, after), (other_id, other_before, other_after) = self.changes[0], other.changes[0]
+        if (before is None or after is None or other_before is None
+                or other_after is None or item_id != other_id
+                or set(after) != set(other_after)
+                or other.stamp - self.stamp > UNDO_MERGE_SECONDS):
+            return False
+        self.changes[0] = (item_id, before, other_after)
+        self.stamp = other.stamp
+        self.size = len(json.dumps([before, other_after])) + 80
+        return True
+
+class UndoHistory:
+    """Undo/redo stack of canvas deltas with merging and a memory cap"""
+    def __init__(self, canvas, max_bytes=UNDO_MAX_BYTES):
+        self.canvas = canvas
+        self.max_bytes = max_bytes
+        self.undo_stack = []
+        self.redo_stack = []
+        self.total_bytes = 0
+        self._applying = False
+        canvas.changed.connect(self.record)
+
+    def record(self, before, after):
+        """Push a change reported by the canvas"""
+        if self._applying:
+            return
+        batch_id = self.canvas.batch_id
+        if batch_id is not None and self.undo_stack and self.undo_stack[-1].batch_id == batch_id:
+            command = self.undo_stack[-1]
+            self.total_bytes -= command.size
+            command.add(before, after)
+            self.total_bytes += command.size
+            return
+        command = UndoCommand(before, after, batch_id)
+        self._drop(self.redo_stack)
+        if self.undo_stack and self.undo_stack[-1].merge(command):
+            self._recount()
+        else:
+            self.undo_stack.append(command)
+            self.total_bytes += command.size
+        while self.total_bytes > self.max_bytes and len(self.undo_stack) > 1:
+            self.total_bytes -= self.undo_stack.pop(0).size
+
+    def undo(self):
+        if self.undo_stack:
+            command = self.undo_stack.pop()
+            self._apply([(item_id, after, before) for item_id, before, after in reversed(command.changes)])
+            self.redo_stack.append(command)
+
+    def redo(self):
+        if self.redo_stack:
+            command = self.redo_stack.pop()
+            self._apply(command.changes)
+            self.undo_stack.append(command)
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.total_bytes = 0
+
+    def _apply(self, steps):
+        """Apply (item_id, current, target) steps as one batch; changes still reach listeners"""
+        self._applying = True
+        try:
+            with self.canvas.batch():
+                for item_id, current, target in steps:
+                    if target is None:
+                        self.canvas.remove_item(item_id)
+                    elif current is None:
+                        self.canvas.create_item(target)
+                    else:
+                        self.canvas.update_item(item_id, target)
+        finally:
+            self._applying = False
+
+    def _drop(self, stack):
+        self.total_bytes -= sum(command.size for command in stack)
+        stack.clear()
+
+    def _recount(self):
+        self.total_bytes = sum(c.size for c in self.undo_stack) + sum(c.size for c in self.redo_stack)